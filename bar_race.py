@@ -0,0 +1,104 @@
+import json
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+# Bar races are stored as finished Plotly figure JSON. Each frame holds only its top-N bars,
+# so the figure grows with frames x N whatever the size of the universe, and an app that
+# finds a stored race passes it to dcc.Graph without touching the data.
+DEFAULT_TOP_N = 10
+PALETTE = qualitative.Plotly
+
+
+def race_frames(values, top_n=DEFAULT_TOP_N, step=1):
+    # Rows (every `step`-th, always ending on the last) of a wide (frames x tickers) DataFrame
+    # and, per row, the column positions and values of its top-N entries, smallest first so
+    # the largest bar is drawn on top. Missing values never make the top N.
+    positions = list(range(0, len(values), step))
+    if positions and positions[-1] != len(values) - 1:
+        positions.append(len(values) - 1)
+    matrix = values.to_numpy(dtype=np.float64)[positions]
+    k = min(top_n, matrix.shape[1])
+    keyed = np.where(np.isnan(matrix), -np.inf, matrix)
+    top = np.argpartition(-keyed, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(keyed, top, axis=1), axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    return positions, top, np.take_along_axis(matrix, top, axis=1)
+
+
+def build_bar_race(values, labels, top_n=DEFAULT_TOP_N, step=1, max_frames=None, text_format='%{x:.2f}',
+                   frame_ms=500, transition_ms=500, layout=None):
+    # Horizontal bar race over `values` (frames x tickers), one frame per `step` rows named by
+    # `labels`; the step widens so that there are at most `max_frames` frames. Every ticker
+    # keeps one colour. Returns the figure as a JSON-ready dict.
+    if max_frames:
+        step = max(step, -(-len(values) // max_frames))
+    tickers = list(values.columns)
+    colors = [PALETTE[i % len(PALETTE)] for i in range(len(tickers))]
+    positions, top, top_values = race_frames(values, top_n, step)
+
+    frames = []
+    for label, columns, row in zip((labels[i] for i in positions), top, top_values):
+        keep = ~np.isnan(row)
+        frames.append({'name': label, 'data': [{
+            'x': np.round(row[keep], 4).tolist(),
+            'y': [tickers[i] for i in columns[keep]],
+            'marker': {'color': [colors[i] for i in columns[keep]]},
+        }]})
+    frame_names = [frame['name'] for frame in frames]
+
+    # Layout goes through Plotly once so that templates are expanded for the browser
+    figure = go.Figure(layout=layout).to_plotly_json()
+    figure['data'] = [{
+        'type': 'bar',
+        'orientation': 'h',
+        'texttemplate': text_format,
+        'textposition': 'outside',
+        'cliponaxis': False,
+        'hovertemplate': '%{y}: %{x:.2f}<extra></extra>',
+        **(frames[0]['data'][0] if frames else {}),
+        'marker': {**(frames[0]['data'][0]['marker'] if frames else {}), 'line': {'width': 0.5}},
+    }]
+    figure['frames'] = frames
+    figure['layout']['updatemenus'] = [{
+        'type': 'buttons',
+        'direction': 'left',
+        'showactive': False,
+        'x': 0.1, 'y': 0, 'xanchor': 'right', 'yanchor': 'top',
+        'pad': {'r': 10, 't': 70},
+        'buttons': [
+            {'label': 'Play', 'method': 'animate',
+             'args': [None, {'frame': {'duration': frame_ms, 'redraw': True},
+                             'transition': {'duration': transition_ms}, 'fromcurrent': True}]},
+            {'label': 'Pause', 'method': 'animate',
+             'args': [[None], {'frame': {'duration': 0, 'redraw': False},
+                               'transition': {'duration': 0}, 'mode': 'immediate'}]},
+        ],
+    }]
+    figure['layout']['sliders'] = [{
+        'active': 0,
+        'x': 0.1, 'y': 0, 'len': 0.9, 'xanchor': 'left', 'yanchor': 'top',
+        'pad': {'b': 10, 't': 60},
+        'currentvalue': {'prefix': ''},
+        'steps': [{'label': name, 'method': 'animate',
+                   'args': [[name], {'frame': {'duration': 0, 'redraw': True},
+                                     'transition': {'duration': 0}, 'mode': 'immediate'}]}
+                  for name in frame_names],
+    }]
+    return figure
+
+
+def write_bar_race(figure, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(figure, f, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+
+
+def read_bar_race(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Import-time profile of one module from `python -X importtime`, in a fresh interpreter:
+# total time, then self time summed per top-level package, heaviest first. Run it before
+# and after a change to see what the module loads at startup.
+#
+#   python benchmarks/import_profile.py infoviz --top 15
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_imports(module):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, INFOVIZ_LAUNCH_DASH_APPS='0')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    packages = defaultdict(int)
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us)
+        if name.strip() == module:
+            total_us = int(cumulative_us)
+    error = result.stderr.strip().splitlines()[-1] if result.returncode else None
+    return {
+        'module': module,
+        'total_seconds': total_us / 1e6,
+        'packages': {name: us / 1e6 for name, us in sorted(packages.items(), key=lambda item: -item[1])},
+        'error': error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile what a module imports at startup")
+    parser.add_argument('module', nargs='?', default='infoviz')
+    parser.add_argument('--top', type=int, default=15, help="packages to list")
+    parser.add_argument('--json', help="also write the full profile here")
+    args = parser.parse_args()
+
+    profile = profile_imports(args.module)
+    if profile['error']:
+        print(f"Import of {args.module} failed: {profile['error']}")
+    print(f"{args.module}: {profile['total_seconds']:.3f}s")
+    for name, seconds in list(profile['packages'].items())[:args.top]:
+        print(f"  {seconds:8.3f}s  {name}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(profile, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import importlib
+import importlib.util
+import json
+import resource
+import statistics
+import sys
+import time
+
+from plotly.io.json import to_json_plotly
+
+# Child process of run_benchmarks.py: imports one dashboard in a fresh interpreter (so
+# startup time and peak RSS belong to that module alone), times its callbacks and writes
+# the measurements as JSON. Run with the working directory holding the caches under test.
+
+# Callback per Dash module and the arguments it receives on first page load
+CALLBACKS = {
+    'dash_bubble_chart': [('update_chart', lambda m: (['ALL'],))],
+    'dash_parallel_coordinates': [('update_parallel_chart', lambda m: (m.stocks,))],
+    'dash_risk_return_matrix': [
+        ('update_risk_return_bubble_matrix', lambda m: (m.stocks,)),
+        ('update_correlation_heatmap', lambda m: (m.stocks,)),
+        ('update_correlated_pairs', lambda m: (m.stocks[0],)),
+    ],
+    'dash_bubble_chart_animation': [
+        ('render_bubble_chart', lambda m: (m.df['Ticker'].unique().tolist(), 'D')),
+        ('load_frames', lambda m: (m.FRAME_CHUNK_SIZE, 'D', m.df['Ticker'].unique().tolist())),
+    ],
+    'dash_sparklines': [('update_table_and_content', lambda m: ([0], None))],
+}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def payload_bytes(value):
+    # Size of the JSON Dash sends to the browser for a layout or callback output
+    return len(to_json_plotly(value).encode())
+
+
+def _latency_summary(latencies):
+    return {
+        'min': min(latencies),
+        'median': statistics.median(latencies),
+        'max': max(latencies),
+    }
+
+
+def clear_caches(module):
+    # Forget every figure and memoized result, so the next call does the callback's full work
+    import figure_cache
+    figure_cache.invalidate()
+    for value in vars(module).values():
+        if hasattr(value, 'cache_clear') and getattr(value, '__module__', None) == module.__name__:
+            value.cache_clear()
+
+
+def time_callback(module, func, args, repeat):
+    # 'latency_seconds' times cold calls (caches cleared first), comparable with results from
+    # before the figure cache; 'cached_latency_seconds' times the repeated call that follows
+    latencies, cached_latencies = [], []
+    for _ in range(repeat):
+        clear_caches(module)
+        start = time.perf_counter()
+        output = func(*args)
+        latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        func(*args)
+        cached_latencies.append(time.perf_counter() - start)
+    return {
+        'latency_seconds': _latency_summary(latencies),
+        'cached_latency_seconds': _latency_summary(cached_latencies),
+        'output_bytes': payload_bytes(output),
+    }
+
+
+def measure_dash(module_name, repeat):
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    result = {
+        'import_seconds': time.perf_counter() - start,
+        'layout_bytes': payload_bytes(module.app.layout),
+        'callbacks': {},
+    }
+    for name, make_args in CALLBACKS.get(module_name, []):
+        result['callbacks'][name] = time_callback(module, getattr(module, name), make_args(module), repeat)
+    return result
+
+
+def measure_streamlit(script, timeout):
+    # Runs the whole script (imports plus main()) the way `streamlit run` does
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    app = AppTest.from_file(script, default_timeout=timeout).run()
+    result = {'import_seconds': time.perf_counter() - start, 'callbacks': {}}
+    if app.exception:
+        result['error'] = str(app.exception[0].value)
+    return result
+
+
+def main():
+    module_name, output_path, repeat, timeout = sys.argv[1], sys.argv[2], int(sys.argv[3]), float(sys.argv[4])
+    try:
+        if module_name == 'infoviz':
+            result = measure_streamlit(importlib.util.find_spec('infoviz').origin, timeout)
+        else:
+            result = measure_dash(module_name, repeat)
+    except Exception as e:
+        result = {'error': f"{type(e).__name__}: {e}"}
+    result['peak_rss_mb'] = peak_rss_mb()
+    with open(output_path, 'w') as f:
+        json.dump(result, f)
+
+
+if __name__ == '__main__':
+    main()
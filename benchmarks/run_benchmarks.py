@@ -0,0 +1,144 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+# Benchmarks every dashboard against the synthetic provider over a grid of universe sizes and
+# history lengths. Each (module, size, history) runs twice in a fresh process and an empty
+# working directory: 'cold' fills the caches from the provider, 'warm' reuses them.
+#
+#   python benchmarks/run_benchmarks.py --output benchmarks/baseline.json
+#   python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEASURE_SCRIPT = os.path.join(REPO_ROOT, 'benchmarks', 'measure.py')
+
+MODULES = [
+    'dash_app', 'dash_sparklines', 'dash_bar_chart_race', 'dash_bubble_chart',
+    'dash_bubble_chart_animation', 'dash_parallel_coordinates', 'dash_risk_return_matrix',
+    'infoviz',
+]
+UNIVERSE_SIZES = [10, 100, 1000, 5000]
+HISTORY_PERIODS = ['1y', '10y']
+PHASES = ['cold', 'warm']
+
+
+def run_case(module, size, period, workdir, args):
+    env = dict(
+        os.environ,
+        PYTHONPATH=REPO_ROOT,
+        INFOVIZ_DATA_PROVIDER='synthetic',
+        INFOVIZ_UNIVERSE_SIZE=str(size),
+        INFOVIZ_HISTORY_PERIOD=period,
+        # The synthetic provider has no request budget to protect
+        INFOVIZ_FETCH_RATE='1000',
+        # Dash apps are benchmarked as their own cases; infoviz must not spawn them here
+        INFOVIZ_LAUNCH_DASH_APPS='0',
+    )
+    output_path = os.path.join(workdir, 'measurement.json')
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    command = [sys.executable, MEASURE_SCRIPT, module, output_path, str(args.repeat), str(args.timeout)]
+    try:
+        subprocess.run(command, cwd=workdir, env=env, timeout=args.timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(output_path) as f:
+            return json.load(f)
+    except subprocess.TimeoutExpired:
+        return {'error': f"timed out after {args.timeout:.0f}s"}
+    except FileNotFoundError:
+        return {'error': "measurement process exited without writing results"}
+
+
+def run_benchmarks(args):
+    results = []
+    for module, size, period in itertools.product(args.modules, args.sizes, args.periods):
+        workdir = tempfile.mkdtemp(prefix='infoviz-bench-')
+        try:
+            for phase in PHASES:
+                measurement = run_case(module, size, period, workdir, args)
+                results.append({'module': module, 'universe_size': size, 'history_period': period,
+                                'phase': phase, **measurement})
+                status = measurement.get('error') or f"{measurement['import_seconds']:.2f}s startup"
+                print(f"{module} size={size} history={period} {phase}: {status}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'meta': {
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+
+def _case_key(result):
+    return result['module'], result['universe_size'], result['history_period'], result['phase']
+
+
+def _metrics(result):
+    # Flat {metric name: value} view of one result, lower is better for every metric
+    metrics = {name: result[name] for name in ('import_seconds', 'layout_bytes', 'peak_rss_mb') if name in result}
+    for name, callback in result.get('callbacks', {}).items():
+        metrics[f"{name}.median_seconds"] = callback['latency_seconds']['median']
+        if 'cached_latency_seconds' in callback:
+            metrics[f"{name}.cached_median_seconds"] = callback['cached_latency_seconds']['median']
+        metrics[f"{name}.output_bytes"] = callback['output_bytes']
+    return metrics
+
+
+def compare(report, baseline, tolerance):
+    # Print every metric that moved by more than `tolerance` (relative); returns the regressions
+    baseline_results = {_case_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        previous = baseline_results.get(_case_key(result))
+        if previous is None:
+            continue
+        before, after = _metrics(previous), _metrics(result)
+        for name in before.keys() & after.keys():
+            if not before[name]:
+                continue
+            change = after[name] / before[name] - 1
+            if abs(change) > tolerance:
+                label = "REGRESSION" if change > 0 else "improvement"
+                print(f"{label}: {' '.join(map(str, _case_key(result)))} {name} "
+                      f"{before[name]:.4g} -> {after[name]:.4g} ({change:+.0%})")
+                if change > 0:
+                    regressions.append((_case_key(result), name, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard startup, callbacks and payloads")
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--sizes', nargs='+', type=int, default=UNIVERSE_SIZES)
+    parser.add_argument('--periods', nargs='+', default=HISTORY_PERIODS)
+    parser.add_argument('--repeat', type=int, default=5, help="timed calls per callback")
+    parser.add_argument('--timeout', type=float, default=1800, help="seconds per measurement process")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="relative change reported by --baseline")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
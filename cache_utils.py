@@ -1,27 +1,303 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import zlib
+from contextlib import ExitStack
+from datetime import datetime
+
 import diskcache as dc
-import yfinance as yf
 import pandas as pd
 
+from bar_race import read_bar_race, write_bar_race
+from config import (BAR_RACE_DIR, BAR_RACE_ENTRIES, CACHE_COMPRESS_LEVEL, CACHE_SIZE_LIMIT_BYTES,
+                    CORRELATION_STORE_DIR, CORRELATION_STORE_ENTRIES, FETCH_BATCH_SIZE, HISTORY_PERIOD,
+                    MARKET_SETTLED_TIME, MARKET_TIMEZONE, OHLC_PYRAMID_DIR, OHLC_PYRAMID_SOURCES)
+from correlation_store import CorrelationStore, read_index as read_correlation_index, write_correlation_store
+from data_utils import PRICE_FIELDS, history_to_frame
+from fundamentals_cache import get_fundamentals
+from ohlc_pyramid import OHLCPyramid, build_pyramid, read_index as read_pyramid_index, write_pyramid
+from providers import get_provider, period_since
+from tensor_store import DEFAULT_PATH as TENSOR_STORE_PATH, TensorStore, read_index, write_tensor_store
+
+class CompressedPickleDisk(dc.Disk):
+    # Stores every value as a zlib-compressed pickle; DataFrames of prices shrink several-fold.
+    # Each read unpickles a new object, so callers may modify what they get back.
+    def __init__(self, directory, compress_level=1, **kwargs):
+        self.compress_level = compress_level
+        super().__init__(directory, **kwargs)
+
+    def store(self, value, read, key=dc.core.UNKNOWN):
+        if not read:
+            value = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.compress_level)
+        return super().store(value, read, key=key)
+
+    def fetch(self, mode, filename, value, read):
+        data = super().fetch(mode, filename, value, read)
+        # Entries written before compression was enabled come back already unpickled
+        if not read and isinstance(data, bytes):
+            data = pickle.loads(zlib.decompress(data))
+        return data
+
+logger = logging.getLogger(__name__)
+
 # Initialize the shared cache
-cache = dc.Cache('./cache')
+cache = dc.Cache(
+    './cache',
+    disk=CompressedPickleDisk,
+    disk_compress_level=CACHE_COMPRESS_LEVEL,
+    size_limit=CACHE_SIZE_LIMIT_BYTES,
+    eviction_policy='least-recently-used',
+)
 
-def fetch_stock_data(tickers, period="1y", interval="1d"):
-    data = []
-    for ticker in tickers:
-        cache_key = f"{ticker}_{period}_{interval}"
-        if cache_key in cache:
-            hist = cache[cache_key]
-        else:
+# How long a process may hold a per-key fill lock before others stop waiting for it
+FILL_LOCK_SECONDS = 120
+
+def next_session_close(now=None):
+    # First weekday MARKET_SETTLED_TIME (exchange time) after `now`. Exchange holidays are
+    # not modelled; they only cost one extra refresh.
+    now = pd.Timestamp.now(tz=MARKET_TIMEZONE) if now is None else pd.Timestamp(now).tz_convert(MARKET_TIMEZONE)
+    hour, minute = map(int, MARKET_SETTLED_TIME.split(':'))
+    close = now.replace(hour=hour, minute=minute, second=0, microsecond=0, nanosecond=0)
+    while close <= now or close.weekday() >= 5:
+        close = (close + pd.Timedelta(days=1)).replace(hour=hour, minute=minute)
+    return close
+
+def market_ttl(now=None):
+    # Seconds until daily data cached at `now` can have changed
+    now = pd.Timestamp.now(tz=MARKET_TIMEZONE) if now is None else pd.Timestamp(now)
+    return (next_session_close(now) - now).total_seconds()
+
+def _store_until_close(key, value):
+    # Empty results are not stored, so a failed download is retried by the next caller
+    if not value.empty:
+        cache.set(key, value, expire=market_ttl())
+
+def _fill_batch(keys, fetch_many, batch_size, fresh=None, store=_store_until_close):
+    # Cached values for {ticker: key}. Misses (values fresh(value) rejects; by default, keys
+    # with nothing stored) are fetched `batch_size` at a time with
+    # fetch_many(tickers) -> {ticker: value} and each result is saved with store(key, value),
+    # by default until the next session close. Per-key locks (taken in sorted order, so batches
+    # cannot deadlock) let only one process fill a given miss; the others wait and then read
+    # its result. A ticker whose fetch fails keeps whatever was stored for it.
+    fresh = fresh or (lambda value: value is not None)
+    values = {ticker: cache.get(key) for ticker, key in keys.items()}
+    missing = sorted(ticker for ticker, value in values.items() if not fresh(value))
+
+    for i in range(0, len(missing), batch_size):
+        chunk = missing[i:i + batch_size]
+        with ExitStack() as locks:
+            for ticker in chunk:
+                locks.enter_context(dc.Lock(cache, f"lock_{keys[ticker]}", expire=FILL_LOCK_SECONDS))
+            for ticker in chunk:
+                values[ticker] = cache.get(keys[ticker])
+            still_missing = [ticker for ticker in chunk if not fresh(values[ticker])]
+            if not still_missing:
+                continue
             try:
-                hist = yf.download(ticker, period=period, interval=interval)
-                cache[cache_key] = hist
+                fetched = fetch_many(still_missing)
             except Exception as e:
-                print(f"Error fetching data for {ticker}: {e}")
+                logger.warning("Error fetching data for %s: %s", ', '.join(still_missing), e)
                 continue
+            for ticker, value in fetched.items():
+                values[ticker] = value
+                store(keys[ticker], value)
+    return values
 
-        if not hist.empty:
-            hist['Ticker'] = ticker
-            hist['Date'] = hist.index
-            data.append(hist.reset_index())
-
+def fetch_stock_data(tickers, period="1y", interval="1d", batch_size=FETCH_BATCH_SIZE):
+    # Long-format bars for `tickers`; cache misses are downloaded in multi-ticker requests
+    hists = _fill_batch(
+        {ticker: f"{ticker}_{period}_{interval}" for ticker in tickers},
+        lambda missing: get_provider().download_many(missing, period=period, interval=interval),
+        batch_size,
+    )
+    data = [
+        hists[ticker].rename_axis('Date').reset_index().assign(Ticker=ticker)
+        for ticker in tickers
+        if hists[ticker] is not None and not hists[ticker].empty
+    ]
     return pd.concat(data) if data else pd.DataFrame()
+
+def _history_key(ticker):
+    return f"history_{ticker}_{HISTORY_PERIOD}"
+
+def _merge_bars(hist, new_bars):
+    # Stored bars followed by newer ones, the new copy winning on dates in both. Multi-ticker
+    # downloads can differ from the stored index in timezone awareness, so they take its zone.
+    if new_bars.index.tz is None and hist.index.tz is not None:
+        new_bars = new_bars.tz_localize(hist.index.tz)
+    elif new_bars.index.tz is not None:
+        new_bars = new_bars.tz_convert(hist.index.tz) if hist.index.tz is not None else new_bars.tz_localize(None)
+    hist = pd.concat([hist, new_bars[hist.columns.intersection(new_bars.columns)]])
+    return hist[~hist.index.duplicated(keep='last')].sort_index()
+
+def _download_histories(tickers, now):
+    # {ticker: history entry} for one batch of misses, in at most two multi-ticker requests:
+    # HISTORY_PERIOD for tickers never stored, and for stored ones only the shortest period
+    # back to their oldest last bar. Stored bars the top-up returns again are replaced by
+    # the new copy, as the last one may have been stored before its session closed.
+    stored = {}
+    for ticker in tickers:
+        entry = cache.get(_history_key(ticker))
+        if entry is not None and not entry['hist'].empty:
+            stored[ticker] = entry['hist']
+    cold = [ticker for ticker in tickers if ticker not in stored]
+
+    provider = get_provider()
+    hists = provider.download_many(cold, period=HISTORY_PERIOD) if cold else {}
+    if stored:
+        period = period_since(min(hist.index[-1] for hist in stored.values()), HISTORY_PERIOD)
+        for ticker, new_bars in provider.download_many(list(stored), period=period).items():
+            if not new_bars.empty:
+                hists[ticker] = _merge_bars(stored[ticker], new_bars)
+    fresh_until = next_session_close(now)
+    return {ticker: {'hist': hist, 'fresh_until': fresh_until} for ticker, hist in hists.items()}
+
+def _store_history(key, entry):
+    # Kept past its freshness so the next session only needs the delta; the size limit
+    # evicts histories of tickers nobody asks for any more
+    if not entry['hist'].empty:
+        cache.set(key, entry)
+
+def get_histories(tickers, batch_size=FETCH_BATCH_SIZE):
+    # {ticker: daily bars} from the shared store. Histories fetched during the current market
+    # session are served as they are; the others are downloaded or topped up in multi-ticker
+    # requests of `batch_size`, so a cold universe costs a few round trips, not one per ticker.
+    # Empty when no bars could be fetched; a failed top-up serves the stored bars.
+    now = pd.Timestamp.now(tz=MARKET_TIMEZONE)
+    entries = _fill_batch(
+        {ticker: _history_key(ticker) for ticker in dict.fromkeys(tickers)},
+        lambda missing: _download_histories(missing, now),
+        batch_size,
+        fresh=lambda entry: entry is not None and 'fresh_until' in entry and now < entry['fresh_until'],
+        store=_store_history,
+    )
+    return {ticker: entry['hist'] if entry is not None else pd.DataFrame() for ticker, entry in entries.items()}
+
+def get_history(ticker):
+    # Daily bars for one ticker, shared by every app through the disk cache
+    return get_histories([ticker])[ticker]
+
+def _slice_dates(hist, start=None, end=None):
+    if hist.empty:
+        return hist
+    dates = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+    mask = pd.Series(True, index=hist.index)
+    if start is not None:
+        mask &= dates >= pd.Timestamp(start).normalize()
+    if end is not None:
+        mask &= dates < pd.Timestamp(end).normalize()
+    return hist[mask.to_numpy()]
+
+def get_market_data(tickers, start=None, end=None, fields=PRICE_FIELDS, fundamentals=None,
+                    key_col='Symbol', date_format='%Y-%m-%d'):
+    # Long-format query over the shared store: one row per ticker and bar in [start, end),
+    # the requested price `fields`, and `fundamentals` ({column: info key}) broadcast per ticker.
+    fundamentals = fundamentals or {}
+    columns = ['Date', key_col] + list(fields) + list(fundamentals)
+    info = get_fundamentals(tickers) if fundamentals else {}
+
+    hists = get_histories(tickers)
+    frames = []
+    for ticker in tickers:
+        hist = _slice_dates(hists[ticker], start, end)
+        if hist.empty:
+            continue
+        constants = {key_col: ticker}
+        for column, info_key in fundamentals.items():
+            constants[column] = info[ticker].get(info_key)
+        frames.append(history_to_frame(hist, constants, date_format=date_format, columns=columns))
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+def _tensor_store_current(index, tickers):
+    today = datetime.today().strftime('%Y-%m-%d')
+    return index is not None and index['built'] >= today and set(tickers) <= set(index['tickers'])
+
+def get_tensor_store(tickers, path=TENSOR_STORE_PATH):
+    # Memory-mapped ticker x date x field view of the shared histories. Every process maps
+    # the same file read-only, so resident memory does not grow with the number of apps.
+    # Rebuilt at most once a day, or when a requested ticker is missing. Histories are
+    # fetched before the lock is taken, so only writing and opening the store run under it,
+    # and another process cannot start a rebuild while the store is being mapped.
+    index = read_index(path)
+    histories = {}
+    if not _tensor_store_current(index, tickers):
+        histories = get_histories(list(dict.fromkeys((index['tickers'] if index else []) + list(tickers))))
+
+    with dc.Lock(cache, "lock_tensor_store", expire=600):
+        index = read_index(path)
+        if not _tensor_store_current(index, tickers):
+            # A build that finished meanwhile may have added tickers; those are stored already
+            universe = list(dict.fromkeys((index['tickers'] if index else []) + list(tickers)))
+            histories.update(get_histories([ticker for ticker in universe if ticker not in histories]))
+            write_tensor_store({ticker: histories[ticker] for ticker in universe}, path)
+        return TensorStore(path)
+
+def get_correlation_store(tickers, window_days=365, as_of=None, shrinkage='ledoit-wolf'):
+    # Pairwise correlations of daily returns over the `window_days` before `as_of` (default
+    # today), built blockwise from the tensor store and cached on disk per (universe, window,
+    # as-of date, shrinkage). Only the CORRELATION_STORE_ENTRIES most recent builds are kept.
+    as_of = pd.Timestamp(as_of or datetime.today()).normalize()
+    params = [list(tickers), window_days, as_of.strftime('%Y-%m-%d'), shrinkage]
+    key = hashlib.sha1(json.dumps(params).encode()).hexdigest()[:16]
+    path = os.path.join(CORRELATION_STORE_DIR, key)
+
+    with dc.Lock(cache, f"lock_correlation_{key}", expire=600):
+        if read_correlation_index(path) is None:
+            closes = get_tensor_store(tickers).to_frame(
+                'Close', tickers, start=as_of - pd.Timedelta(days=window_days), end=as_of + pd.Timedelta(days=1))
+            write_correlation_store(closes, path, shrinkage=shrinkage)
+            builds = sorted((os.path.join(CORRELATION_STORE_DIR, name) for name in os.listdir(CORRELATION_STORE_DIR)),
+                            key=os.path.getmtime, reverse=True)
+            for old in builds[CORRELATION_STORE_ENTRIES:]:
+                shutil.rmtree(old, ignore_errors=True)
+    return CorrelationStore(path)
+
+def get_bar_race(name, tickers, build, params=None):
+    # Figure JSON of one bar race, built by build() at most once a day per (name, universe,
+    # params) and read from disk by every later process. Only the BAR_RACE_ENTRIES most
+    # recent builds of each race are kept.
+    today = datetime.today().strftime('%Y-%m-%d')
+    key = hashlib.sha1(json.dumps([list(tickers), params, today]).encode()).hexdigest()[:16]
+    path = os.path.join(BAR_RACE_DIR, f"{name}-{key}.json")
+
+    with dc.Lock(cache, f"lock_bar_race_{name}_{key}", expire=600):
+        figure = read_bar_race(path)
+        if figure is None:
+            figure = build()
+            write_bar_race(figure, path)
+            builds = sorted((os.path.join(BAR_RACE_DIR, file) for file in os.listdir(BAR_RACE_DIR)
+                             if file.startswith(f"{name}-") and file.endswith('.json')),
+                            key=os.path.getmtime, reverse=True)
+            for old in builds[BAR_RACE_ENTRIES:]:
+                os.remove(old)
+    return figure
+
+def get_ohlc_pyramid(ticker):
+    # One ticker's candles at every resolution the provider can supply, from the intraday
+    # fetches in OHLC_PYRAMID_SOURCES and the shared daily history. Rebuilt at most once per
+    # market session; intervals the provider does not declare are skipped, not requested.
+    # None when no source returned bars, so the next caller tries again.
+    path = os.path.join(OHLC_PYRAMID_DIR, ticker)
+    now = pd.Timestamp.now(tz=MARKET_TIMEZONE)
+    with dc.Lock(cache, f"lock_ohlc_pyramid_{ticker}", expire=600):
+        index = read_pyramid_index(path)
+        if index is None or 'fresh_until' not in index or now >= pd.Timestamp(index['fresh_until']):
+            sources = {'1d': get_history(ticker)}
+            provider = get_provider()
+            for interval, period in OHLC_PYRAMID_SOURCES:
+                if not provider.supports_interval(interval):
+                    logger.info("Skipping %s bars for the %s pyramid: not offered by %s",
+                                interval, ticker, type(provider).__name__)
+                    continue
+                bars = fetch_stock_data([ticker], period=period, interval=interval)
+                if not bars.empty:
+                    sources[interval] = bars.set_index('Date').drop(columns='Ticker')
+            pyramid, coverage = build_pyramid(sources)
+            if not pyramid:
+                return None
+            write_pyramid(pyramid, coverage, path, next_session_close(now))
+        return OHLCPyramid(path)
@@ -1,3 +1,5 @@
+import os
+
 DASH_APPS = {
     "stock_percentage_metrics": 8053,
     "trend_analysis": 8054,
@@ -8,3 +10,72 @@ DASH_APPS = {
 }
 
 TICKERS = ['CVX', 'BA', 'GM', 'C', 'BAC', 'T', 'CAT', 'F', 'DIS', 'DE']
+
+# infoviz starts the Dash apps in the background; set INFOVIZ_LAUNCH_DASH_APPS=0 when they are
+# served separately or when profiling the Streamlit script on its own
+LAUNCH_DASH_APPS = os.environ.get("INFOVIZ_LAUNCH_DASH_APPS", "1") != "0"
+
+# Ingestion scheduler: worker pool size and provider request budget
+FETCH_MAX_WORKERS = 4
+FETCH_RATE_PER_SEC = float(os.environ.get("INFOVIZ_FETCH_RATE", "2.0"))
+FETCH_MAX_RETRIES = 3
+FETCH_BACKOFF_SECONDS = 1.0
+# Tickers per multi-ticker download request for cache misses in cache_utils (histories and
+# fetch_stock_data)
+FETCH_BATCH_SIZE = 100
+
+# Shared market-data cache (cache_utils): least-recently-used entries are evicted beyond the
+# size limit, and stored values are pickled and zlib-compressed at this level
+CACHE_SIZE_LIMIT_BYTES = 2 * 1024 ** 3
+CACHE_COMPRESS_LEVEL = 6
+
+# Cached daily data expires once the next session's bars are final: the first weekday at this
+# exchange-local time (market close plus time for the provider to publish the last bar)
+MARKET_TIMEZONE = "America/New_York"
+MARKET_SETTLED_TIME = "16:30"
+
+# Correlation stores (correlation_store.py): one directory per (universe, window, as-of date,
+# shrinkage), of which only the most recently built ones are kept
+CORRELATION_STORE_DIR = "correlation_store"
+CORRELATION_STORE_ENTRIES = 8
+
+# Serialized figures kept per Dash process (figure_cache.py), least recently used dropped first
+FIGURE_CACHE_ENTRIES = 64
+FIGURE_CACHE_MAX_BYTES = 256 * 1024 ** 2
+
+# Bar races (bar_race.py) are stored as figure JSON, one file per (race, universe, day), of
+# which only the most recent are kept. Each frame shows the top BAR_RACE_TOP_N tickers; the
+# price race advances BAR_RACE_STEP trading days per frame, or more so that it has at most
+# BAR_RACE_MAX_FRAMES frames however long the history.
+BAR_RACE_DIR = "bar_race"
+BAR_RACE_ENTRIES = 8
+BAR_RACE_TOP_N = 10
+BAR_RACE_STEP = 1
+BAR_RACE_MAX_FRAMES = 500
+
+# OHLC pyramids (ohlc_pyramid.py): one directory per ticker, rebuilt once a day. Intraday
+# levels come from these provider fetches (finest first; yfinance keeps 7 days of 1m, 60 of
+# 5m and 730 of 1h bars), daily and weekly ones from the shared daily history.
+OHLC_PYRAMID_DIR = "ohlc_pyramid"
+OHLC_PYRAMID_SOURCES = [("1m", "7d"), ("5m", "60d"), ("1h", "730d")]
+
+# Append only missing bars to the cached CSVs on startup instead of using them as-is
+INCREMENTAL_REFRESH = True
+
+# How long cached fundamentals (yfinance `info`) stay valid
+FUNDAMENTALS_TTL_SECONDS = 24 * 60 * 60
+
+# Market-data source: 'yfinance' (live) or 'synthetic' (deterministic, offline). Read from the
+# environment so the Dash processes spawned by infoviz use the same provider.
+DATA_PROVIDER = os.environ.get("INFOVIZ_DATA_PROVIDER", "yfinance")
+SYNTHETIC_LATENCY_SECONDS = float(os.environ.get("INFOVIZ_SYNTHETIC_LATENCY", "0"))
+SYNTHETIC_ERROR_RATE = float(os.environ.get("INFOVIZ_SYNTHETIC_ERROR_RATE", "0"))
+
+# Benchmarks replace TICKERS with a synthetic universe of this size (synthetic provider only)
+UNIVERSE_SIZE = int(os.environ.get("INFOVIZ_UNIVERSE_SIZE", "0"))
+if DATA_PROVIDER == "synthetic" and UNIVERSE_SIZE:
+    TICKERS = [f"SYN{i:05d}" for i in range(UNIVERSE_SIZE)]
+
+# One stored history per ticker in the shared market-data store (cache_utils), long enough
+# for the widest window any app shows (10-year race)
+HISTORY_PERIOD = os.environ.get("INFOVIZ_HISTORY_PERIOD", "10y")
@@ -0,0 +1,167 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# On-disk layout: <path>/correlation.npy is a float32 (ticker, ticker) correlation matrix
+# written one row block at a time; <path>/pairs.npz holds each ticker's top-k most and least
+# correlated partners; <path>/index.json holds the tickers, daily return std and parameters.
+# Nothing ever needs the dense matrix in memory: readers slice tiles from the memmap.
+DEFAULT_BLOCK_SIZE = 512
+DEFAULT_TOP_K = 20
+
+
+def standardized_returns(closes):
+    # Daily returns of a wide (dates x tickers) close matrix, demeaned and scaled to unit norm
+    # per ticker, so that Z.T @ Z is the correlation matrix. A return spans any gap in a
+    # ticker's bars; missing returns count as the ticker's mean. Also returns the daily std.
+    prices = closes.to_numpy(dtype=np.float64)
+    filled = closes.ffill().to_numpy(dtype=np.float64)
+    returns = prices[1:] / filled[:-1] - 1
+
+    observed = ~np.isnan(returns)
+    counts = observed.sum(axis=0)
+    mean = np.where(counts > 0, np.nansum(returns, axis=0) / np.maximum(counts, 1), 0.0)
+    centered = np.where(observed, returns - mean, 0.0)
+    norm = np.sqrt((centered ** 2).sum(axis=0))
+    std = np.where(counts > 1, norm / np.sqrt(np.maximum(counts - 1, 1)), np.nan)
+    z = np.divide(centered, norm, out=np.zeros_like(centered), where=norm > 0)
+    return z, std
+
+
+def ledoit_wolf_shrinkage(z):
+    # Ledoit-Wolf intensity for shrinking the correlation matrix Z.T @ Z towards the identity.
+    # Every term reduces to the (date x date) Gram matrix, so this costs O(T^2 N), not O(N^2).
+    n_dates, n_tickers = z.shape
+    if n_dates == 0 or n_tickers == 0:
+        return 0.0
+    y = z * np.sqrt(n_dates)
+    gram = y @ y.T / n_dates
+    sample_norm = (gram ** 2).sum()
+    target = np.trace(gram) / n_tickers
+    distance = (sample_norm - n_tickers * target ** 2) / n_tickers
+    row_norms = (y ** 2).sum(axis=1)
+    spread = ((row_norms ** 2).sum() - n_dates * sample_norm) / n_dates ** 2 / n_tickers
+    if distance <= 0:
+        return 0.0
+    return float(min(max(spread, 0.0), distance) / distance)
+
+
+def _top_k(block, k, largest):
+    # Column positions and values of the k largest (or smallest) entries of each row; NaN last
+    k = min(k, block.shape[1])
+    keyed = np.where(np.isnan(block), -np.inf if largest else np.inf, block)
+    keyed = -keyed if largest else keyed
+    positions = np.argpartition(keyed, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(keyed, positions, axis=1), axis=1)
+    positions = np.take_along_axis(positions, order, axis=1)
+    return positions.astype(np.int32), np.take_along_axis(block, positions, axis=1)
+
+
+def write_correlation_store(closes, path, shrinkage=None, block_size=DEFAULT_BLOCK_SIZE, top_k=DEFAULT_TOP_K):
+    # `shrinkage` is None, a fixed intensity in [0, 1] or 'ledoit-wolf'. Off-diagonal
+    # correlations are scaled by (1 - intensity).
+    os.makedirs(path, exist_ok=True)
+    tickers = list(closes.columns)
+    z, std = standardized_returns(closes.sort_index())
+    intensity = ledoit_wolf_shrinkage(z) if shrinkage == 'ledoit-wolf' else float(shrinkage or 0.0)
+    valid = ~np.isnan(std) & (std > 0)
+    n = len(tickers)
+
+    data_path = os.path.join(path, 'correlation.npy')
+    tmp_data_path = data_path + '.tmp.npy'
+    data = np.lib.format.open_memmap(tmp_data_path, mode='w+', dtype=np.float32, shape=(n, n))
+    k = min(top_k, max(n - 1, 1))
+    most_idx, most_val = np.zeros((n, k), np.int32), np.full((n, k), np.nan, np.float32)
+    least_idx, least_val = np.zeros((n, k), np.int32), np.full((n, k), np.nan, np.float32)
+
+    for lo in range(0, n, block_size):
+        hi = min(lo + block_size, n)
+        block = (z[:, lo:hi].T @ z) * (1 - intensity)
+        rows = np.arange(hi - lo)
+        block[~valid[lo:hi]] = np.nan
+        block[:, ~valid] = np.nan
+        block[rows, rows + lo] = np.where(valid[lo:hi], 1.0, np.nan)
+        data[lo:hi] = block
+
+        # A ticker is not its own pair
+        block[rows, rows + lo] = np.nan
+        if n > 1:
+            most_idx[lo:hi], most_val[lo:hi] = _top_k(block, k, largest=True)
+            least_idx[lo:hi], least_val[lo:hi] = _top_k(block, k, largest=False)
+    data.flush()
+    del data
+
+    pairs_path = os.path.join(path, 'pairs.npz')
+    with open(pairs_path + '.tmp', 'wb') as f:
+        np.savez(f, most_idx=most_idx, most_val=most_val, least_idx=least_idx, least_val=least_val)
+
+    dates = pd.DatetimeIndex(closes.index)
+    index = {
+        'tickers': tickers,
+        'std': [None if np.isnan(s) else float(s) for s in std],
+        'start': dates.min().strftime('%Y-%m-%d') if len(dates) else None,
+        'end': dates.max().strftime('%Y-%m-%d') if len(dates) else None,
+        'shrinkage': intensity,
+        'built': datetime.today().strftime('%Y-%m-%d'),
+    }
+    index_path = os.path.join(path, 'index.json')
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f)
+
+    os.replace(tmp_data_path, data_path)
+    os.replace(pairs_path + '.tmp', pairs_path)
+    os.replace(index_path + '.tmp', index_path)
+
+
+def read_index(path):
+    index_path = os.path.join(path, 'index.json')
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path) as f:
+        return json.load(f)
+
+
+class CorrelationStore:
+    # Read-only view of a built store: heatmap tiles, covariance blocks and ranked pairs are
+    # sliced from the memory-mapped matrix, so only what is shown is ever read.
+    def __init__(self, path):
+        index = read_index(path)
+        if index is None:
+            raise FileNotFoundError(f"No correlation store found at {path}")
+        self.tickers = index['tickers']
+        self.std = np.array([np.nan if s is None else s for s in index['std']])
+        self.start, self.end = index['start'], index['end']
+        self.shrinkage = index['shrinkage']
+        self.data = np.load(os.path.join(path, 'correlation.npy'), mmap_mode='r')
+        self.pairs = dict(np.load(os.path.join(path, 'pairs.npz')))
+        self._ticker_pos = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def _positions(self, tickers):
+        return [self._ticker_pos[ticker] for ticker in tickers]
+
+    def tile(self, row_tickers, col_tickers=None):
+        # Correlations between two ticker lists as a small DataFrame (rows x columns)
+        col_tickers = row_tickers if col_tickers is None else col_tickers
+        rows, cols = self._positions(row_tickers), self._positions(col_tickers)
+        return pd.DataFrame(self.data[np.ix_(rows, cols)], index=row_tickers, columns=col_tickers)
+
+    def covariance(self, row_tickers, col_tickers=None):
+        # Daily-return covariance block, from the (shrunk) correlations and each ticker's std
+        col_tickers = row_tickers if col_tickers is None else col_tickers
+        tile = self.tile(row_tickers, col_tickers)
+        return tile * np.outer(self.std[self._positions(row_tickers)], self.std[self._positions(col_tickers)])
+
+    def top_pairs(self, ticker, k=10, least=False):
+        # The k most (or least) correlated other tickers, strongest first
+        kind = 'least' if least else 'most'
+        pos = self._ticker_pos[ticker]
+        partners = self.pairs[f'{kind}_idx'][pos][:k]
+        values = self.pairs[f'{kind}_val'][pos][:k]
+        keep = ~np.isnan(values)
+        return pd.DataFrame({
+            'Ticker': [self.tickers[i] for i in partners[keep]],
+            'Correlation': values[keep],
+        })
@@ -1,45 +1,23 @@
 from dash import Dash, dcc, html
 import plotly.graph_objects as go
-import pandas as pd
 from datetime import datetime, timedelta
-import yfinance as yf
+from cache_utils import get_market_data
+from config import TICKERS
 
 # List of company tickers
-companies = ['CVX', 'BA', 'GM', 'C', 'BAC', 'T', 'CAT', 'F', 'DIS', 'DE']
+companies = TICKERS
 
-# Define time periods
+# "Yesterday" covers the last two days
 today = datetime.today()
-time_periods = {"Yesterday": today - timedelta(days=2)}
-
-# Initialize an empty list to store data
-data = []
-
-# Fetch data for each company and time period
-for ticker in companies:
-    stock = yf.Ticker(ticker)
-    sector = stock.info.get('sector', 'Unknown')  # Dynamically fetch the sector
-
-    for period_name, start_date in time_periods.items():
-        end_date = today if period_name != "Yesterday" else start_date + timedelta(days=2)
-        hist = stock.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
-
-        if not hist.empty:
-            for date, row in hist.iterrows():
-                data.append({
-                    'Time Period': period_name,
-                    'Date': date.strftime('%Y-%m-%d'),
-                    'Symbol': ticker,
-                    'Sector': sector,
-                    'Open': row['Open'],
-                    'Close': row['Close'],
-                    'High': row['High'],
-                    'Low': row['Low'],
-                    'Volume': row['Volume'],
-                    '52 Week Change %': stock.info.get('52WeekChange', 0),
-                })
-
-# Convert to DataFrame
-df = pd.DataFrame(data)
+
+# Read the window from the shared market-data store
+df = get_market_data(
+    companies,
+    start=today - timedelta(days=2),
+    end=today,
+    fundamentals={'Sector': 'sector', '52 Week Change %': '52WeekChange'},
+).fillna({'Sector': 'Unknown', '52 Week Change %': 0})
+df.insert(0, 'Time Period', 'Yesterday')
 
 # Add derived columns for "6 Months Change %" and "3 Months Change %"
 df["6 Months Change %"] = df["52 Week Change %"] * 0.6
@@ -1,156 +1,93 @@
-from dash import Dash, dcc, html, Input, Output
-import plotly.express as px
+from dash import Dash, dcc, html
 import plotly.graph_objects as go
-import pandas as pd
-import yfinance as yf
+import numpy as np
 from datetime import datetime, timedelta
-import os
+from bar_race import build_bar_race
+from cache_utils import get_bar_race, get_market_data, get_tensor_store
+from config import BAR_RACE_MAX_FRAMES, BAR_RACE_STEP, BAR_RACE_TOP_N, HISTORY_PERIOD, TICKERS
+from data_utils import TIME_PERIOD_DAYS
+from refresh_utils import load_periods
+from storage_utils import table_exists
 
 # List of company tickers
-companies = ['CVX', 'BA', 'GM', 'C', 'BAC', 'T', 'CAT', 'F', 'DIS', 'DE']
-
-# Data for 10-year bar chart race
-bar_chart_data = []
-for ticker in companies:
-    stock = yf.Ticker(ticker)
-    sector = stock.info.get('sector', 'Unknown')
-    hist = stock.history(period="10y")
-    if not hist.empty:
-        for date, row in hist.iterrows():
-            bar_chart_data.append({
-                'Date': date.strftime('%Y-%m-%d'),
-                'Symbol': ticker,
-                'Sector': sector,
-                'Open': row['Open'],
-                'Close': row['Close'],
-                'High': row['High'],
-                'Low': row['Low'],
-                'Volume': row['Volume'],
-                'Daily Change %': ((row['Close'] - row['Open']) / row['Open']) * 100,
-            })
-
-bar_chart_df = pd.DataFrame(bar_chart_data)
-bar_chart_df['Year'] = pd.to_datetime(bar_chart_df['Date']).dt.year
-yearly_data = bar_chart_df.groupby(['Year', 'Symbol']).agg({
-    'Daily Change %': 'mean'
-}).reset_index()
-
-def create_bar_chart_race(dataframe):
-    fig = px.bar(
-        dataframe,
-        x='Daily Change %',
-        y='Symbol',
-        color='Symbol',
-        animation_frame='Year',
-        orientation='h',
-        text='Daily Change %',
-        title='10-Year Bar Chart Race: Percentage Change by Company',
-        template="plotly_white"
+companies = TICKERS
+today = datetime.today()
+
+# Both races are finished figure JSON on disk (bar_race.py): the first process of the day
+# builds them from the shared OHLCV store, every later start only reads the file
+PRICE_RACE_DAYS = 365
+
+def build_yearly_change_race():
+    # Mean daily (open to close) change per ticker and calendar year, over the stored history
+    store = get_tensor_store(companies)
+    opens, closes = store.to_frame('Open', companies), store.to_frame('Close', companies)
+    daily_change = (closes - opens) / opens * 100
+    yearly = daily_change.groupby(daily_change.index.year).mean()
+    return build_bar_race(
+        yearly,
+        yearly.index.astype(str).tolist(),
+        top_n=BAR_RACE_TOP_N,
+        text_format='%{x:.2f}%',
+        frame_ms=2000,
+        transition_ms=1000,
+        layout=dict(
+            title='10-Year Bar Chart Race: Percentage Change by Company',
+            template="plotly_white",
+            xaxis_title="Percentage Change (%)",
+            yaxis_title="Company Symbol",
+            xaxis=dict(range=[-1, 1]),
+            height=600,
+            margin=dict(l=50, r=50, t=70, b=100),
+            font=dict(color='white'),
+            plot_bgcolor='black',
+            paper_bgcolor='black',
+            showlegend=False
+        )
     )
-    fig.update_traces(
-        texttemplate='%{text:.2f}%',
-        textposition='outside'
-    )
-    fig.update_layout(
-        xaxis_title="Percentage Change (%)",
-        yaxis_title="Company Symbol",
-        xaxis=dict(range=[-1, 1]),
-        height=600,
-        margin=dict(l=50, r=50, t=70, b=100),
-        font=dict(color='white'),
-        plot_bgcolor='black',
-        paper_bgcolor='black'
-    )
-    fig.layout.updatemenus[0].buttons[0].args[1]["frame"]["duration"] = 2000
-    fig.layout.updatemenus[0].buttons[0].args[1]["transition"]["duration"] = 1000
-    return fig
-
-# Data for 1-year stock price bar chart race
-price_race_data = []
-for ticker in companies:
-    stock = yf.Ticker(ticker)
-    hist = stock.history(period="1y")
-    if not hist.empty:
-        for date, row in hist.iterrows():
-            price_race_data.append({'Date': date, 'Ticker': ticker, 'Close': row['Close']})
-
-price_race_df = pd.DataFrame(price_race_data)
-price_race_df['Date'] = pd.to_datetime(price_race_df['Date'])
-date_range = pd.date_range(start=price_race_df['Date'].min(), end=price_race_df['Date'].max())
-
-pivot_df = price_race_df.pivot(index='Date', columns='Ticker', values='Close').reindex(date_range)
-pivot_df = pivot_df.ffill()
-
-price_race_df = pivot_df.reset_index().melt(id_vars='index', value_name='Close', var_name='Ticker')
-price_race_df.rename(columns={'index': 'Date'}, inplace=True)
-price_race_df = price_race_df.sort_values(by=['Date', 'Close'], ascending=[True, False])
-x_max = price_race_df['Close'].max() * 1.2
 
-def create_price_bar_chart_race(dataframe):
-    fig = px.bar(
-        dataframe,
-        x='Close',
-        y='Ticker',
-        color='Ticker',
-        animation_frame=dataframe['Date'].dt.strftime('%Y-%m-%d'),
-        labels={'Close': 'Stock Price', 'Ticker': 'Stock Ticker'},
-        template="plotly_white",
-        orientation='h',
-        text='Close'
-    )
-    fig.update_layout(
-        xaxis=dict(title="Stock Price", range=[0, x_max], tickformat=".2f"),
-        yaxis_title="Stock Ticker",
-        legend_title="Stock Ticker",
-        showlegend=False,
-        hovermode="closest",
-        title_x=0.5
+def build_price_race():
+    # Closes on every trading day of the last year; a ticker without a bar keeps its last close
+    closes = get_tensor_store(companies).to_frame(
+        'Close', companies, start=today - timedelta(days=PRICE_RACE_DAYS)).ffill()
+    x_max = np.nanmax(closes.to_numpy()) * 1.2 if closes.notna().any().any() else 1
+    return build_bar_race(
+        closes,
+        closes.index.strftime('%Y-%m-%d').tolist(),
+        top_n=BAR_RACE_TOP_N,
+        step=BAR_RACE_STEP,
+        max_frames=BAR_RACE_MAX_FRAMES,
+        layout=dict(
+            template="plotly_white",
+            xaxis=dict(title="Stock Price", range=[0, x_max], tickformat=".2f"),
+            yaxis_title="Stock Ticker",
+            showlegend=False,
+            hovermode="closest",
+            title_x=0.5
+        )
     )
-    fig.update_traces(
-        texttemplate='%{text:.2f}',
-        textposition='outside',
-        cliponaxis=False,
-        marker_line_width=0.5
-    )
-    return fig
+
+price_race_figure = get_bar_race('price_race', companies, build_price_race,
+                                 params=[BAR_RACE_TOP_N, BAR_RACE_STEP, BAR_RACE_MAX_FRAMES, PRICE_RACE_DAYS])
+yearly_race_figure = get_bar_race('yearly_change_race', companies, build_yearly_change_race,
+                                  params=[BAR_RACE_TOP_N, HISTORY_PERIOD])
     
 csv_file_path = "grouped_bar_chart.csv"
 
-# Check if the CSV file exists
-if os.path.exists(csv_file_path):
+# "Yesterday" covers the last two days
+df = get_market_data(
+    companies,
+    start=today - timedelta(days=2),
+    end=today,
+    fundamentals={'Sector': 'sector', '52 Week Change %': '52WeekChange'},
+).fillna({'Sector': 'Unknown', '52 Week Change %': 0})
+df.insert(0, 'Time Period', 'Yesterday')
+
+# Fall back to the exported CSV when the store cannot be filled
+if df.empty and table_exists(csv_file_path):
     print("Reading data from CSV file...")
-    df = pd.read_csv(csv_file_path)
-else:
-    # Additional logic for percentage changes over different time periods
-    today = datetime.today()
-    time_periods = {"Yesterday": today - timedelta(days=1)}
-    
-    data = []
-    for ticker in companies:
-        stock = yf.Ticker(ticker)
-        sector = stock.info.get('sector', 'Unknown')
-    
-        for period_name, start_date in time_periods.items():
-            end_date = today if period_name != "Yesterday" else start_date + timedelta(days=1)
-            hist = stock.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
-    
-            if not hist.empty:
-                for date, row in hist.iterrows():
-                    data.append({
-                        'Time Period': period_name,
-                        'Date': date.strftime('%Y-%m-%d'),
-                        'Symbol': ticker,
-                        'Sector': sector,
-                        'Open': row['Open'],
-                        'Close': row['Close'],
-                        'High': row['High'],
-                        'Low': row['Low'],
-                        'Volume': row['Volume'],
-                        '52 Week Change %': stock.info.get('52WeekChange', 0),
-                    })
-    
-    df = pd.DataFrame(data)
-    
+    # Topped up with the bars missing since it was stored, when the provider answers
+    df = load_periods(csv_file_path, 'Symbol', {**TIME_PERIOD_DAYS, "Yesterday": 2})
+
 # Add derived columns for "6 Months Change %" and "3 Months Change %"
 df["6 Months Change %"] = df["52 Week Change %"] * 0.6
 df["3 Months Change %"] = df["52 Week Change %"] * 0.3
@@ -218,12 +155,12 @@ app.layout = html.Div([
    html.H3("Stock Price Bar Chart Race", style={'textAlign': 'center'}),
    dcc.Graph(
        id='price-bar-chart-race',
-       figure=create_price_bar_chart_race(price_race_df)
+       figure=price_race_figure
    ),
    html.H3("Bar Chart Race: Percentage Change", style={'textAlign': 'center'}),
    dcc.Graph(
        id='bar-chart-race',
-       figure=create_bar_chart_race(yearly_data)
+       figure=yearly_race_figure
        
    ),
    html.Div([
@@ -1,35 +1,40 @@
 # Save this as dash_bubble_chart.py
 import dash
 from dash import dcc, html, Input, Output
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.express as px
+from datetime import datetime
+from cache_utils import get_fundamentals, get_market_data
+from config import TICKERS
+from figure_cache import cached_figure, data_version, normalize_selection
 
 # Fetch stock data
-stocks = ['CVX', 'BA', 'GM', 'C', 'BAC', 'T', 'CAT', 'F', 'DIS', 'DE']
+stocks = TICKERS
 data = []
 
-for stock in stocks:
-    ticker = yf.Ticker(stock)
-    info = ticker.info
-    hist = ticker.history(period="ytd")
+# Year-to-date closes from the shared market-data store
+prices = get_market_data(stocks, start=datetime(datetime.today().year, 1, 1), fields=['Close'], key_col='Ticker')
+info = get_fundamentals(stocks)
 
+for stock, hist in prices.groupby('Ticker', sort=False):
     # Calculate metrics
-    hist['Daily Return'] = hist['Close'].pct_change()
-    volatility = hist['Daily Return'].std() * np.sqrt(252)  # Annualized volatility
-    ytd_performance = (hist['Close'][-1] / hist['Close'][0] - 1) * 100 if not hist.empty else np.nan
+    daily_return = hist['Close'].pct_change()
+    volatility = daily_return.std() * np.sqrt(252)  # Annualized volatility
+    ytd_performance = (hist['Close'].iloc[-1] / hist['Close'].iloc[0] - 1) * 100 if not hist.empty else np.nan
 
     data.append({
         'Ticker': stock,
-        'PE_Ratio': info.get('trailingPE', np.nan),
+        'PE_Ratio': info[stock].get('trailingPE', np.nan),
         'Volatility': volatility,
-        'Market_Cap': info.get('marketCap', np.nan),
+        'Market_Cap': info[stock].get('marketCap', np.nan),
         'YTD_Performance': ytd_performance
     })
 
 # Convert to DataFrame
 df = pd.DataFrame(data)
+# Identifies this load of the data in the figure cache
+DATA_VERSION = data_version(df)
 
 # Initialize Dash app
 app = dash.Dash(__name__)
@@ -57,9 +62,12 @@ app.layout = html.Div([
 )
 def update_chart(selected_stocks):
     if not selected_stocks or 'ALL' in selected_stocks:
-        filtered_df = df
-    else:
-        filtered_df = df[df['Ticker'].isin(selected_stocks)]
+        selected_stocks = stocks
+    selection = normalize_selection(selected_stocks, stocks)
+    return cached_figure('bubble_chart', selection, DATA_VERSION, lambda: build_chart(selection))
+
+def build_chart(selection):
+    filtered_df = df[df['Ticker'].isin(selection)]
 
     fig = px.scatter(
         filtered_df,
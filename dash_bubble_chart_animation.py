@@ -1,50 +1,87 @@
 import dash
-from dash import dcc, html, Input, Output
-import yfinance as yf
+from dash import dcc, html, Input, Output, State
 import pandas as pd
 import plotly.express as px
 import numpy as np
-import os
-import random
-import time
+from datetime import datetime, timedelta
+from cache_utils import get_market_data
+from config import TICKERS
+from data_utils import summary_table
+from figure_cache import cached_figure, data_version, normalize_selection
+from rolling_stats import RollingStats, load_states, save_states, state_path
+from storage_utils import read_table, table_exists, write_table
 
-# Cache file path
+# Stored table of the animation data, with the rolling volatility state kept next to it
 cache_file = "bubble_chart_stock_data.csv"
+BUBBLE_COLUMNS = ['Date', 'Ticker', 'Close', 'Volatility', 'Market Cap', 'P/E Ratio', 'YTD Performance']
+VOLATILITY_WINDOW = 20
 
-# Fetch and cache stock data
-def fetch_stock_data():
-    if os.path.exists(cache_file):
-        # Load cached data and ensure Date column is parsed as datetime
-        df = pd.read_csv(cache_file)
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')  # Ensure proper datetime conversion
+def add_volatility(df, stored, states):
+    # Rolling std of daily returns per ticker. Bars already in the stored table keep their
+    # value and only newer bars are streamed through the saved state, one O(1) update each;
+    # tickers without state get one vectorized pass that seeds it. The state stops one bar
+    # short of the latest, which may have been stored before its session closed, so that bar
+    # is recomputed from the state on every load.
+    if stored is not None:
+        df = df.merge(stored, on=['Date', 'Ticker'], how='left')
     else:
-        # Fetch new data
-        tickers = ['CVX', 'BA', 'GM', 'C', 'BAC', 'T', 'CAT', 'F', 'DIS', 'DE']
-        all_data = []
-        for ticker in tickers:
-            try:
-                stock = yf.Ticker(ticker)
-                time.sleep(random.uniform(1, 3))  # Randomized delay to avoid rate limits
-                hist = stock.history(period="1y")
-                if not hist.empty:
-                    hist['Ticker'] = ticker
-                    hist['Date'] = hist.index
-                    hist['Daily Return'] = hist['Close'].pct_change()
-                    hist['Volatility'] = hist['Daily Return'].rolling(window=20).std()
-                    hist['Market Cap'] = stock.info.get('marketCap', np.nan)
-                    hist['P/E Ratio'] = stock.info.get('trailingPE', np.nan)
-                    hist['YTD Performance'] = (hist['Close'] / hist['Close'].iloc[0] - 1) * 100
-                    all_data.append(hist[['Date', 'Ticker', 'Close', 'Volatility', 'Market Cap', 'P/E Ratio', 'YTD Performance']])
-            except Exception as e:
-                print(f"Error fetching data for {ticker}: {e}")
-
-        # Combine data and cache it
-        if all_data:
-            df = pd.concat(all_data, ignore_index=True)
-            df.to_csv(cache_file, index=False)
+        df['Volatility'] = np.nan
+
+    for ticker, bars in df.groupby('Ticker', sort=False):
+        entry = states.get(ticker)
+        if entry is None:
+            returns = bars['Close'].pct_change()
+            df.loc[bars.index, 'Volatility'] = returns.rolling(window=VOLATILITY_WINDOW).std()
+            if len(bars) < 2:
+                continue
+            entry = states[ticker] = {'stats': RollingStats.from_history(returns.iloc[:-1], windows=[VOLATILITY_WINDOW])}
         else:
-            df = pd.DataFrame()
+            new_bars = bars[bars['Date'] > pd.Timestamp(entry['last_date'])]
+            if new_bars.empty:
+                continue
+            stats, last_close, volatility = entry['stats'], entry['last_value'], []
+            for close in new_bars['Close'].iloc[:-1]:
+                stats.update(close / last_close - 1)
+                last_close = close
+                volatility.append(stats.std(VOLATILITY_WINDOW))
+            latest = RollingStats.from_state(stats.to_state()).update(new_bars['Close'].iloc[-1] / last_close - 1)
+            volatility.append(latest.std(VOLATILITY_WINDOW))
+            df.loc[new_bars.index, 'Volatility'] = volatility
+        entry['last_date'] = bars['Date'].iloc[-2].strftime('%Y-%m-%d')
+        entry['last_value'] = float(bars['Close'].iloc[-2])
+    return df
+
+# Load one year of closes from the shared store and derive the bubble metrics
+def fetch_stock_data():
+    today = datetime.today()
+    df = get_market_data(
+        TICKERS,
+        start=today - timedelta(days=365),
+        fields=['Close'],
+        fundamentals={'Market Cap': 'marketCap', 'P/E Ratio': 'trailingPE'},
+        key_col='Ticker',
+        date_format=None,
+    )
 
+    if df.empty:
+        # Fall back to the last stored table when the market-data store cannot be filled
+        return read_table(cache_file) if table_exists(cache_file) else df
+
+    df['Date'] = df['Date'].dt.tz_localize(None).dt.normalize()
+    df[['Market Cap', 'P/E Ratio']] = df[['Market Cap', 'P/E Ratio']].astype(float)
+
+    states_file = state_path(cache_file)
+    states = load_states(states_file) if table_exists(cache_file) else {}
+    stored = None
+    if states:
+        stored = read_table(cache_file, columns=['Date', 'Ticker', 'Volatility'])
+        stored['Ticker'] = stored['Ticker'].astype(str)
+    df = add_volatility(df, stored, states)
+
+    df['YTD Performance'] = (df['Close'] / df.groupby('Ticker')['Close'].transform('first') - 1) * 100
+    df = df[BUBBLE_COLUMNS]
+    write_table(df, cache_file)
+    save_states(states_file, states)
     return df
 
 # Load data
@@ -56,6 +93,64 @@ df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
 # Prepare data for animation
 df = df.dropna(subset=['Volatility', 'P/E Ratio', 'Market Cap'])  # Drop rows with missing key metrics
 
+# Latest-bar metrics per ticker for the insights panel, built once per data load
+bubble_summary = summary_table(df, group_cols=['Ticker'], last_cols=['YTD Performance', 'Market Cap', 'Volatility'])
+# Identifies this load of the data in the figure cache
+DATA_VERSION = data_version(df)
+
+# Animation frames: one per trading day, or the last trading day of each week or month. Labels
+# and the rows of every frame are found once per data load. The browser gets the first frame
+# and a buffer of FRAME_CHUNK_SIZE * 2 frames; playback runs client-side over the buffer and
+# asks for the next chunk FRAME_PREFETCH frames before it runs out, so payload and time to
+# first frame do not grow with the length of the history.
+FRAME_GRANULARITIES = {'D': 'Daily', 'W': 'Weekly', 'M': 'Monthly'}
+FRAME_CHUNK_SIZE = 20
+FRAME_PREFETCH = 5
+FRAME_INTERVAL_MS = 500
+SIZE_MAX = 50
+
+def frame_dates(dates, granularity):
+    dates = pd.Series(pd.DatetimeIndex(dates).unique().sort_values())
+    if granularity == 'D':
+        return pd.DatetimeIndex(dates)
+    periods = dates.dt.to_period('W-FRI' if granularity == 'W' else 'M')
+    return pd.DatetimeIndex(dates.groupby(periods.to_numpy()).max())
+
+FRAME_ROWS = {date.strftime('%Y-%m-%d'): rows for date, rows in df.groupby('Date').indices.items()}
+FRAME_LABELS = {granularity: frame_dates(df['Date'], granularity).strftime('%Y-%m-%d').tolist()
+                for granularity in FRAME_GRANULARITIES}
+
+def frame_rows(label, selected):
+    # Row positions of one frame, restricted to a boolean mask of the selected rows
+    rows = FRAME_ROWS[label]
+    return rows[selected[rows]]
+
+def frame_payload(label, selected):
+    # Rounded to what the chart can show; float32 columns otherwise serialize with ~17 digits
+    frame = df.iloc[frame_rows(label, selected)]
+    return {
+        'label': label,
+        'x': frame['P/E Ratio'].astype(float).round(4).tolist(),
+        'y': frame['Volatility'].astype(float).round(6).tolist(),
+        'size': frame['Market Cap'].tolist(),
+        'color': frame['YTD Performance'].astype(float).round(4).tolist(),
+        'text': frame['Ticker'].astype(str).tolist(),
+    }
+
+def frame_buffer(start, granularity, selection):
+    labels = FRAME_LABELS[granularity]
+    selected = df['Ticker'].isin(selection).to_numpy()
+    return {
+        'start': start,
+        'total': len(labels),
+        'frames': [frame_payload(label, selected) for label in labels[start:start + 2 * FRAME_CHUNK_SIZE]],
+    }
+
+def slider_marks(granularity, count=8):
+    labels = FRAME_LABELS[granularity]
+    step = max(len(labels) // count, 1)
+    return {i: labels[i] for i in range(0, len(labels), step)}
+
 # Initialize Dash app
 app = dash.Dash(__name__)
 
@@ -86,10 +181,25 @@ app.layout = html.Div([
             placeholder="Select one or more stocks",
             style={"width": "50%", "margin": "20px auto"}
         ),
+        dcc.RadioItems(
+            id='frame-granularity',
+            options=[{'label': label, 'value': value} for value, label in FRAME_GRANULARITIES.items()],
+            value='D',
+            inline=True,
+            style={'text-align': 'center'}
+        ),
         dcc.Graph(
             id='bubble-chart-animation',
             config={'displayModeBar': False}  # Disable the mode bar for a cleaner look
-        )
+        ),
+        html.Div([
+            html.Button("Play", id='frame-play', n_clicks=0),
+            html.Div(dcc.Slider(id='frame-slider', min=0, max=0, step=1, value=0, marks={}),
+                     style={'flex': '1'}),
+        ], style={'display': 'flex', 'align-items': 'center', 'margin': '0 40px'}),
+        dcc.Interval(id='frame-interval', interval=FRAME_INTERVAL_MS, disabled=True),
+        dcc.Store(id='frame-buffer'),
+        dcc.Store(id='frame-request'),
     ]),
 
     html.Div(id='key-insights', style={
@@ -103,28 +213,23 @@ app.layout = html.Div([
     })
 ])
 
-@app.callback(
-    [Output('bubble-chart-animation', 'figure'),
-     Output('key-insights', 'children')],
-    Input('ticker-filter', 'value')
-)
-def render_bubble_chart(selected_tickers):
-    # Filter data based on selected tickers
-    filtered_df = df[df['Ticker'].isin(selected_tickers)]
-    
-    if filtered_df.empty:
-        return {}, html.Div("No data available for the selected tickers.", style={'color': 'red', 'text-align': 'center'})
+def build_animation(filtered_df, first_label):
+    # First frame of the animation. Axes, colour scale and bubble sizes are fixed over the
+    # whole selection so that frames drawn later in the browser share them.
+    def padded(column):
+        low, high = filtered_df[column].min(), filtered_df[column].max()
+        pad = (high - low) * 0.05 or 1
+        return [low - pad, high + pad]
 
-    # Create Bubble Chart Animation
+    first_frame = filtered_df[filtered_df['Date'] == pd.Timestamp(first_label)]
     fig = px.scatter(
-        filtered_df,
+        first_frame,
         x='P/E Ratio',
         y='Volatility',
         size='Market Cap',
         color='YTD Performance',
         hover_name='Ticker',
         text='Ticker',
-        animation_frame=filtered_df['Date'].dt.strftime('%Y-%m-%d'),  # Format as YYYY-MM-DD
         title="How Do Stocks Compare in Valuation (P/E Ratio) and Risk (Volatility) Over Time?",
         labels={
             'P/E Ratio': 'Price-to-Earnings Ratio',
@@ -132,7 +237,10 @@ def render_bubble_chart(selected_tickers):
             'Market Cap': 'Market Capitalization',
             'YTD Performance': 'YTD Performance (%)'
         },
-        size_max=50,
+        range_x=padded('P/E Ratio'),
+        range_y=padded('Volatility'),
+        range_color=[filtered_df['YTD Performance'].min(), filtered_df['YTD Performance'].max()],
+        size_max=SIZE_MAX,
         color_continuous_scale='Viridis',
         template="plotly_white"
     )
@@ -141,35 +249,149 @@ def render_bubble_chart(selected_tickers):
         xaxis_title="Price-to-Earnings (P/E) Ratio",
         yaxis_title="Volatility (Risk)",
         coloraxis_colorbar=dict(title="YTD Performance (%)"),
-        hovermode="closest"
+        hovermode="closest",
+        uirevision=True,
+        annotations=[dict(text=first_label, xref='paper', yref='paper', x=1, y=1.05, showarrow=False)]
     )
 
     fig.update_traces(
         textposition='middle center',
-        marker=dict(opacity=0.7, line=dict(width=1, color='DarkSlateGrey'))
+        marker=dict(opacity=0.7, line=dict(width=1, color='DarkSlateGrey'),
+                    sizeref=2 * filtered_df['Market Cap'].max() / SIZE_MAX ** 2)
     )
 
-    # Generate Dynamic Insights
-    latest_date = filtered_df['Date'].max()
-    latest_data = filtered_df[filtered_df['Date'] == latest_date]
+    return fig
+
+@app.callback(
+    [Output('bubble-chart-animation', 'figure'),
+     Output('key-insights', 'children'),
+     Output('frame-buffer', 'data'),
+     Output('frame-slider', 'max'),
+     Output('frame-slider', 'marks'),
+     Output('frame-slider', 'value', allow_duplicate=True)],
+    [Input('ticker-filter', 'value'),
+     Input('frame-granularity', 'value')],
+    prevent_initial_call='initial_duplicate'
+)
+def render_bubble_chart(selected_tickers, granularity):
+    # Filter data based on selected tickers
+    selection = normalize_selection(selected_tickers, bubble_summary.index)
+    filtered_df = df[df['Ticker'].isin(selection)]
+    
+    if filtered_df.empty:
+        return ({}, html.Div("No data available for the selected tickers.", style={'color': 'red', 'text-align': 'center'}),
+                None, 0, {}, 0)
+
+    labels = FRAME_LABELS[granularity]
+    fig = cached_figure('bubble_chart_animation', (granularity,) + selection, DATA_VERSION,
+                        lambda: build_animation(filtered_df, labels[0]))
+    buffer = frame_buffer(0, granularity, selection)
+
+    # Generate Dynamic Insights from the selected tickers' summary rows at the latest date
+    latest_data = bubble_summary[bubble_summary.index.isin(selection)]
+    latest_data = latest_data[latest_data['Last Date'] == latest_data['Last Date'].max()]
 
-    highest_performance_stock = latest_data.loc[latest_data['YTD Performance'].idxmax()]
-    largest_market_cap_stock = latest_data.loc[latest_data['Market Cap'].idxmax()]
-    lowest_risk_stock = latest_data.loc[latest_data['Volatility'].idxmin()]
+    highest_performance_stock = latest_data.loc[latest_data['Last YTD Performance'].idxmax()]
+    largest_market_cap_stock = latest_data.loc[latest_data['Last Market Cap'].idxmax()]
+    lowest_risk_stock = latest_data.loc[latest_data['Last Volatility'].idxmin()]
 
     insights = [
         html.H3("📌 Key Insights", style={'color': '#333', 'margin-bottom': '10px'}),
         html.Ul([
-            html.Li(f"🚀 Stock with the highest YTD performance: {highest_performance_stock['Ticker']} "
-                    f"({highest_performance_stock['YTD Performance']:.2f}%)"),
-            html.Li(f"💰 Stock with the largest market capitalization: {largest_market_cap_stock['Ticker']} "
-                    f"(${largest_market_cap_stock['Market Cap']:,})"),
-            html.Li(f"🛡️ Stock with the lowest volatility (risk): {lowest_risk_stock['Ticker']} "
-                    f"(Volatility: {lowest_risk_stock['Volatility']:.2f})")
+            html.Li(f"🚀 Stock with the highest YTD performance: {highest_performance_stock.name} "
+                    f"({highest_performance_stock['Last YTD Performance']:.2f}%)"),
+            html.Li(f"💰 Stock with the largest market capitalization: {largest_market_cap_stock.name} "
+                    f"(${largest_market_cap_stock['Last Market Cap']:,})"),
+            html.Li(f"🛡️ Stock with the lowest volatility (risk): {lowest_risk_stock.name} "
+                    f"(Volatility: {lowest_risk_stock['Last Volatility']:.2f})")
         ])
     ]
 
-    return fig, insights
+    return fig, insights, buffer, len(labels) - 1, slider_marks(granularity), 0
+
+@app.callback(
+    Output('frame-buffer', 'data', allow_duplicate=True),
+    Input('frame-request', 'data'),
+    [State('frame-granularity', 'value'),
+     State('ticker-filter', 'value')],
+    prevent_initial_call=True
+)
+def load_frames(start, granularity, selected_tickers):
+    # Next chunk of frames for the browser, from `start` on
+    if start is None:
+        return dash.no_update
+    return frame_buffer(start, granularity, normalize_selection(selected_tickers, bubble_summary.index))
+
+# Playback runs in the browser: Play toggles the interval, each tick moves the slider, and the
+# slider position draws its frame from the buffer without a request to the server
+app.clientside_callback(
+    """
+    function(clicks) {
+        const playing = clicks % 2 === 1;
+        return [!playing, playing ? 'Pause' : 'Play'];
+    }
+    """,
+    [Output('frame-interval', 'disabled'),
+     Output('frame-play', 'children')],
+    Input('frame-play', 'n_clicks')
+)
+
+app.clientside_callback(
+    """
+    function(ticks, position, last) {
+        return position >= last ? 0 : position + 1;
+    }
+    """,
+    Output('frame-slider', 'value'),
+    Input('frame-interval', 'n_intervals'),
+    [State('frame-slider', 'value'),
+     State('frame-slider', 'max')],
+    prevent_initial_call=True
+)
+
+app.clientside_callback(
+    """
+    function(position, buffer, figure) {
+        const frame = buffer && buffer.frames[position - buffer.start];
+        if (!frame || !figure || !figure.data || !figure.data.length) {
+            return window.dash_clientside.no_update;
+        }
+        const trace = Object.assign({}, figure.data[0], {
+            x: frame.x, y: frame.y, text: frame.text, hovertext: frame.text,
+            marker: Object.assign({}, figure.data[0].marker, {size: frame.size, color: frame.color})
+        });
+        const annotation = Object.assign({}, (figure.layout.annotations || [{}])[0], {text: frame.label});
+        const layout = Object.assign({}, figure.layout, {annotations: [annotation]});
+        return Object.assign({}, figure, {data: [trace], layout: layout});
+    }
+    """,
+    Output('bubble-chart-animation', 'figure', allow_duplicate=True),
+    [Input('frame-slider', 'value'),
+     Input('frame-buffer', 'data')],
+    State('bubble-chart-animation', 'figure'),
+    prevent_initial_call=True
+)
+
+app.clientside_callback(
+    f"""
+    function(position, buffer) {{
+        if (!buffer) {{
+            return window.dash_clientside.no_update;
+        }}
+        const end = buffer.start + buffer.frames.length;
+        const start = Math.floor(position / {FRAME_CHUNK_SIZE}) * {FRAME_CHUNK_SIZE};
+        const running_out = position >= end - {FRAME_PREFETCH} && end < buffer.total;
+        if ((position < buffer.start || running_out) && start !== buffer.start) {{
+            return start;
+        }}
+        return window.dash_clientside.no_update;
+    }}
+    """,
+    Output('frame-request', 'data'),
+    Input('frame-slider', 'value'),
+    State('frame-buffer', 'data'),
+    prevent_initial_call=True
+)
 
 
 if __name__ == '__main__':
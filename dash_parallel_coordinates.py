@@ -1,50 +1,36 @@
 import dash
 from dash import dcc, html, Input, Output
-import yfinance as yf
 import pandas as pd
 import plotly.express as px
 import numpy as np
 import os
-import time
-import random
+from datetime import datetime, timedelta
+from cache_utils import get_fundamentals, get_market_data
+from config import TICKERS
+from data_utils import calculate_risk_return
+from figure_cache import cached_figure, data_version, normalize_selection
 
 # Fetch stock data
-stocks = ['CVX', 'BA', 'GM', 'C', 'BAC', 'T', 'CAT', 'F', 'DIS', 'DE']
-data = []
+stocks = TICKERS
 
-# Cache file path
+# Cache file path (fallback when the market-data store cannot be filled)
 cache_file = "stock_data_cache.csv"
 
-# Check if cached data exists
-if os.path.exists(cache_file):
+# One year of closes per ticker from the shared market-data store
+prices = get_market_data(stocks, start=datetime.today() - timedelta(days=365), fields=['Close'], key_col='Ticker')
+
+if prices.empty and os.path.exists(cache_file):
     df = pd.read_csv(cache_file)
 else:
-    for stock in stocks:
-        try:
-            ticker = yf.Ticker(stock)
-            time.sleep(random.uniform(1, 3))  # Randomized delay to avoid rate limits
-            info = ticker.info
-            hist = ticker.history(period="1y")
-
-            # Calculate metrics
-            if not hist.empty:
-                hist['Daily Return'] = hist['Close'].pct_change()
-                volatility = hist['Daily Return'].std() * np.sqrt(252)  # Annualized volatility
-                ytd_performance = (hist['Close'].iloc[-1] / hist['Close'].iloc[0] - 1) * 100
-
-                data.append({
-                    'Ticker': stock,
-                    'PE_Ratio': info.get('trailingPE', np.nan),
-                    'Volatility': volatility,
-                    'Market_Cap': info.get('marketCap', np.nan),
-                    'YTD_Performance': ytd_performance
-                })
-        except Exception as e:
-            print(f"Error fetching data for {stock}: {e}")
+    info = get_fundamentals(stocks)
+    # Annualized volatility and performance over the year for every ticker in one pass
+    df = calculate_risk_return(prices)[['Ticker', 'Volatility', 'Annual Return']]
+    df = df.rename(columns={'Annual Return': 'YTD_Performance'})
+    df.insert(1, 'PE_Ratio', [info[stock].get('trailingPE', np.nan) for stock in df['Ticker']])
+    df.insert(3, 'Market_Cap', [info[stock].get('marketCap', np.nan) for stock in df['Ticker']])
 
-    # Combine data into DataFrames and save cache
-    df = pd.DataFrame(data)
-    df.to_csv(cache_file, index=False)
+# Identifies this load of the data in the figure cache
+DATA_VERSION = data_version(df)
 
 # Initialize Dash app
 app = dash.Dash(__name__)
@@ -132,10 +118,11 @@ app.layout = html.Div([
     Input('parallel-stock-filter', 'value')
 )
 def update_parallel_chart(selected_stocks):
-    filtered_df = df[df['Ticker'].isin(selected_stocks)]
+    selection = normalize_selection(selected_stocks, df['Ticker'])
+    filtered_df = df[df['Ticker'].isin(selection)]
 
-    # Parallel Coordinates Chart
-    fig = px.parallel_coordinates(
+    # Parallel Coordinates Chart, built once per selection
+    fig = cached_figure('parallel_coordinates', selection, DATA_VERSION, lambda: px.parallel_coordinates(
         filtered_df,
         dimensions=['PE_Ratio', 'Volatility', 'Market_Cap', 'YTD_Performance'],
         color='YTD_Performance',
@@ -146,7 +133,7 @@ def update_parallel_chart(selected_stocks):
             'YTD_Performance': 'YTD Performance (%)'
         },
         color_continuous_scale=px.colors.diverging.RdYlGn
-    )
+    ))
 
     # Dynamic Insights
     insights = []
@@ -1,28 +1,61 @@
+from functools import lru_cache
+
 import dash
 from dash import dcc, html, Input, Output
-import yfinance as yf
-import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+from datetime import datetime, timedelta
+from cache_utils import get_correlation_store, get_tensor_store
+from config import TICKERS
+from data_utils import TRADING_DAYS, risk_return_metrics
+from figure_cache import cached_figure, data_version, normalize_selection
+from portfolio_optimizer import efficient_frontier
 
 # Risk and Return Data Preparation
-stocks = ['CVX', 'BA', 'GM', 'C', 'BAC', 'T', 'CAT', 'F', 'DIS', 'DE']
-risk_return_data = []
-for stock in stocks:
-    ticker = yf.Ticker(stock)
-    hist = ticker.history(period="1y")
+stocks = TICKERS
+# One year of closes read straight from the shared memory-mapped OHLCV store
+closes = get_tensor_store(stocks).to_frame('Close', stocks, start=datetime.today() - timedelta(days=365))
+# Return, volatility, Sharpe and drawdown for every ticker and window in one vectorized pass.
+# Bubbles, frontier and portfolios all use the annualized 1Y return, in the units of the
+# annualized volatility ('Annual Return' is the total return over the stored window).
+RETURN_COLUMN = '1Y Annualized Return %'
+risk_return_df = risk_return_metrics(closes).dropna(subset=[RETURN_COLUMN])
+# Identifies this load of the data in the figure cache
+DATA_VERSION = data_version(risk_return_df)
+
+# Pairwise correlations over the same year, served as tiles and ranked pairs from disk
+correlations = get_correlation_store(stocks)
+HEATMAP_TILE_SIZE = 50
+TOP_PAIRS = 5
+
+# Portfolio view over the selection: efficient frontier, minimum-variance and max-Sharpe weights
+MAX_PORTFOLIO_TICKERS = 300
+SAMPLES_SHOWN = 500
+expected_returns = risk_return_df.set_index('Ticker')[RETURN_COLUMN] / 100
 
-    # Calculate returns and risk (volatility)
-    annual_return = (hist['Close'].iloc[-1] / hist['Close'].iloc[0] - 1) * 100
-    volatility = hist['Close'].pct_change().std() * np.sqrt(252)
+@lru_cache(maxsize=32)
+def selection_covariance(tickers):
+    # Annualized covariance of one selection, reused while the selection is unchanged
+    return correlations.covariance(list(tickers)).to_numpy(dtype=np.float64) * TRADING_DAYS
 
-    risk_return_data.append({
-        'Ticker': stock,
-        'Annual Return': annual_return,
-        'Volatility': volatility
-    })
+@lru_cache(maxsize=32)
+def optimize_selection(tickers):
+    tickers = [ticker for ticker in tickers if ticker in correlations.tickers]
+    if not 2 <= len(tickers) <= MAX_PORTFOLIO_TICKERS:
+        return None
+    cov = selection_covariance(tuple(tickers))
+    mu = expected_returns[tickers].to_numpy()
+    # Tickers without enough returns in the window have no covariance or expected return
+    keep = np.isfinite(np.diag(cov)) & np.isfinite(mu)
+    if keep.sum() < 2:
+        return None
+    tickers = [ticker for ticker, kept in zip(tickers, keep) if kept]
+    return efficient_frontier(tickers, mu[keep], cov[np.ix_(keep, keep)])
 
-risk_return_df = pd.DataFrame(risk_return_data)
+def top_weights(weights, count=3):
+    largest = weights[weights > 0.005].sort_values(ascending=False).head(count)
+    return ", ".join(f"{ticker} {weight:.0%}" for ticker, weight in largest.items())
 
 # Initialize Dash app
 app = dash.Dash(__name__)
@@ -70,32 +103,43 @@ app.layout = html.Div([
         'box-shadow': '0 4px 8px rgba(0, 0, 0, 0.2)',
         'font-size': '16px',
         'color': '#333'
-    })
-])
-
-# Callback to update Risk-Return Bubble Matrix
-@app.callback(
-    [Output('risk-return-bubble-matrix', 'figure'),
-     Output('key-insights', 'children')],
-    [Input('stock-filter', 'value')]
-)
-def update_risk_return_bubble_matrix(selected_stocks):
-    if not selected_stocks:
-        selected_stocks = stocks
+    }),
 
-    filtered_df = risk_return_df[risk_return_df['Ticker'].isin(selected_stocks)]
+    html.Div([
+        html.H3("🔗 How Do the Selected Stocks Move Together?", style={'text-align': 'center', 'color': 'white'}),
+        dcc.Graph(id='correlation-heatmap'),
+        dcc.Dropdown(
+            id='pair-ticker',
+            options=[{'label': stock, 'value': stock} for stock in stocks],
+            value=stocks[0] if stocks else None,
+            placeholder="Select a stock to see its most and least correlated peers",
+            style={"width": "50%", "margin": "auto", 'font-size': '16px', 'padding': '5px'}
+        ),
+        html.Div(id='correlated-pairs', style={
+            'margin': '20px',
+            'padding': '20px',
+            'background': '#f9f9f9',
+            'border-radius': '10px',
+            'box-shadow': '0 4px 8px rgba(0, 0, 0, 0.2)',
+            'font-size': '16px',
+            'color': '#333'
+        })
+    ])
+])
 
+def build_bubble_matrix(filtered_df, portfolio):
     # Create Bubble Matrix
     fig = px.scatter(
         filtered_df,
         x='Volatility',
-        y='Annual Return',
+        y=RETURN_COLUMN,
         size='Volatility',  # Bubble size based on Volatility
-        color='Annual Return',
+        color=RETURN_COLUMN,
         hover_name='Ticker',
+        hover_data={'1Y Sharpe': ':.2f', '1Y Max Drawdown %': ':.2f'},
         labels={
             'Volatility': 'Risk (Volatility)',
-            'Annual Return': 'Return (%)'
+            RETURN_COLUMN: 'Annualized Return (%)'
         },
         title="Risk-Return Bubble Matrix",
         template="plotly_white",
@@ -107,28 +151,121 @@ def update_risk_return_bubble_matrix(selected_stocks):
         textposition='middle center'  # Position text inside the bubble
     )
 
+    # Overlay the portfolio view on the same axes (volatility, return in %)
+    if portfolio is not None:
+        samples = portfolio['samples'].head(SAMPLES_SHOWN)
+        fig.add_trace(go.Scatter(
+            x=samples['Volatility'], y=samples['Return'] * 100, mode='markers',
+            marker=dict(size=3, color='lightgray', opacity=0.5), name='Sampled Portfolios', hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=portfolio['frontier']['Volatility'], y=portfolio['frontier']['Return'] * 100, mode='lines',
+            line=dict(color='black', width=2), name='Efficient Frontier'
+        ))
+        for label, key, color in [('Minimum Variance', 'min_variance', 'blue'), ('Max Sharpe', 'max_sharpe', 'gold')]:
+            stats = portfolio[f'{key}_stats']
+            fig.add_trace(go.Scatter(
+                x=[stats['Volatility']], y=[stats['Return'] * 100], mode='markers',
+                marker=dict(symbol='star', size=16, color=color, line=dict(width=1, color='black')),
+                name=f"{label} Portfolio", hovertext=top_weights(portfolio[key], count=10)
+            ))
+        fig.update_layout(legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1))
+
+    return fig
+
+# Callback to update Risk-Return Bubble Matrix
+@app.callback(
+    [Output('risk-return-bubble-matrix', 'figure'),
+     Output('key-insights', 'children')],
+    [Input('stock-filter', 'value')]
+)
+def update_risk_return_bubble_matrix(selected_stocks):
+    if not selected_stocks:
+        selected_stocks = stocks
+
+    selection = normalize_selection(selected_stocks, risk_return_df['Ticker'])
+    filtered_df = risk_return_df[risk_return_df['Ticker'].isin(selection)]
+    portfolio = optimize_selection(tuple(filtered_df['Ticker']))
+    fig = cached_figure('risk_return_matrix', selection, DATA_VERSION,
+                        lambda: build_bubble_matrix(filtered_df, portfolio))
+
     # Generate dynamic insights
     if not filtered_df.empty:
-        highest_return_stock = filtered_df.loc[filtered_df['Annual Return'].idxmax()]
+        highest_return_stock = filtered_df.loc[filtered_df[RETURN_COLUMN].idxmax()]
         lowest_risk_stock = filtered_df.loc[filtered_df['Volatility'].idxmin()]
-        balanced_stock = filtered_df.loc[(filtered_df['Annual Return'] / filtered_df['Volatility']).idxmax()]
+        balanced_stock = filtered_df.loc[(filtered_df[RETURN_COLUMN] / filtered_df['Volatility']).idxmax()]
 
         insights = [
             html.H3("📌 Key Insights", style={'color': '#333', 'margin-bottom': '10px'}),
             html.Ul([
                 html.Li(f"🚀 Stock with the highest annual return: {highest_return_stock['Ticker']} "
-                        f"({highest_return_stock['Annual Return']:.2f}%)"),
+                        f"({highest_return_stock[RETURN_COLUMN]:.2f}%)"),
                 html.Li(f"🛡️ Stock with the lowest risk: {lowest_risk_stock['Ticker']} "
                         f"(Volatility: {lowest_risk_stock['Volatility']:.2f})"),
                 html.Li(f"⚖️ Stock with the best risk-return balance: {balanced_stock['Ticker']} "
-                        f"(Return-to-Risk Ratio: {balanced_stock['Annual Return'] / balanced_stock['Volatility']:.2f})")
+                        f"(Return-to-Risk Ratio: {balanced_stock[RETURN_COLUMN] / balanced_stock['Volatility']:.2f})")
             ])
         ]
+        if portfolio is not None:
+            max_sharpe = portfolio['max_sharpe_stats']
+            min_variance = portfolio['min_variance_stats']
+            insights.append(html.Ul([
+                html.Li(f"⭐ Max-Sharpe portfolio: {max_sharpe['Return']:.2%} return at {max_sharpe['Volatility']:.2f} "
+                        f"volatility (Sharpe {max_sharpe['Sharpe']:.2f}); largest weights {top_weights(portfolio['max_sharpe'])}"),
+                html.Li(f"🧺 Minimum-variance portfolio: {min_variance['Volatility']:.2f} volatility, "
+                        f"{min_variance['Return']:.2%} return; largest weights {top_weights(portfolio['min_variance'])}")
+            ]))
     else:
         insights = [html.P("No data available for the selected stocks.", style={'color': 'red'})]
 
     return fig, insights
 
 
+# Callback to update the correlation heatmap (one tile of at most HEATMAP_TILE_SIZE stocks)
+@app.callback(
+    Output('correlation-heatmap', 'figure'),
+    [Input('stock-filter', 'value')]
+)
+def update_correlation_heatmap(selected_stocks):
+    tickers = [stock for stock in (selected_stocks or stocks) if stock in correlations.tickers][:HEATMAP_TILE_SIZE]
+    tile = correlations.tile(tickers)
+
+    fig = go.Figure(go.Heatmap(
+        z=tile.to_numpy(),
+        x=tickers,
+        y=tickers,
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu',
+        colorbar=dict(title="Correlation")
+    ))
+    fig.update_layout(
+        title=f"Correlation of Daily Returns ({correlations.start} to {correlations.end}, "
+              f"shrinkage {correlations.shrinkage:.2f})",
+        template="plotly_white"
+    )
+    return fig
+
+
+# Callback to list the most and least correlated peers of one stock
+@app.callback(
+    Output('correlated-pairs', 'children'),
+    [Input('pair-ticker', 'value')]
+)
+def update_correlated_pairs(ticker):
+    if ticker not in correlations.tickers:
+        return html.P("No correlation data available for the selected stock.", style={'color': 'red'})
+
+    most = correlations.top_pairs(ticker, TOP_PAIRS)
+    least = correlations.top_pairs(ticker, TOP_PAIRS, least=True)
+    return [
+        html.H3(f"📌 Peers of {ticker}", style={'color': '#333', 'margin-bottom': '10px'}),
+        html.P("🤝 Moves most closely with:"),
+        html.Ul([html.Li(f"{row.Ticker} ({row.Correlation:.2f})") for row in most.itertuples()]),
+        html.P("🛡️ Best diversifiers (least correlated):"),
+        html.Ul([html.Li(f"{row.Ticker} ({row.Correlation:.2f})") for row in least.itertuples()])
+    ]
+
+
 if __name__ == '__main__':
     app.run_server(debug=True, port=8057)
@@ -1,64 +1,48 @@
-from dash import Dash, dash_table, dcc, html, Input, Output
+from dash import Dash, Patch, dash_table, dcc, html, Input, Output, State, no_update
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import datetime, timedelta
-import yfinance as yf
-import os
+from cache_utils import get_market_data
+from config import TICKERS
+from data_utils import derive_time_periods, summary_table
+from downsample import downsample_window, x_window
+from refresh_utils import load_periods
+from storage_utils import table_exists
 
-# CSV File Path
+# CSV File Path (fallback when the market-data store cannot be filled)
 csv_file_path = "stock_sparkline.csv"
 
+# Windows shown by the sparkline table ("Yesterday" covers the last two days)
+SPARKLINE_PERIOD_DAYS = {"1 Year": 365, "Yesterday": 2}
+SPARKLINE_COLUMNS = ['Time Period', 'Date', 'Symbol', 'Sector', 'Open', 'Close', 'High', 'Low', 'Volume', '52 Week Change %']
+
+# Play reveals the sparkline one step per tick, at most SPARKLINE_REVEAL_TICKS ticks per series
+SPARKLINE_TICK_MS = 100
+SPARKLINE_REVEAL_TICKS = 250
+
 def load_and_update_data():
     try:
-        if os.path.exists(csv_file_path):
-            return pd.read_csv(csv_file_path)
-
-        # Define time periods
         today = datetime.today()
-        time_periods = {
-            "1 Year": today - timedelta(days=365),
-            "Yesterday": today - timedelta(days=2),
-        }
-        # List of company tickers
-        companies = ['CVX', 'BA', 'GM', 'C', 'BAC', 'T', 'CAT', 'F', 'DIS', 'DE']
-
-        # Initialize an empty list to store data
-        data = []
-
-        # Fetch data for each company and time period
-        for ticker in companies:
-            stock = yf.Ticker(ticker)
-            sector = stock.info.get('sector', 'Unknown')
-
-            for period_name, start_date in time_periods.items():
-                end_date = today if period_name != "Yesterday" else start_date + timedelta(days=2)
-                hist = stock.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
-
-                if not hist.empty:
-                    for date, row in hist.iterrows():
-                        data.append({
-                            'Time Period': period_name,
-                            'Date': date.strftime('%Y-%m-%d'),
-                            'Symbol': ticker,
-                            'Sector': sector,
-                            'Open': row['Open'],
-                            'Close': row['Close'],
-                            'High': row['High'],
-                            'Low': row['Low'],
-                            'Volume': row['Volume'],
-                            '52 Week Change %': stock.info.get('52WeekChange', None),
-                        })
-
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-
-        # Save to CSV file
-        df.to_csv(csv_file_path, index=False)
-        return df
+
+        # One query against the shared store; "Yesterday" is sliced out of the 1 Year window
+        df = get_market_data(
+            TICKERS,
+            start=today - timedelta(days=365),
+            end=today,
+            fundamentals={'Sector': 'sector', '52 Week Change %': '52WeekChange'},
+        )
+        if df.empty:
+            raise ValueError("No data available in the market-data store")
+
+        df['Sector'] = df['Sector'].fillna('Unknown')
+        df.insert(0, 'Time Period', '1 Year')
+        return derive_time_periods(df[SPARKLINE_COLUMNS], SPARKLINE_PERIOD_DAYS, as_of=today)
 
     except Exception as e:
-        if os.path.exists(csv_file_path):
-            return pd.read_csv(csv_file_path, parse_dates=['Date'])
+        print(f"Error loading sparkline data: {e}")
+        if table_exists(csv_file_path):
+            # Topped up with the bars missing since it was stored, when the provider answers
+            return load_periods(csv_file_path, 'Symbol', SPARKLINE_PERIOD_DAYS)
         else:
             return pd.DataFrame()
 
@@ -69,6 +53,10 @@ df = load_and_update_data()
 yesterday_data = df[df['Time Period'] == 'Yesterday']
 one_year_data = df[df['Time Period'] == '1 Year']
 
+# Per-symbol rows and insight statistics, built once per data load
+one_year_by_symbol = {symbol: rows for symbol, rows in one_year_data.groupby('Symbol', sort=False)}
+one_year_summary = summary_table(one_year_data, group_cols=['Symbol']) if not one_year_data.empty else None
+
 # Create Dash app
 app = Dash(__name__)
 
@@ -109,7 +97,6 @@ app.layout = html.Div([
 
     # Sparkline Container
     html.Div(
-        id='sparkline-container',
         style={
             'marginTop': '20px',
             'padding': '20px',
@@ -119,9 +106,31 @@ app.layout = html.Div([
             'width': '100%',
         },
         children=[
-            html.Div("Select a row to display the sparkline.", style={
-                'textAlign': 'center', 'color': 'gray', 'fontSize': '16px'
-            })
+            html.Div(
+                id='sparkline-container',
+                children=[
+                    html.Div("Select a row to display the sparkline.", style={
+                        'textAlign': 'center', 'color': 'gray', 'fontSize': '16px'
+                    })
+                ]
+            ),
+            # Shown once a row is selected; the series is sent once and revealed in the browser
+            html.Div(
+                id='sparkline-panel',
+                style={'display': 'none'},
+                children=[
+                    html.Button("Play", id='sparkline-play', n_clicks=0),
+                    dcc.Graph(
+                        id='sparkline-graph',
+                        config={'displayModeBar': True},
+                        style={'height': '500px', 'width': '100%'}
+                    ),
+                    dcc.Interval(id='sparkline-interval', interval=SPARKLINE_TICK_MS, disabled=True),
+                    dcc.Store(id='sparkline-series'),
+                    # Browser width, which sets how many points of a series are sent
+                    dcc.Store(id='sparkline-width'),
+                ]
+            ),
         ]
     ),
 
@@ -151,61 +160,61 @@ app.layout = html.Div([
 })
 
 
-def create_sparkline_graph(symbol_data, ticker):
+def create_sparkline_graph(symbol_data, ticker, shown):
+    # The `shown` (downsampled) points, with both axes fixed to the full series' extent so a
+    # partial reveal drawn by the browser keeps the same scale
+    dates = pd.to_datetime(symbol_data["Date"])
+    closes = symbol_data["Close"]
+    pad = (closes.max() - closes.min()) * 0.05 or 1
+
     fig = go.Figure()
 
     # Add the trace for the Close price
     fig.add_trace(go.Scatter(
-        x=symbol_data["Date"],
-        y=symbol_data["Close"],
+        x=shown["Date"],
+        y=shown["Close"],
         mode='lines+markers',
         line=dict(color='blue'),
         marker=dict(size=8, symbol='circle'),
         name="Close",
     ))
 
-    # Add frames for animation
-    frames = [
-        dict(
-            data=[go.Scatter(
-                x=symbol_data.iloc[:k + 1]["Date"],
-                y=symbol_data.iloc[:k + 1]["Close"],
-                mode='lines+markers',
-                line=dict(color='blue'),
-                marker=dict(size=8),
-            )],
-        )
-        for k in range(len(symbol_data))
-    ]
-    fig.frames = frames
-
-    # Layout settings for animation
     fig.update_layout(
         title=f"Trend for: {ticker}",
         margin=dict(l=10, r=10, t=40, b=10),
         xaxis_title="Date",
         yaxis_title="Close Price",
+        xaxis_range=[dates.min(), dates.max()],
+        yaxis_range=[closes.min() - pad, closes.max() + pad],
         template="plotly_white",
-        updatemenus=[
-            dict(
-                type="buttons",
-                showactive=False,
-                buttons=[
-                    dict(label="Play", method="animate", args=[None, {"frame": {"duration": 100, "redraw": True}, "fromcurrent": True}]),
-                    dict(label="Pause", method="animate", args=[[None], {"frame": {"duration": 0, "redraw": False}, "mode": "immediate"}]),
-                ],
-            )
-        ],
+        # Keeps the user's zoom when a zoomed-in window is patched into the trace
+        uirevision=ticker,
     )
     return fig
 
+def sparkline_series(symbol_data):
+    # Points revealed by the browser and how many to add per tick
+    return {
+        'x': symbol_data["Date"].tolist(),
+        'y': symbol_data["Close"].astype(float).round(4).tolist(),
+        'step': -(-len(symbol_data) // SPARKLINE_REVEAL_TICKS),
+    }
+
 @app.callback(
     [Output('stock-table', 'data'),
      Output('sparkline-container', 'children'),
-     Output('insights-section', 'children')],
-    [Input('stock-table', 'selected_rows')]
+     Output('insights-section', 'children'),
+     Output('sparkline-panel', 'style'),
+     Output('sparkline-graph', 'figure'),
+     Output('sparkline-series', 'data'),
+     Output('sparkline-interval', 'disabled', allow_duplicate=True),
+     Output('sparkline-interval', 'n_intervals', allow_duplicate=True),
+     Output('sparkline-play', 'children', allow_duplicate=True)],
+    [Input('stock-table', 'selected_rows')],
+    State('sparkline-width', 'data'),
+    prevent_initial_call='initial_duplicate'
 )
-def update_table_and_content(selected_rows):
+def update_table_and_content(selected_rows, width):
     # Adding Analyst Decision directly into the table
     df_with_decision = yesterday_data.copy()
     df_with_decision["Analyst Decision"] = df_with_decision.apply(
@@ -220,32 +229,36 @@ def update_table_and_content(selected_rows):
                 "Select a row to see the sparkline.",
                 style={'textAlign': 'center', 'color': 'gray', 'fontSize': '16px'}
             ),
-            html.Div("No data available for insights and conclusion.")
+            html.Div("No data available for insights and conclusion."),
+            {'display': 'none'}, {}, None, True, None, "Play"
         )
 
     selected_row = df_with_decision.iloc[selected_rows[0]]
     symbol = selected_row['Symbol']
-    symbol_data = one_year_data[one_year_data['Symbol'] == symbol].copy()
+    symbol_data = one_year_by_symbol.get(symbol)
 
-    if symbol_data.empty:
+    if symbol_data is None or symbol_data.empty:
         return (
             df_with_decision.to_dict('records'),
             html.Div(
                 "No data available for sparkline.",
                 style={'textAlign': 'center', 'color': 'gray', 'fontSize': '16px'}
             ),
-            html.Div("No data available for insights and conclusion.")
+            html.Div("No data available for insights and conclusion."),
+            {'display': 'none'}, {}, None, True, None, "Play"
         )
 
     # Generate sparkline graph
-    figure = create_sparkline_graph(symbol_data, ticker=symbol)
+    shown = downsample_window(symbol_data, "Date", "Close", width_px=width)
+    figure = create_sparkline_graph(symbol_data, ticker=symbol, shown=shown)
 
-    # Calculate insights
-    highest_close = symbol_data['Close'].max()
-    lowest_close = symbol_data['Close'].min()
-    avg_close = symbol_data['Close'].mean()
-    total_volume = symbol_data['Volume'].sum()
-    percentage_change = ((symbol_data['Close'].iloc[-1] - symbol_data['Close'].iloc[0]) / symbol_data['Close'].iloc[0]) * 100
+    # Insights come from the precomputed summary row
+    stats = one_year_summary.loc[symbol]
+    highest_close = stats['Highest Close']
+    lowest_close = stats['Lowest Close']
+    avg_close = stats['Average Close']
+    total_volume = stats['Total Volume']
+    percentage_change = stats['Change %']
 
     insights = html.Div([
         html.H4(f"Key Insights for {symbol}", style={'marginTop': '20px', 'color': 'white'}),
@@ -267,13 +280,93 @@ def update_table_and_content(selected_rows):
 
     return (
         df_with_decision.to_dict('records'),
-        dcc.Graph(
-            figure=figure,
-            config={'displayModeBar': True},
-            style={'height': '500px', 'width': '100%'}
-        ),
-        insights
+        None,
+        insights,
+        {'display': 'block'},
+        figure,
+        sparkline_series(shown),
+        True,
+        # A new series starts unrevealed: the full line is shown until Play
+        None,
+        "Play"
     )
 
+@app.callback(
+    [Output('sparkline-graph', 'figure', allow_duplicate=True),
+     Output('sparkline-series', 'data', allow_duplicate=True)],
+    Input('sparkline-graph', 'relayoutData'),
+    [State('stock-table', 'selected_rows'),
+     State('sparkline-width', 'data')],
+    prevent_initial_call=True
+)
+def zoom_sparkline(relayout_data, selected_rows, width):
+    # Re-query the visible window after a zoom or pan; only the trace's points are replaced
+    window = x_window(relayout_data)
+    if window is None or not selected_rows:
+        return no_update, no_update
+    symbol_data = one_year_by_symbol.get(yesterday_data.iloc[selected_rows[0]]['Symbol'])
+    if symbol_data is None or symbol_data.empty:
+        return no_update, no_update
+
+    shown = downsample_window(symbol_data, "Date", "Close", *window, width_px=width)
+    figure = Patch()
+    figure['data'][0]['x'] = shown["Date"].tolist()
+    figure['data'][0]['y'] = shown["Close"].tolist()
+    return figure, sparkline_series(shown)
+
+app.clientside_callback(
+    """
+    function(id) {
+        return window.innerWidth;
+    }
+    """,
+    Output('sparkline-width', 'data'),
+    Input('sparkline-width', 'id')
+)
+
+# Play/Pause and the reveal run in the browser. Each tick redraws the first k points of the
+# stored series, so the series crosses the network once however long it is.
+app.clientside_callback(
+    """
+    function(clicks, paused, ticks, series) {
+        if (!paused) {
+            return [true, 'Play', window.dash_clientside.no_update];
+        }
+        const finished = ticks === null || ticks === undefined || !series || ticks * series.step >= series.x.length;
+        return [false, 'Pause', finished ? 0 : window.dash_clientside.no_update];
+    }
+    """,
+    [Output('sparkline-interval', 'disabled'),
+     Output('sparkline-play', 'children'),
+     Output('sparkline-interval', 'n_intervals')],
+    Input('sparkline-play', 'n_clicks'),
+    [State('sparkline-interval', 'disabled'),
+     State('sparkline-interval', 'n_intervals'),
+     State('sparkline-series', 'data')],
+    prevent_initial_call=True
+)
+
+app.clientside_callback(
+    """
+    function(ticks, series, figure) {
+        const skip = window.dash_clientside.no_update;
+        if (ticks === null || ticks === undefined || !series || !figure || !figure.data) {
+            return [skip, skip, skip];
+        }
+        const shown = Math.min(Math.max(ticks, 1) * series.step, series.x.length);
+        const trace = Object.assign({}, figure.data[0], {x: series.x.slice(0, shown), y: series.y.slice(0, shown)});
+        const done = shown >= series.x.length;
+        return [Object.assign({}, figure, {data: [trace]}), done, done ? 'Play' : 'Pause'];
+    }
+    """,
+    [Output('sparkline-graph', 'figure', allow_duplicate=True),
+     Output('sparkline-interval', 'disabled', allow_duplicate=True),
+     Output('sparkline-play', 'children', allow_duplicate=True)],
+    Input('sparkline-interval', 'n_intervals'),
+    [State('sparkline-series', 'data'),
+     State('sparkline-graph', 'figure')],
+    prevent_initial_call=True
+)
+
 if __name__ == '__main__':
     app.run_server(debug=True, port=8062)
@@ -1,10 +1,173 @@
+import warnings
+
 import numpy as np
+import pandas as pd
+
+# Named look-back windows (in calendar days) used for the 'Time Period' column.
+# The first entry is the widest window; the others nest inside it.
+TIME_PERIOD_DAYS = {
+    "1 Year": 365,
+    "6 Months": 182,
+    "3 Months": 91,
+    "Yesterday": 1,
+}
+
+PRICE_FIELDS = ['Open', 'Close', 'High', 'Low', 'Volume']
+
+# Per-bar columns computed from the price fields as whole-array operations
+DERIVED_COLUMNS = {
+    'Daily Change %': lambda frame: (frame['Close'] - frame['Open']) / frame['Open'] * 100,
+}
+
+def history_to_frame(hist, constants=None, derived=(), date_format='%Y-%m-%d', columns=None):
+    # Turn a yfinance history (DatetimeIndex + OHLCV) into the long format used across the
+    # apps. Constant columns (Symbol, Sector, fundamentals) are broadcast, dates are
+    # formatted in one pass and `columns` fixes the output order when given.
+    frame = pd.DataFrame({
+        'Date': hist.index.strftime(date_format) if date_format else hist.index,
+    })
+    for field in PRICE_FIELDS:
+        if field in hist:
+            frame[field] = hist[field].to_numpy()
+    for name, value in (constants or {}).items():
+        frame[name] = value
+    for name in derived:
+        frame[name] = DERIVED_COLUMNS[name](frame)
+    return frame[columns] if columns is not None else frame
+
+# Look-back windows of the risk/return engine, anchored on the latest bar; None is year-to-date
+RISK_WINDOWS = {
+    '1M': pd.DateOffset(months=1),
+    '3M': pd.DateOffset(months=3),
+    '6M': pd.DateOffset(months=6),
+    '1Y': pd.DateOffset(years=1),
+    'YTD': None,
+}
+TRADING_DAYS = 252
+
+def _window_metrics(prices, filled, trading_days, risk_free_rate):
+    # Metrics for every column of a (date, ticker) block at once. `filled` is the same block
+    # forward-filled, so a return spans any gap in a ticker's bars like pct_change after dropna.
+    n_rows, n_cols = prices.shape
+    first_row = np.argmax(~np.isnan(prices), axis=0)
+    filled = np.where(np.arange(n_rows)[:, None] < first_row, np.nan, filled)
+    first, last = prices[first_row, np.arange(n_cols)], filled[-1]
+    returns = prices[1:] / filled[:-1] - 1
+
+    with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+        # Tickers with fewer than two bars in the window end up NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        total = last / first - 1
+        annualized = (1 + total) ** (trading_days / np.sum(~np.isnan(returns), axis=0)) - 1
+        volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(trading_days)
+        drawdown = np.nanmin(filled / np.fmax.accumulate(filled, axis=0) - 1, axis=0)
+        sharpe = (annualized - risk_free_rate) / volatility
+    return {
+        'Return %': total * 100,
+        'Annualized Return %': annualized * 100,
+        'Volatility': volatility,
+        'Sharpe': sharpe,
+        'Max Drawdown %': drawdown * 100,
+    }
+
+def risk_return_metrics(closes, windows=RISK_WINDOWS, risk_free_rate=0.0, trading_days=TRADING_DAYS):
+    # One row per ticker from a wide (dates x tickers) close matrix. 'Annual Return' (%) and
+    # 'Volatility' (annualized) cover the whole matrix; every metric is also computed per
+    # look-back window as '<window> <metric>'.
+    closes = closes.sort_index()
+    dates = pd.DatetimeIndex(closes.index)
+    prices = closes.to_numpy(dtype=np.float64)
+    filled = closes.ffill().to_numpy(dtype=np.float64)
 
-def calculate_risk_return(df):
-    df['Daily Return'] = df.groupby('Ticker')['Close'].pct_change()
-    df['Volatility'] = df.groupby('Ticker')['Daily Return'].transform(lambda x: np.std(x) * np.sqrt(252))
-    df['Annual Return'] = df.groupby('Ticker')['Close'].transform(lambda x: (x.iloc[-1] / x.iloc[0] - 1) * 100)
-    return df[['Ticker', 'Annual Return', 'Volatility']].drop_duplicates()
+    full = _window_metrics(prices, filled, trading_days, risk_free_rate)
+    metrics = {'Ticker': closes.columns, 'Annual Return': full['Return %'], 'Volatility': full['Volatility']}
+    if len(dates):
+        as_of = dates[-1]
+        for name, offset in windows.items():
+            start = as_of - offset if offset is not None else pd.Timestamp(year=as_of.year, month=1, day=1)
+            lo = dates.searchsorted(start)
+            window = _window_metrics(prices[lo:], filled[lo:], trading_days, risk_free_rate)
+            metrics.update({f"{name} {metric}": values for metric, values in window.items()})
+    return pd.DataFrame(metrics)
+
+# Moving-average windows offered by the Trend Analysis slider
+MA_WINDOWS = list(range(5, 55, 5))
+
+def moving_average_table(df, windows=MA_WINDOWS, group_cols=('Symbol', 'Time Period')):
+    # Trailing mean of Close for every window and group (rolling(window, min_periods=1) over
+    # the date-sorted, forward-filled closes), from one cumulative sum per group. Returns
+    # {group key: rows sorted by Date with one 'MA <window>' column per window}.
+    group_cols = list(group_cols)
+    frame = df.assign(Date=pd.to_datetime(df['Date']),
+                      Close=pd.to_numeric(df['Close'], errors='coerce').astype(np.float64))
+    frame = frame.sort_values(group_cols + ['Date'], kind='stable', ignore_index=True)
+    frame['Close'] = frame.groupby(group_cols, sort=False, observed=True)['Close'].ffill()
+
+    groups = frame.groupby(group_cols, sort=False, observed=True)
+    csum = groups['Close'].cumsum().to_numpy(dtype=np.float64)
+    row = np.arange(len(frame))
+    group_start = row - groups.cumcount().to_numpy()
+    for window in windows:
+        lo = np.maximum(row - window + 1, group_start)
+        before = np.where(lo > group_start, csum[lo - 1], 0.0)
+        frame[f'MA {window}'] = (csum - before) / (row - lo + 1)
+    return {key: rows for key, rows in frame.groupby(group_cols, sort=False, observed=True)}
+
+def summary_table(df, group_cols=('Symbol', 'Time Period'), last_cols=()):
+    # Descriptive statistics per group, computed once per data load so insight panels read a
+    # single row instead of scanning history. `last_cols` are also reported as of each
+    # group's last bar, as 'Last <column>'.
+    frame = df.assign(Date=pd.to_datetime(df['Date'])).sort_values('Date', kind='stable')
+    aggregations = {
+        'First Date': ('Date', 'first'),
+        'Last Date': ('Date', 'last'),
+        'First Close': ('Close', 'first'),
+        'Last Close': ('Close', 'last'),
+        'Highest Close': ('Close', 'max'),
+        'Lowest Close': ('Close', 'min'),
+        'Average Close': ('Close', 'mean'),
+    }
+    if 'High' in frame:
+        aggregations['Highest Price'] = ('High', 'max')
+    if 'Low' in frame:
+        aggregations['Lowest Price'] = ('Low', 'min')
+    if 'Volume' in frame:
+        aggregations['Total Volume'] = ('Volume', 'sum')
+    for column in last_cols:
+        aggregations[f'Last {column}'] = (column, 'last')
+
+    summary = frame.groupby(list(group_cols), sort=False, observed=True).agg(**aggregations)
+    summary['Change %'] = (summary['Last Close'] / summary['First Close'] - 1) * 100
+    return summary
+
+def calculate_risk_return(df, key_col='Ticker', **kwargs):
+    # Long-format entry point (Date, key_col, Close rows); tickers keep their order of appearance
+    closes = df.pivot(index='Date', columns=key_col, values='Close')[list(df[key_col].unique())]
+    closes.index = pd.to_datetime(closes.index)
+    return risk_return_metrics(closes, **kwargs).rename(columns={'Ticker': key_col})
 
 def prepare_sparkline_data(df, ticker):
     return df[df['Ticker'] == ticker][['Date', 'Close']].sort_values(by='Date')
+
+def derive_time_periods(history, period_days=TIME_PERIOD_DAYS, as_of=None):
+    # Expand a history holding only the widest window into one slice per named period.
+    # Windows end the day after the latest bar unless `as_of` is given. Rows labelled
+    # with anything other than the widest period (e.g. 'Scraped') pass through as-is.
+    widest = next(iter(period_days))
+    is_base = history['Time Period'] == widest
+    base = history[is_base]
+    others = history[~is_base & ~history['Time Period'].isin(list(period_days))]
+    if base.empty:
+        return history.copy()
+
+    dates = pd.to_datetime(base['Date'])
+    if as_of is None:
+        as_of = dates.max().normalize() + pd.Timedelta(days=1)
+    as_of = pd.Timestamp(as_of).normalize()
+
+    frames = []
+    for period_name, days in period_days.items():
+        in_window = (dates >= as_of - pd.Timedelta(days=days)) & (dates < as_of)
+        frames.append(base[in_window].assign(**{'Time Period': period_name}))
+    frames.append(others)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Line series are reduced to a point budget set by the chart's width in pixels, so what is
+# sent to the browser depends on the screen, not on the length of the history. LTTB
+# (Largest-Triangle-Three-Buckets) keeps the visual shape. Zooming in re-queries the
+# visible window, which is shown at full resolution once it has fewer points than the budget.
+POINTS_PER_PIXEL = 2
+DEFAULT_WIDTH_PX = 1000
+
+
+def point_budget(width_px=None):
+    return int((width_px or DEFAULT_WIDTH_PX) * POINTS_PER_PIXEL)
+
+
+def lttb_indices(x, y, threshold):
+    # Positions of the `threshold` points LTTB keeps from (x, y), first and last included
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # threshold - 2 buckets over the interior points, and each bucket's mean point
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # The third corner is the next bucket's mean, or the last point after the final bucket
+        next_x, next_y = (mean_x[i + 1], mean_y[i + 1]) if i + 1 < len(counts) else (x[-1], y[-1])
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(frame, x_col, y_col, points):
+    # Rows of `frame` kept when its y_col line (against x_col) is reduced to about `points`
+    # points. Rows with a missing y value are dropped, as a line would skip them anyway.
+    frame = frame[frame[y_col].notna()]
+    if len(frame) <= points:
+        return frame
+    y = frame[y_col].to_numpy(dtype=np.float64)
+    x = frame[x_col]
+    x = (pd.to_datetime(x).astype('int64') if not pd.api.types.is_numeric_dtype(x) else x).to_numpy(dtype=np.float64)
+    return frame.iloc[lttb_indices(x, y, points)]
+
+
+def x_window(relayout_data):
+    # Visible x-axis range from a Dash graph's relayoutData: (start, end) after a zoom or pan,
+    # (None, None) after a reset to the full range, None when the event left the x-axis alone
+    if not relayout_data:
+        return None
+    if 'xaxis.range[0]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    if relayout_data.get('xaxis.autorange'):
+        return None, None
+    return None
+
+
+def downsample_window(frame, x_col, y_col, start=None, end=None, width_px=None):
+    # Rows in [start, end] of a frame sorted by x_col, plus one neighbour on each side so the
+    # line reaches the chart edges, reduced to the point budget of a width_px-wide chart
+    if start is not None or end is not None:
+        x = pd.to_datetime(frame[x_col]) if not pd.api.types.is_numeric_dtype(frame[x_col]) else frame[x_col]
+        convert = pd.Timestamp if not pd.api.types.is_numeric_dtype(frame[x_col]) else float
+        lo = x.searchsorted(convert(start), side='left') if start is not None else 0
+        hi = x.searchsorted(convert(end), side='right') if end is not None else len(frame)
+        frame = frame.iloc[max(lo - 1, 0):min(hi + 1, len(frame))]
+    return downsample(frame, x_col, y_col, point_budget(width_px))
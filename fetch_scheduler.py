@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import FETCH_BACKOFF_SECONDS, FETCH_MAX_RETRIES, FETCH_MAX_WORKERS, FETCH_RATE_PER_SEC
+
+
+class TokenBucket:
+    # Shared rate limiter: every request (including retries) takes one token,
+    # tokens refill at `rate` per second up to `capacity` for short bursts.
+    def __init__(self, rate=FETCH_RATE_PER_SEC, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _fetch_one(ticker, fetch_fn, limiter, retries, backoff, fallback):
+    stats = {'ticker': ticker, 'attempts': 0, 'failures': 0, 'source': None, 'error': None}
+    start = time.monotonic()
+    result = None
+
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        stats['attempts'] += 1
+        try:
+            result = fetch_fn(ticker)
+            stats['source'] = 'api'
+            break
+        except Exception as e:
+            stats['failures'] += 1
+            stats['error'] = str(e)
+            if attempt < retries:
+                # Exponential backoff with jitter so workers don't retry in lockstep
+                time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    # Last resort once the API path is exhausted
+    if stats['source'] is None and fallback is not None:
+        limiter.acquire()
+        try:
+            result = fallback(ticker)
+            stats['source'] = 'fallback'
+        except Exception as e:
+            stats['failures'] += 1
+            stats['error'] = str(e)
+
+    if stats['source'] is None:
+        stats['source'] = 'failed'
+    stats['latency'] = time.monotonic() - start
+    return result, stats
+
+
+def run_fetches(tickers, fetch_fn, fallback=None, max_workers=FETCH_MAX_WORKERS,
+                rate=FETCH_RATE_PER_SEC, retries=FETCH_MAX_RETRIES, backoff=FETCH_BACKOFF_SECONDS):
+    # Run fetch_fn(ticker) for every ticker on a bounded pool behind one token bucket.
+    # Returns ({ticker: result}, {ticker: stats}); failed tickers are left out of results.
+    limiter = TokenBucket(rate)
+    results, stats = {}, {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_fetch_one, ticker, fetch_fn, limiter, retries, backoff, fallback)
+            for ticker in tickers
+        ]
+        for future in futures:
+            result, ticker_stats = future.result()
+            ticker = ticker_stats['ticker']
+            stats[ticker] = ticker_stats
+            if ticker_stats['source'] != 'failed':
+                results[ticker] = result
+
+    return results, stats
+
+
+def summarize_stats(stats):
+    latencies = sorted(s['latency'] for s in stats.values())
+    return {
+        'tickers': len(stats),
+        'succeeded': sum(s['source'] == 'api' for s in stats.values()),
+        'fallback': sum(s['source'] == 'fallback' for s in stats.values()),
+        'failed': sum(s['source'] == 'failed' for s in stats.values()),
+        'failures': sum(s['failures'] for s in stats.values()),
+        'max_latency': latencies[-1] if latencies else 0.0,
+        'median_latency': latencies[len(latencies) // 2] if latencies else 0.0,
+    }
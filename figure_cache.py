@@ -0,0 +1,71 @@
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+from config import FIGURE_CACHE_ENTRIES, FIGURE_CACHE_MAX_BYTES
+
+# Figures the Dash callbacks have already built, keyed by (callback, normalized selection,
+# data version) and stored as serialized JSON. A repeated selection is answered by parsing
+# the stored JSON instead of running Plotly Express again. The least recently used figures
+# are dropped beyond FIGURE_CACHE_ENTRIES or FIGURE_CACHE_MAX_BYTES.
+_figures = OrderedDict()
+_versions = {}
+_lock = threading.Lock()
+_size = 0
+
+
+def data_version(*frames):
+    # Content hash of the DataFrames a figure is built from; it changes whenever a refresh
+    # changes any value, so figures of the previous data are never served
+    return '-'.join(f"{len(frame)}:{int(pd.util.hash_pandas_object(frame).sum()):x}" for frame in frames)
+
+
+def normalize_selection(selection, universe):
+    # Order and duplicates of a dropdown value do not change the filtered data, and values
+    # outside the universe are filtered out anyway
+    return tuple(sorted(set(selection or ()) & set(universe)))
+
+
+def _evict(key):
+    global _size
+    _size -= len(_figures.pop(key))
+
+
+def invalidate(callback=None):
+    # Drop the stored figures of one callback, or of every callback
+    with _lock:
+        for key in [key for key in _figures if callback is None or key[0] == callback]:
+            _evict(key)
+        if callback is None:
+            _versions.clear()
+        else:
+            _versions.pop(callback, None)
+
+
+def cached_figure(callback, selection, version, build):
+    # Figure dict for `selection`; build() runs only when no figure is stored for this key
+    global _size
+    key = (callback, selection, version)
+    with _lock:
+        payload = _figures.get(key)
+        if payload is not None:
+            _figures.move_to_end(key)
+    if payload is not None:
+        return json.loads(payload)
+
+    payload = to_json_plotly(build())
+    with _lock:
+        # A new data version makes every figure of this callback stale
+        if _versions.get(callback) != version:
+            for stale in [stale for stale in _figures if stale[0] == callback]:
+                _evict(stale)
+            _versions[callback] = version
+        if key not in _figures and len(payload) <= FIGURE_CACHE_MAX_BYTES:
+            _figures[key] = payload
+            _size += len(payload)
+            while len(_figures) > FIGURE_CACHE_ENTRIES or _size > FIGURE_CACHE_MAX_BYTES:
+                _evict(next(iter(_figures)))
+    return json.loads(payload)
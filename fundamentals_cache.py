@@ -0,0 +1,48 @@
+import logging
+
+import diskcache as dc
+
+from config import FUNDAMENTALS_TTL_SECONDS
+from fetch_scheduler import run_fetches, summarize_stats
+from providers import get_provider
+
+logger = logging.getLogger(__name__)
+
+# Fundamentals (yfinance `info`) change slowly and come from a slow, rate-limited call, so they
+# live in their own cache with a TTL, separate from the daily price histories in cache_utils
+fundamentals_cache = dc.Cache('./fundamentals_cache')
+
+def _info_key(ticker):
+    return f"info_{ticker}"
+
+def _fetch_info(ticker):
+    # The lock makes concurrent processes share one request per ticker and TTL window
+    key = _info_key(ticker)
+    with dc.Lock(fundamentals_cache, f"lock_{key}", expire=120):
+        info = fundamentals_cache.get(key)
+        if info is None:
+            info = get_provider().info(ticker)
+            fundamentals_cache.set(key, info, expire=FUNDAMENTALS_TTL_SECONDS)
+    return info
+
+def prefetch_fundamentals(tickers):
+    # Fetch every expired or missing ticker in one rate-limited batch
+    missing = [ticker for ticker in tickers if _info_key(ticker) not in fundamentals_cache]
+    if missing:
+        _, stats = run_fetches(missing, _fetch_info)
+        for ticker, ticker_stats in stats.items():
+            if ticker_stats['source'] == 'failed':
+                logger.warning("Error fetching info for %s: %s", ticker, ticker_stats['error'])
+        summary = summarize_stats(stats)
+        logger.info("Fetched fundamentals for %d of %d tickers (%d failed attempts); median latency %.2fs",
+                    summary['succeeded'], summary['tickers'], summary['failures'], summary['median_latency'])
+
+def cached_fundamentals(tickers):
+    # What the cache holds for `tickers` ({} when missing), without fetching anything; for
+    # callers that ran prefetch_fundamentals and must not start requests of their own
+    return {ticker: fundamentals_cache.get(_info_key(ticker), {}) for ticker in tickers}
+
+def get_fundamentals(tickers):
+    # yfinance `info` dicts keyed by ticker ({} when unavailable)
+    prefetch_fundamentals(tickers)
+    return cached_fundamentals(tickers)
@@ -1,18 +1,24 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import plotly.graph_objects as go
-from sklearn.preprocessing import MinMaxScaler
 from datetime import datetime, timedelta
-import plotly.express as px
+import logging
 import subprocess
-import os
-from threading import Thread
-import time
 
+from fetch_scheduler import run_fetches, summarize_stats
+from fundamentals_cache import cached_fundamentals, prefetch_fundamentals
+from data_utils import (TIME_PERIOD_DAYS, derive_time_periods, history_to_frame, moving_average_table,
+                        summary_table)
+from downsample import downsample_window
+from refresh_utils import load_periods
+from storage_utils import read_table, table_exists, to_typed, write_table
+from providers import get_provider
+from config import LAUNCH_DASH_APPS, TICKERS
 
+# Heavy or rarely used dependencies (plotly, requests/bs4 for scraping, the LLM client) are
+# imported inside the code paths that need them, so first paint and reruns skip them.
+
+logger = logging.getLogger(__name__)
 
-import llm_chat
 st.set_page_config(layout="wide")
 def run_dash_app():
     subprocess.Popen(["python", "dash_app.py"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
@@ -31,128 +37,134 @@ def run_dash_bar_chart_race_app():
 def run_dash_bubble_chart_animation_app():
     subprocess.Popen(["python", "dash_bubble_chart_animation.py"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
-# Start all Dash apps in the background
-run_dash_app()
-run_dash_sparklines_app()
-run_dash_parallel_coordinates_app()
-run_dash_risk_return_matrix_app()
-run_dash_bar_chart_race_app()
-run_dash_bubble_chart_animation_app()
+# Start all Dash apps in the background, once per server process rather than on every rerun
+@st.cache_resource
+def launch_dash_apps():
+    run_dash_app()
+    run_dash_sparklines_app()
+    run_dash_parallel_coordinates_app()
+    run_dash_risk_return_matrix_app()
+    run_dash_bar_chart_race_app()
+    run_dash_bubble_chart_animation_app()
+    return True
+
+if LAUNCH_DASH_APPS:
+    launch_dash_apps()
+
+TREND_COLUMNS = [
+    'Time Period', 'Date', 'Symbol', 'Sector', 'Open', 'Close', 'High', 'Low', 'Volume',
+    'Price to Earnings Ratio', 'Market Cap', 'Dividend Yield %', '52 Week Change %',
+    'Debt to Equity', 'Revenue Growth', 'Profit Margin',
+]
+
+def _fetch_ticker_rows(ticker, today, info):
+    sector = info.get('sector', 'Unknown')
+
+    # One download covering the widest window; narrower periods are sliced from it
+    period_name, days = next(iter(TIME_PERIOD_DAYS.items()))
+    start_date = today - timedelta(days=days)
+    hist = get_provider().history(ticker, start=start_date.strftime('%Y-%m-%d'), end=today.strftime('%Y-%m-%d'))
+
+    return history_to_frame(hist, {
+        'Time Period': period_name,
+        'Symbol': ticker,
+        'Sector': sector,
+        'Price to Earnings Ratio': info.get('trailingPE', None),
+        'Market Cap': info.get('marketCap', None),
+        'Dividend Yield %': info.get('dividendYield', None),
+        '52 Week Change %': info.get('52WeekChange', None),
+        'Debt to Equity': info.get('debtToEquity', None),
+        'Revenue Growth': info.get('revenueGrowth', None),
+        'Profit Margin': info.get('profitMargins', None),
+    }, columns=TREND_COLUMNS)
+
+
+def _scrape_ticker_rows(ticker, today):
+    # Fallback to web scraping
+    import requests
+    from bs4 import BeautifulSoup
+
+    url = f"https://finance.yahoo.com/quote/{ticker}"
+    response = requests.get(url)
+    soup = BeautifulSoup(response.text, 'html.parser')
+
+    # Scrape specific fields
+    open_price = soup.find('td', {'data-test': 'OPEN-value'}).text if soup.find('td', {'data-test': 'OPEN-value'}) else None
+    close_price = soup.find('td', {'data-test': 'PREV_CLOSE-value'}).text if soup.find('td', {'data-test': 'PREV_CLOSE-value'}) else None
+    volume = soup.find('td', {'data-test': 'TD_VOLUME-value'}).text.replace(",", "") if soup.find('td', {'data-test': 'TD_VOLUME-value'}) else None
+    high = soup.find('td', {'data-test': 'DAYS_RANGE-value'}).text.split('-')[-1] if soup.find('td', {'data-test': 'DAYS_RANGE-value'}) else None
+    low = soup.find('td', {'data-test': 'DAYS_RANGE-value'}).text.split('-')[0] if soup.find('td', {'data-test': 'DAYS_RANGE-value'}) else None
+    dividend_yield = soup.find('td', {'data-test': 'DIVIDEND_AND_YIELD-value'}).text.split(' ')[0] if soup.find('td', {'data-test': 'DIVIDEND_AND_YIELD-value'}) else None
+    week_change = soup.find('td', {'data-test': '52_WEEK_CHANGE-value'}).text if soup.find('td', {'data-test': '52_WEEK_CHANGE-value'}) else None
+    debt_to_equity = soup.find('td', {'data-test': 'DEBT_EQUITY_RATIO-value'}).text if soup.find('td', {'data-test': 'DEBT_EQUITY_RATIO-value'}) else None
+    revenue_growth = soup.find('td', {'data-test': 'REVENUE_GROWTH_QTRLY_YOY-value'}).text if soup.find('td', {'data-test': 'REVENUE_GROWTH_QTRLY_YOY-value'}) else None
+    profit_margin = soup.find('td', {'data-test': 'PROFIT_MARGIN-value'}).text if soup.find('td', {'data-test': 'PROFIT_MARGIN-value'}) else None
+
+    return pd.DataFrame([{
+        'Time Period': 'Scraped',
+        'Date': today.strftime('%Y-%m-%d'),
+        'Symbol': ticker,
+        'Sector': 'Unknown',  # Cannot scrape sector
+        'Open': open_price,
+        'Close': close_price,
+        'High': high,
+        'Low': low,
+        'Volume': volume,
+        'Price to Earnings Ratio': None,  # Not available without the API
+        'Market Cap': None,
+        'Dividend Yield %': dividend_yield,
+        '52 Week Change %': week_change,
+        'Debt to Equity': debt_to_equity,
+        'Revenue Growth': revenue_growth,
+        'Profit Margin': profit_margin,
+    }], columns=TREND_COLUMNS)
 
-# Wait for Dash apps to start
-import streamlit as st
-from datetime import datetime, timedelta
-import pandas as pd
-import yfinance as yf
-import time
-from sklearn.preprocessing import MinMaxScaler
-import requests
-from bs4 import BeautifulSoup
 
 @st.cache_data
 def fetch_stock_data():
     csv_file_path = "stock_trend_data.csv"
-    companies = ['CVX', 'BA', 'GM', 'C', 'BAC', 'T', 'CAT', 'F', 'DIS', 'DE']
+    companies = TICKERS
     today = datetime.today()
-    time_periods = {
-        "1 Year": today - timedelta(days=365),
-        "6 Months": today - timedelta(days=182),
-        "3 Months": today - timedelta(days=91),
-        "Yesterday": today - timedelta(days=1),
-    }
 
-    data = []
-    data_fetched = False
-
-    for ticker in companies:
-        try:
-            # Attempt to fetch data from API
-            stock = yf.Ticker(ticker)
-            info = stock.info if stock.info else {}
-            sector = info.get('sector', 'Unknown')
-
-            for period_name, start_date in time_periods.items():
-                end_date = today if period_name != "Yesterday" else start_date + timedelta(days=1)
-                hist = stock.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
-
-                if not hist.empty:
-                    for date, row in hist.iterrows():
-                        data.append({
-                            'Time Period': period_name,
-                            'Date': date.strftime('%Y-%m-%d'),
-                            'Symbol': ticker,
-                            'Sector': sector,
-                            'Open': row.get('Open', None),
-                            'Close': row.get('Close', None),
-                            'High': row.get('High', None),
-                            'Low': row.get('Low', None),
-                            'Volume': row.get('Volume', None),
-                            'Price to Earnings Ratio': info.get('trailingPE', None),
-                            'Market Cap': info.get('marketCap', None),
-                            'Dividend Yield %': info.get('dividendYield', None),
-                            '52 Week Change %': info.get('52WeekChange', None),
-                            'Debt to Equity': info.get('debtToEquity', None),
-                            'Revenue Growth': info.get('revenueGrowth', None),
-                            'Profit Margin': info.get('profitMargins', None),
-                        })
-            data_fetched = True
-            time.sleep(5)  # Wait to prevent hitting rate limit
-
-        except Exception as e:
-            st.warning(f"Rate limit hit or other error for {ticker}: {e}. Attempting to scrape data...")
-
-            # Fallback to web scraping
-            try:
-                url = f"https://finance.yahoo.com/quote/{ticker}"
-                response = requests.get(url)
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Scrape specific fields
-                open_price = soup.find('td', {'data-test': 'OPEN-value'}).text if soup.find('td', {'data-test': 'OPEN-value'}) else None
-                close_price = soup.find('td', {'data-test': 'PREV_CLOSE-value'}).text if soup.find('td', {'data-test': 'PREV_CLOSE-value'}) else None
-                volume = soup.find('td', {'data-test': 'TD_VOLUME-value'}).text.replace(",", "") if soup.find('td', {'data-test': 'TD_VOLUME-value'}) else None
-                high = soup.find('td', {'data-test': 'DAYS_RANGE-value'}).text.split('-')[-1] if soup.find('td', {'data-test': 'DAYS_RANGE-value'}) else None
-                low = soup.find('td', {'data-test': 'DAYS_RANGE-value'}).text.split('-')[0] if soup.find('td', {'data-test': 'DAYS_RANGE-value'}) else None
-                dividend_yield = soup.find('td', {'data-test': 'DIVIDEND_AND_YIELD-value'}).text.split(' ')[0] if soup.find('td', {'data-test': 'DIVIDEND_AND_YIELD-value'}) else None
-                week_change = soup.find('td', {'data-test': '52_WEEK_CHANGE-value'}).text if soup.find('td', {'data-test': '52_WEEK_CHANGE-value'}) else None
-                debt_to_equity = soup.find('td', {'data-test': 'DEBT_EQUITY_RATIO-value'}).text if soup.find('td', {'data-test': 'DEBT_EQUITY_RATIO-value'}) else None
-                revenue_growth = soup.find('td', {'data-test': 'REVENUE_GROWTH_QTRLY_YOY-value'}).text if soup.find('td', {'data-test': 'REVENUE_GROWTH_QTRLY_YOY-value'}) else None
-                profit_margin = soup.find('td', {'data-test': 'PROFIT_MARGIN-value'}).text if soup.find('td', {'data-test': 'PROFIT_MARGIN-value'}) else None
-
-                # Append scraped data
-                data.append({
-                    'Time Period': 'Scraped',
-                    'Date': today.strftime('%Y-%m-%d'),
-                    'Symbol': ticker,
-                    'Sector': 'Unknown',  # Cannot scrape sector
-                    'Open': open_price,
-                    'Close': close_price,
-                    'High': high,
-                    'Low': low,
-                    'Volume': volume,
-                    'Price to Earnings Ratio': info.get('trailingPE', None),
-                    'Market Cap': info.get('marketCap', None),
-                    'Dividend Yield %': dividend_yield,
-                    '52 Week Change %': week_change,
-                    'Debt to Equity': debt_to_equity,
-                    'Revenue Growth': revenue_growth,
-                    'Profit Margin': profit_margin,
-                })
-                data_fetched = True
-            except Exception as scrape_error:
-                st.error(f"Scraping failed for {ticker}: {scrape_error}")
+    # Fundamentals come from their own TTL cache, filled in one batch up front; the workers
+    # below only read it, so a failed prefetch is not retried outside the rate limiter
+    prefetch_fundamentals(companies)
+    info = cached_fundamentals(companies)
+
+    # Tickers run concurrently behind the shared rate limiter (see fetch_scheduler),
+    # retrying with backoff before falling back to scraping
+    results, stats = run_fetches(
+        companies,
+        lambda ticker: _fetch_ticker_rows(ticker, today, info[ticker]),
+        fallback=lambda ticker: _scrape_ticker_rows(ticker, today),
+    )
+
+    for ticker, ticker_stats in stats.items():
+        logger.info("%s: %s in %.2fs (%d attempts, %d failures)", ticker, ticker_stats['source'],
+                    ticker_stats['latency'], ticker_stats['attempts'], ticker_stats['failures'])
+        if ticker_stats['source'] == 'fallback':
+            st.warning(f"Rate limit hit or other error for {ticker}: {ticker_stats['error']}. Used scraped data instead.")
+        elif ticker_stats['source'] == 'failed':
+            st.error(f"Fetching and scraping failed for {ticker}: {ticker_stats['error']}")
+
+    summary = summarize_stats(stats)
+    st.caption(f"Fetched {summary['succeeded']} tickers via API, {summary['fallback']} via scraping, "
+               f"{summary['failed']} failed ({summary['failures']} failed attempts); "
+               f"median latency {summary['median_latency']:.2f}s, max {summary['max_latency']:.2f}s")
+
+    data_fetched = bool(results)
 
     if data_fetched:
-        df = pd.DataFrame(data)
+        df = pd.concat([results[ticker] for ticker in companies if ticker in results], ignore_index=True)
         required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
         df.dropna(subset=required_columns, inplace=True)
-        df.to_csv(csv_file_path, index=False)
+        write_table(df, csv_file_path)
         st.success(f"Data successfully fetched and saved to {csv_file_path}")
-        return df
+        return derive_time_periods(to_typed(df), as_of=today)
     else:
-        if os.path.exists(csv_file_path):
+        if table_exists(csv_file_path):
             st.info(f"Using existing data from {csv_file_path}")
-            return pd.read_csv(csv_file_path)
+            return derive_time_periods(read_table(csv_file_path))
         else:
             st.error(f"No data available and no existing CSV file found at {csv_file_path}")
             return pd.DataFrame()
@@ -160,10 +172,47 @@ def fetch_stock_data():
 
 
 
+@st.cache_data(ttl=3600)
+def load_trend_data(csv_file_path):
+    # Top up the stored history with any missing bars, then slice the named periods
+    df = load_periods(csv_file_path, 'Symbol')
+    df['Time Period'] = df['Time Period'].astype('category')
+    return df
+
+
+@st.cache_resource(ttl=3600)
+def load_trend_indicators(csv_file_path):
+    # Every slider window for every (Symbol, Time Period), computed once per data load and
+    # shared read-only across reruns, so the Trend Analysis tab only looks results up
+    return moving_average_table(load_trend_data(csv_file_path))
+
+
+def _pyramid_current(pyramid):
+    # A missing pyramid is retried once the hour-long cache entry expires
+    return pyramid is None or pd.Timestamp.now(tz='UTC') < pyramid.fresh_until
+
+
+@st.cache_resource(ttl=3600, validate=_pyramid_current)
+def load_ohlc_pyramid(ticker):
+    # Candles at every stored resolution for one ticker, shared read-only across reruns until
+    # the next session close makes them stale. The shared store is imported here because only
+    # the Trend Analysis tab needs it.
+    from cache_utils import get_ohlc_pyramid
+    return get_ohlc_pyramid(ticker)
+
+
+@st.cache_resource(ttl=3600)
+def load_trend_summary(csv_file_path):
+    # Insight statistics per (Symbol, Time Period), shared read-only across reruns
+    return summary_table(load_trend_data(csv_file_path))
+
+
 # Normalize metrics for balanced comparison
 def normalize_metrics(df, metrics):
-    scaler = MinMaxScaler()
-    df[metrics] = scaler.fit_transform(df[metrics])
+    # Column-wise min-max scaling to [0, 1]; constant columns become 0, as with MinMaxScaler
+    low = df[metrics].min()
+    span = df[metrics].max() - low
+    df[metrics] = (df[metrics] - low) / span.replace(0, 1)
     return df
 def highlight_open_close(row):
     styles = []
@@ -209,18 +258,15 @@ def main():
     # Check for existing CSV file
     csv_file_path = 'stock_trend_data.csv'
     
-    if os.path.exists(csv_file_path):
-        # Load data from existing CSV file
+    if table_exists(csv_file_path):
+        # Load data from the stored table (Parquet copy of the CSV when available)
         #st.info("Loading data from existing CSV file.")
-        df = pd.read_csv(csv_file_path)
+        df = load_trend_data(csv_file_path)
     else:
         # If no CSV file exists, fetch data
         st.info("Fetching data from API and scraping fallback.")
+        # fetch_stock_data saves what it fetched to csv_file_path
         df = fetch_stock_data()
-        
-        if not df.empty:
-            df.to_csv(csv_file_path, index=False)
-            st.success(f"Data saved to {csv_file_path}")
     
     # Initialize chatbot state
     if "chat_visible" not in st.session_state:
@@ -290,6 +336,7 @@ def main():
         if st.button("Send"):
             if user_input:
                 st.session_state.chat_history.append(f"**You:** {user_input}")
+                import llm_chat
                 llm_response = llm_chat.getResponse(data_json, user_input)  
                 st.session_state.chat_history.append(f"🤖 AI: {llm_response}")
                 st.rerun()
@@ -377,16 +424,12 @@ def main():
         st.sidebar.header("Trend Analysis Filters")
         # Check for CSV file
         csv_file_path = 'stock_trend_data.csv'
-        if os.path.exists(csv_file_path):
+        if table_exists(csv_file_path):
             #st.info("Loading data from existing CSV file.")
-            df = pd.read_csv(csv_file_path)
+            df = load_trend_data(csv_file_path)
         else:
             #st.info("Fetching data from API and scraping fallback.")
             df = fetch_stock_data()
-    
-            if not df.empty:
-                df.to_csv(csv_file_path, index=False)
-                st.success(f"Data saved to {csv_file_path}")
         
         available_tickers = df["Symbol"].unique()  # Unique stock symbols
         ticker = st.sidebar.selectbox("Select Stock Ticker", available_tickers, index=0)
@@ -400,53 +443,56 @@ def main():
         include_rangeslider = st.sidebar.checkbox("Include Rangeslider", value=True)
         ma_period = st.sidebar.slider("Select Moving Average Period (days)", min_value=5, max_value=50, value=20, step=5)
         
-        # Filter the DataFrame for the selected ticker and time period
-        filtered_data = df[(df["Symbol"] == ticker) & (df["Time Period"] == period)].copy()
+        # Rows for the selected ticker and time period, already parsed, sorted and carrying
+        # every moving-average window, so moving the slider is only a lookup
+        trend_indicators = load_trend_indicators(csv_file_path) if table_exists(csv_file_path) else {}
+        filtered_data = trend_indicators.get((ticker, period))
         
         # Check if the filtered data is empty
-        if filtered_data.empty:
+        if filtered_data is None or filtered_data.empty:
             st.error(f"No data available for {ticker} in the selected time period ({period}).")
         else:
             try:
-                # Ensure 'Date' is sorted and in datetime format
-                # Convert 'Date' to datetime format
-                filtered_data["Date"] = pd.to_datetime(filtered_data["Date"])
-                
-                # Sort values by 'Date' and reassign
-                filtered_data = filtered_data.sort_values("Date")
-                
-                # Ensure the 'Close' column is numeric and handle missing values
-                filtered_data["Close"] = pd.to_numeric(filtered_data["Close"], errors='coerce')
-                
-                # Forward-fill missing values in 'Close' and reassign
-                filtered_data["Close"] = filtered_data["Close"].ffill()
-
-        
                 # Ensure enough data points for rolling calculation
                 if len(filtered_data) < ma_period:
                     st.error(f"Not enough data points to calculate a {ma_period}-day moving average.")
                 else:
-                    # Calculate the moving average
-                    filtered_data["Trend"] = filtered_data["Close"].rolling(window=ma_period, min_periods=1).mean()
+                    # Narrowing the visible range re-queries the pyramid, which answers with
+                    # the finest resolution that still fits the chart
+                    first_day, last_day = filtered_data["Date"].min().date(), filtered_data["Date"].max().date()
+                    if first_day < last_day:
+                        first_day, last_day = st.sidebar.slider(
+                            "Visible Range", min_value=first_day, max_value=last_day, value=(first_day, last_day))
+                    visible_start = pd.Timestamp(first_day)
+                    visible_end = pd.Timestamp(last_day) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+
+                    pyramid = load_ohlc_pyramid(ticker)
+                    level, candles = pyramid.candles(visible_start, visible_end) if pyramid else (None, pd.DataFrame())
+                    if candles.empty:
+                        # Nothing in the pyramid yet: draw the stored daily bars
+                        level = "1d"
+                        candles = filtered_data.set_index("Date")[visible_start:visible_end]
         
                     # Create candlestick chart
+                    import plotly.graph_objects as go
                     fig = go.Figure()
         
                     fig.add_trace(go.Candlestick(
-                        x=filtered_data["Date"],
-                        open=filtered_data["Open"],
-                        high=filtered_data["High"],
-                        low=filtered_data["Low"],
-                        close=filtered_data["Close"],
+                        x=candles.index,
+                        open=candles["Open"],
+                        high=candles["High"],
+                        low=candles["Low"],
+                        close=candles["Close"],
                         increasing=dict(line_color='green'),
                         decreasing=dict(line_color='red'),
-                        name="Candlestick"
+                        name=f"Candlestick ({level})"
                     ))
         
-                    # Add moving average line
+                    # Add moving average line, reduced to the chart's point budget (LTTB)
+                    ma_points = downsample_window(filtered_data, "Date", f"MA {ma_period}", visible_start, visible_end)
                     fig.add_trace(go.Scatter(
-                        x=filtered_data["Date"],
-                        y=filtered_data["Trend"],
+                        x=ma_points["Date"],
+                        y=ma_points[f"MA {ma_period}"],
                         mode="lines",
                         line=dict(color="yellow", width=2),
                         name=f"{ma_period}-Day Moving Average"
@@ -471,12 +517,13 @@ def main():
                     # Display the chart
                     st.plotly_chart(fig)
         
-                    # Dynamically calculate insights
-                    highest_price = filtered_data["High"].max()
-                    lowest_price = filtered_data["Low"].min()
-                    avg_close_price = filtered_data["Close"].mean()
+                    # Insights come from the precomputed summary row
+                    stats = load_trend_summary(csv_file_path).loc[(ticker, period)]
+                    highest_price = stats["Highest Price"]
+                    lowest_price = stats["Lowest Price"]
+                    avg_close_price = stats["Average Close"]
                     price_difference = highest_price - lowest_price
-                    time_range = f"{filtered_data['Date'].min().strftime('%b %d, %Y')} to {filtered_data['Date'].max().strftime('%b %d, %Y')}"
+                    time_range = f"{stats['First Date'].strftime('%b %d, %Y')} to {stats['Last Date'].strftime('%b %d, %Y')}"
                     ma_trend = f"{ma_period}-Day Moving Average"
         
                     # Display Key Insights
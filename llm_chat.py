@@ -1,9 +1,16 @@
 together_ai_api = "21003311b33c7dddadb89d6c0c7b42e81d8e39c866f672692b15a404e32351e6"
 
 import os
-from together import Together
 
-client = Together(api_key=together_ai_api)
+_client = None
+
+def get_client():
+    # Created on the first question, so importing this module stays cheap
+    global _client
+    if _client is None:
+        from together import Together
+        _client = Together(api_key=together_ai_api)
+    return _client
 
 # stockStatsPrompt = f'''You are provided with a variable named `data_json` which contains an array of JSON objects representing stock data. Each object corresponds to a stock's performance over different time periods (e.g., 1 Year, 6 Months) and contains the following key attributes: `Symbol`, `Sector`, `Open`, `Close`, `High`, `Low`, `Volume`, `Price to Earnings Ratio`, `Market Cap`, `Dividend Yield %`, `52 Week Change %`, `Debt to Equity`, `Revenue Growth`, and `Profit Margin`.
 
@@ -36,7 +43,7 @@ def getResponse(data_json, user_question):
         Based on this dataset, answer the following question of the user: {user_question}
         Always give a concise answer.'''
 
-    response = client.chat.completions.create(
+    response = get_client().chat.completions.create(
         model="deepseek-ai/DeepSeek-V3",
         messages=[
             {"role": "system", "content": "You are an expert in the analysis of Stocks."},
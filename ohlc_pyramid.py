@@ -0,0 +1,123 @@
+import json
+import os
+
+import pandas as pd
+
+from storage_utils import read_table, write_table
+
+# On-disk layout: <path>/<level>.csv (stored as Parquet when available) holds one ticker's
+# candles at that resolution; <path>/index.json holds, per level, the time of the first raw
+# bar it was built from, and the time until which the pyramid is current. A chart asks for
+# the finest level that covers the visible range in at most MAX_CANDLES candles, so
+# rendering cost stays flat whatever resolution is stored.
+LEVELS = {'1m': '1min', '5m': '5min', '1h': '1h', '1d': '1D', '1w': 'W-MON'}
+OHLCV = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+MAX_CANDLES = 500
+
+
+def _naive(bars):
+    # Exchange-local wall time without a timezone, as the tensor store keeps dates
+    bars = bars.sort_index()
+    return bars.tz_localize(None) if getattr(bars.index, 'tz', None) is not None else bars
+
+
+def resample_ohlcv(bars, level):
+    # First open, highest high, lowest low, last close and summed volume per bucket of
+    # `level`, labelled by the bucket start; buckets without bars are dropped
+    bars = _naive(bars)[[column for column in OHLCV if column in bars]]
+    candles = bars.resample(LEVELS[level], label='left', closed='left').agg(
+        {column: how for column, how in OHLCV.items() if column in bars})
+    return candles.dropna(subset=['Open'])
+
+
+def build_pyramid(sources):
+    # {level: candles} and {level: first raw bar covered} from {interval: bars} provider
+    # fetches. A level is built from every source at its resolution or finer: the finest
+    # one for the span it covers, coarser ones only for earlier times. A finer source's
+    # first bucket can be partial (it starts mid-bucket), so the coarser source supplies it.
+    order = list(LEVELS)
+    sources = {interval: _naive(bars) for interval, bars in sources.items() if bars is not None and not bars.empty}
+    pyramid, coverage = {}, {}
+    for level in order:
+        usable = [interval for interval in order[:order.index(level) + 1] if interval in sources]
+        pieces, covered_from = [], None
+        for i, interval in enumerate(usable):
+            bars = sources[interval]
+            candles = resample_ohlcv(bars, level)
+            if i < len(usable) - 1:
+                candles = candles[candles.index >= bars.index[0]]
+            if covered_from is not None:
+                candles = candles[candles.index < covered_from]
+            if candles.empty:
+                continue
+            pieces.append(candles)
+            covered_from = candles.index[0]
+            coverage[level] = min(coverage.get(level, bars.index[0]), bars.index[0])
+        if pieces:
+            pyramid[level] = pd.concat(pieces).sort_index()
+    return pyramid, coverage
+
+
+def write_pyramid(pyramid, coverage, path, fresh_until):
+    os.makedirs(path, exist_ok=True)
+    for level, candles in pyramid.items():
+        # 'Datetime', not 'Date': stored tables truncate a 'Date' column to the day
+        write_table(candles.rename_axis('Datetime').reset_index(), os.path.join(path, f"{level}.csv"))
+    index = {
+        'levels': {level: coverage[level].isoformat() for level in pyramid},
+        'fresh_until': pd.Timestamp(fresh_until).isoformat(),
+    }
+    with open(os.path.join(path, 'index.json.tmp'), 'w') as f:
+        json.dump(index, f)
+    os.replace(os.path.join(path, 'index.json.tmp'), os.path.join(path, 'index.json'))
+
+
+def read_index(path):
+    index_path = os.path.join(path, 'index.json')
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path) as f:
+        return json.load(f)
+
+
+class OHLCPyramid:
+    # Read-only view of one ticker's pyramid; every level is loaded once and windows are
+    # sliced from its sorted index
+    def __init__(self, path):
+        index = read_index(path)
+        if index is None:
+            raise FileNotFoundError(f"No OHLC pyramid found at {path}")
+        self.fresh_until = pd.Timestamp(index['fresh_until'])
+        self.coverage = {level: pd.Timestamp(start) for level, start in index['levels'].items()}
+        self.levels = {}
+        for level in LEVELS:
+            if level in self.coverage:
+                candles = read_table(os.path.join(path, f"{level}.csv"))
+                self.levels[level] = candles.set_index(pd.to_datetime(candles.pop('Datetime')))
+
+    @property
+    def start(self):
+        return min(self.coverage.values()) if self.coverage else None
+
+    def window(self, level, start=None, end=None):
+        # Candles of `level` with bucket start in [start, end]
+        candles = self.levels[level]
+        lo = candles.index.searchsorted(pd.Timestamp(start), side='left') if start is not None else 0
+        hi = candles.index.searchsorted(pd.Timestamp(end), side='right') if end is not None else len(candles)
+        return candles.iloc[lo:hi]
+
+    def pick_level(self, start=None, end=None, max_candles=MAX_CANDLES):
+        # Finest level that covers [start, end] in at most max_candles candles, else the coarsest
+        needed = pd.Timestamp(start) if start is not None else self.start
+        available = [level for level in LEVELS if level in self.levels]
+        for level in available:
+            if self.coverage[level] <= needed and len(self.window(level, start, end)) <= max_candles:
+                return level
+        return available[-1] if available else None
+
+    def candles(self, start=None, end=None, max_candles=MAX_CANDLES):
+        # (level, candles) to draw for the visible range [start, end]
+        level = self.pick_level(start, end, max_candles)
+        if level is None:
+            return None, pd.DataFrame(columns=list(OHLCV))
+        return level, self.window(level, start, end)
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+# Long-only, fully invested portfolios for a selection of tickers. Every candidate portfolio
+# is a row of a weight matrix, so sampling and solving run as batched matrix products
+# rather than per-portfolio Python loops.
+FRONTIER_POINTS = 60
+SAMPLE_PORTFOLIOS = 500
+SOLVER_ITERATIONS = 300
+SOLVER_TOLERANCE = 1e-5
+SHARPE_ITERATIONS = 500
+
+
+def project_simplex(weights):
+    # Euclidean projection of each row onto {w >= 0, sum(w) = 1} (sort-based, all rows at once)
+    n_rows, n_cols = weights.shape
+    ordered = -np.sort(-weights, axis=1)
+    excess = np.cumsum(ordered, axis=1) - 1
+    support = ordered - excess / np.arange(1, n_cols + 1) > 0
+    last = n_cols - 1 - np.argmax(support[:, ::-1], axis=1)
+    theta = excess[np.arange(n_rows), last] / (last + 1)
+    return np.maximum(weights - theta[:, None], 0)
+
+
+def solve_portfolios(mu, cov, risk_aversion, iterations=SOLVER_ITERATIONS, tol=SOLVER_TOLERANCE):
+    # Minimize a*w'Σw - w'μ for each risk aversion a (np.inf gives minimum variance), using
+    # accelerated projected gradient on all rows together, until no weight moves by more than
+    # `tol` in an iteration. A row's momentum restarts whenever it points uphill, which keeps
+    # the ill-conditioned rows from oscillating. Returns a (len(a), n) weight matrix.
+    risk_aversion = np.asarray(risk_aversion, dtype=np.float64)
+    min_variance = np.isinf(risk_aversion)
+    quad = np.where(min_variance, 1.0, risk_aversion)[:, None]
+    lin = np.where(min_variance, 0.0, 1.0)[:, None]
+    # Step 1/L per row, with L the gradient's Lipschitz constant (largest eigenvalue of Σ)
+    step = 1 / (2 * quad * max(np.linalg.eigvalsh(cov)[-1], 1e-12))
+
+    n = len(mu)
+    weights = np.full((len(risk_aversion), n), 1 / n)
+    momentum, t = weights, np.ones((len(risk_aversion), 1))
+    for _ in range(iterations):
+        gradient = 2 * quad * (momentum @ cov) - lin * mu
+        updated = project_simplex(momentum - step * gradient)
+        change = updated - weights
+        restart = ((momentum - updated) * change).sum(axis=1, keepdims=True) > 0
+        t = np.where(restart, 1.0, t)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        momentum = updated + np.where(restart, 0.0, (t - 1) / t_next) * change
+        weights, t = updated, t_next
+        if np.abs(change).max() < tol:
+            break
+    return weights
+
+
+def sharpe_ratio(weights, mu, cov, risk_free_rate=0.0):
+    returns, volatility = portfolio_stats(np.atleast_2d(weights), mu, cov)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(volatility > 0, (returns - risk_free_rate) / volatility, -np.inf)
+
+
+def solve_max_sharpe(mu, cov, start, risk_free_rate=0.0, iterations=SHARPE_ITERATIONS, tol=1e-8):
+    # Maximize (w'μ - r)/sqrt(w'Σw) over the simplex by projected gradient ascent from
+    # `start`, with a backtracking step, until an iteration improves the ratio by less than
+    # `tol` relative to it. The ratio is pseudo-concave where the excess return is positive,
+    # so the ascent reaches the tangency portfolio from any such start.
+    excess = mu - risk_free_rate
+    weights = np.asarray(start, dtype=np.float64)
+    sharpe = sharpe_ratio(weights, mu, cov, risk_free_rate)[0]
+    step = 1.0
+    for _ in range(iterations):
+        cov_w = cov @ weights
+        variance = weights @ cov_w
+        if variance <= 0:
+            break
+        volatility = np.sqrt(variance)
+        gradient = excess / volatility - (weights @ excess) * cov_w / (variance * volatility)
+        while step > 1e-12:
+            candidate = project_simplex((weights + step * gradient)[None, :])[0]
+            candidate_sharpe = sharpe_ratio(candidate, mu, cov, risk_free_rate)[0]
+            if candidate_sharpe > sharpe:
+                break
+            step /= 2
+        else:
+            break
+        converged = candidate_sharpe - sharpe < tol * abs(sharpe)
+        weights, sharpe, step = candidate, candidate_sharpe, step * 2
+        if converged:
+            break
+    return weights
+
+
+def sample_portfolios(n_assets, count=SAMPLE_PORTFOLIOS, seed=0):
+    # Random long-only weights, spread evenly over the simplex (Dirichlet(1))
+    return np.random.default_rng(seed).dirichlet(np.ones(n_assets), size=count)
+
+
+def portfolio_stats(weights, mu, cov):
+    # Expected return and volatility of every weight row
+    returns = weights @ mu
+    volatility = np.sqrt(np.maximum(((weights @ cov) * weights).sum(axis=1), 0))
+    return returns, volatility
+
+
+def efficient_frontier(tickers, mu, cov, risk_free_rate=0.0, points=FRONTIER_POINTS, samples=SAMPLE_PORTFOLIOS):
+    # Frontier, sampled cloud, minimum-variance and max-Sharpe portfolios for annualized
+    # expected returns `mu` and covariance `cov` (both as fractions).
+    mu = np.asarray(mu, dtype=np.float64)
+    cov = np.asarray(cov, dtype=np.float64)
+    scale = max(np.abs(mu).max(), 1e-12) / max(np.diag(cov).max(), 1e-12)
+    # Risk aversions from almost return-only to pure minimum variance
+    risk_aversion = np.append(scale * np.logspace(-2, 3, points - 1), np.inf)
+    frontier_weights = solve_portfolios(mu, cov, risk_aversion)
+    frontier_returns, frontier_volatility = portfolio_stats(frontier_weights, mu, cov)
+
+    sampled = sample_portfolios(len(mu), samples)
+    sample_returns, sample_volatility = portfolio_stats(sampled, mu, cov)
+    sample_sharpe = sharpe_ratio(sampled, mu, cov, risk_free_rate)
+
+    # The tangency portfolio is solved directly, starting from the best frontier point
+    start = frontier_weights[np.argmax(sharpe_ratio(frontier_weights, mu, cov, risk_free_rate))]
+    max_sharpe = solve_max_sharpe(mu, cov, start, risk_free_rate)
+    (max_sharpe_return,), (max_sharpe_volatility,) = portfolio_stats(max_sharpe[None, :], mu, cov)
+
+    order = np.argsort(frontier_volatility)
+    return {
+        'frontier': pd.DataFrame({'Volatility': frontier_volatility[order], 'Return': frontier_returns[order]}),
+        'samples': pd.DataFrame({'Volatility': sample_volatility, 'Return': sample_returns, 'Sharpe': sample_sharpe}),
+        'min_variance': pd.Series(frontier_weights[-1], index=tickers),
+        'max_sharpe': pd.Series(max_sharpe, index=tickers),
+        'max_sharpe_stats': {'Return': max_sharpe_return, 'Volatility': max_sharpe_volatility,
+                             'Sharpe': sharpe_ratio(max_sharpe, mu, cov, risk_free_rate)[0]},
+        'min_variance_stats': {'Return': frontier_returns[-1], 'Volatility': frontier_volatility[-1]},
+    }
@@ -0,0 +1,185 @@
+import random
+import time
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_PROVIDER, SYNTHETIC_ERROR_RATE, SYNTHETIC_LATENCY_SECONDS
+
+
+class DataProvider(ABC):
+    # Interface every market-data source implements. `history` returns a yfinance-style frame
+    # (tz-aware DatetimeIndex, Open/High/Low/Close/Volume columns); `info` returns a dict
+    # with yfinance `info` keys. `intervals` lists the bar intervals the source offers
+    # (None: any interval the caller asks for).
+    intervals = None
+
+    @abstractmethod
+    def history(self, ticker, period=None, start=None, end=None, interval="1d"):
+        ...
+
+    @abstractmethod
+    def info(self, ticker):
+        ...
+
+    def supports_interval(self, interval):
+        return self.intervals is None or interval in self.intervals
+
+    def download(self, ticker, period="1y", interval="1d"):
+        return self.history(ticker, period=period, interval=interval)
+
+    def download_many(self, tickers, period="1y", interval="1d"):
+        # {ticker: frame} for several tickers; sources with a multi-ticker endpoint override
+        # this to fetch them in one request. Tickers without data may be left out.
+        return {ticker: self.download(ticker, period=period, interval=interval) for ticker in tickers}
+
+
+class YFinanceProvider(DataProvider):
+    # yfinance is imported on first use, so the synthetic provider and apps that only read
+    # cached data never load it
+    def history(self, ticker, period=None, start=None, end=None, interval="1d"):
+        import yfinance as yf
+        if start is None and end is None:
+            return yf.Ticker(ticker).history(period=period or "1mo", interval=interval)
+        return yf.Ticker(ticker).history(start=start, end=end, interval=interval)
+
+    def info(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker).info or {}
+
+    def download(self, ticker, period="1y", interval="1d"):
+        return self.download_many([ticker], period=period, interval=interval).get(ticker, pd.DataFrame())
+
+    def download_many(self, tickers, period="1y", interval="1d"):
+        # One request for all tickers; columns come back as (ticker, field)
+        import yfinance as yf
+        data = yf.download(tickers, period=period, interval=interval, group_by='ticker', progress=False)
+        if not isinstance(data.columns, pd.MultiIndex):
+            # Older yfinance returns flat columns for a single ticker
+            return {tickers[0]: data} if len(tickers) == 1 and not data.empty else {}
+        available = set(data.columns.get_level_values(0)) if not data.empty else set()
+        return {ticker: data[ticker].dropna(how='all') for ticker in tickers if ticker in available}
+
+
+SECTORS = ['Energy', 'Industrials', 'Financial Services', 'Consumer Cyclical',
+           'Communication Services', 'Technology', 'Healthcare', 'Utilities']
+
+# Synthetic series all start here, so any window of a ticker is the same on every call
+SYNTHETIC_EPOCH = pd.Timestamp('2000-01-03')
+
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1), '5d': pd.DateOffset(days=5), '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3), '6mo': pd.DateOffset(months=6), '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2), '5y': pd.DateOffset(years=5), '10y': pd.DateOffset(years=10),
+}
+
+
+def period_start(period, today=None):
+    today = pd.Timestamp(today or datetime.today()).normalize()
+    if period in (None, 'max'):
+        return SYNTHETIC_EPOCH
+    if period == 'ytd':
+        return pd.Timestamp(year=today.year, month=1, day=1)
+    return today - PERIOD_OFFSETS[period]
+
+
+def period_since(last_date, default='max'):
+    # Shortest provider period that reaches back to `last_date`, else `default`. '1d' is
+    # skipped: providers read it as the latest session only, which would miss the day before.
+    day = pd.Timestamp(last_date)
+    day = (day.tz_localize(None) if day.tz is not None else day).normalize()
+    for period in PERIOD_OFFSETS:
+        if period != '1d' and period_start(period) <= day:
+            return period
+    return default
+
+
+class SyntheticProvider(DataProvider):
+    # Deterministic offline market: every ticker gets a seeded random-walk OHLCV series on
+    # business days since SYNTHETIC_EPOCH and a matching `info` dict. `latency` (seconds)
+    # and `error_rate` (0-1) are applied per call to exercise the rate-limit/retry paths.
+    intervals = ("1d",)
+
+    def __init__(self, latency=SYNTHETIC_LATENCY_SECONDS, error_rate=SYNTHETIC_ERROR_RATE, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self._faults = random.Random()
+
+    def _simulate_call(self):
+        if self.latency:
+            time.sleep(self.latency * self._faults.uniform(0.5, 1.5))
+        if self.error_rate and self._faults.random() < self.error_rate:
+            raise RuntimeError("Synthetic provider error (injected)")
+
+    def _rng(self, ticker, stream):
+        return np.random.default_rng([self.seed, zlib.crc32(ticker.encode()), stream])
+
+    def _bars(self, ticker, end):
+        # Each field draws from its own stream, so a longer span only appends bars
+        dates = pd.bdate_range(SYNTHETIC_EPOCH, end - pd.Timedelta(days=1))
+        n = len(dates)
+        params = self._rng(ticker, 0)
+        drift, vol, base = params.uniform(-0.0002, 0.0006), params.uniform(0.01, 0.03), params.uniform(20, 300)
+        close = base * np.exp(np.cumsum(self._rng(ticker, 1).normal(drift, vol, n)))
+        open_ = np.concatenate([[base], close[:-1]]) * (1 + self._rng(ticker, 2).normal(0, vol / 4, n))
+        high = np.maximum(open_, close) * (1 + np.abs(self._rng(ticker, 3).normal(0, vol / 2, n)))
+        low = np.minimum(open_, close) * (1 - np.abs(self._rng(ticker, 4).normal(0, vol / 2, n)))
+        volume = np.round(self._rng(ticker, 5).lognormal(15, 0.5, n))
+        return pd.DataFrame({
+            'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume,
+            'Dividends': 0.0, 'Stock Splits': 0.0,
+        }, index=dates.tz_localize('America/New_York').rename('Date'))
+
+    def history(self, ticker, period=None, start=None, end=None, interval="1d"):
+        self._simulate_call()
+        return self._history(ticker, period, start, end, interval)
+
+    def download_many(self, tickers, period="1y", interval="1d"):
+        # Latency and errors are applied once per batch, like one multi-ticker request
+        self._simulate_call()
+        return {ticker: self._history(ticker, period, None, None, interval) for ticker in tickers}
+
+    def _history(self, ticker, period, start, end, interval):
+        if interval != "1d":
+            raise ValueError(f"Synthetic provider only generates daily bars, not {interval}")
+        today = pd.Timestamp(datetime.today()).normalize()
+        end = pd.Timestamp(end).normalize() if end is not None else today + pd.Timedelta(days=1)
+        start = pd.Timestamp(start).normalize() if start is not None else period_start(period, today)
+        bars = self._bars(ticker, end)
+        return bars[bars.index.tz_localize(None) >= start]
+
+    def info(self, ticker):
+        self._simulate_call()
+        rng = self._rng(ticker, 6)
+        closes = self._bars(ticker, pd.Timestamp(datetime.today()).normalize())['Close']
+        return {
+            'symbol': ticker,
+            'sector': SECTORS[zlib.crc32(ticker.encode()) % len(SECTORS)],
+            'trailingPE': float(rng.uniform(5, 40)),
+            'marketCap': int(closes.iloc[-1] * rng.uniform(1e8, 5e9)),
+            'dividendYield': float(rng.uniform(0, 0.06)),
+            '52WeekChange': float(closes.iloc[-1] / closes.iloc[-253] - 1),
+            'debtToEquity': float(rng.uniform(10, 300)),
+            'revenueGrowth': float(rng.uniform(-0.2, 0.3)),
+            'profitMargins': float(rng.uniform(-0.05, 0.3)),
+        }
+
+
+_provider = None
+
+
+def get_provider():
+    # Provider selected by config.DATA_PROVIDER ('yfinance' or 'synthetic'), created once per process
+    global _provider
+    if _provider is None:
+        _provider = SyntheticProvider() if DATA_PROVIDER == 'synthetic' else YFinanceProvider()
+    return _provider
+
+
+def set_provider(provider):
+    global _provider
+    _provider = provider
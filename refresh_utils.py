@@ -0,0 +1,121 @@
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+from config import FETCH_BATCH_SIZE, INCREMENTAL_REFRESH
+from data_utils import PRICE_FIELDS, TIME_PERIOD_DAYS, derive_time_periods, history_to_frame
+from providers import get_provider, period_since
+from storage_utils import read_table, to_typed, write_table
+
+logger = logging.getLogger(__name__)
+
+
+def stored_days(df):
+    # Dates are stored either as 'YYYY-MM-DD' or as full timestamps; the day is enough here
+    dates = df['Date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates.astype(str).str[:10])
+    elif getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.dt.normalize()
+
+
+def last_stored_dates(df, key_col):
+    return stored_days(df).groupby(df[key_col], observed=True).max()
+
+
+def fetch_bars_since(last_dates, batch_size=FETCH_BATCH_SIZE):
+    # {ticker: bars from its last stored one onwards} in multi-ticker requests of
+    # `batch_size`. The last stored bar is fetched again because it may have been stored
+    # before its session closed; callers keep the new copy. Failed batches are left out.
+    today = pd.Timestamp(datetime.today()).normalize()
+    last_dates = last_dates[last_dates <= today]
+    if last_dates.empty:
+        return {}
+
+    provider = get_provider()
+    period = period_since(last_dates.min())
+    tickers = list(last_dates.index)
+    bars = {}
+    for i in range(0, len(tickers), batch_size):
+        chunk = tickers[i:i + batch_size]
+        try:
+            fetched = provider.download_many(chunk, period=period)
+        except Exception as e:
+            logger.warning("Error refreshing data for %s: %s", ', '.join(chunk), e)
+            continue
+        for ticker, hist in fetched.items():
+            # The period reaches back to the oldest last bar of the batch
+            days = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+            hist = hist[days.normalize() >= last_dates[ticker]]
+            if not hist.empty:
+                bars[ticker] = hist
+    return bars
+
+
+def bars_to_rows(hist, template, date_format='%Y-%m-%d'):
+    # New rows in the stored file's schema: prices from the bars, every other
+    # column (symbol, sector, fundamentals, period label) copied from the last stored row
+    constants = template.drop(['Date'] + PRICE_FIELDS, errors='ignore').to_dict()
+    return history_to_frame(hist, constants, date_format=date_format, columns=list(template.index))
+
+
+def _unchanged(stored, new_rows):
+    # True when new_rows only repeat stored bars: same days and the same typed prices
+    new_rows = to_typed(new_rows)
+    fields = [field for field in PRICE_FIELDS if field in stored and field in new_rows]
+    return (stored_days(stored).tolist() == stored_days(new_rows).tolist()
+            and stored[fields].reset_index(drop=True).equals(new_rows[fields].reset_index(drop=True)))
+
+
+def refresh_table(path, key_col, label=None, date_format='%Y-%m-%d', keep_days=None):
+    # Append only the bars missing since the last stored Date for each ticker, replacing the
+    # stored bars the fetch returns again (the last one may have been stored unfinished).
+    # `label` restricts the update to rows of one 'Time Period' (the widest window). Those
+    # rows are trimmed to the `keep_days` before the day after the latest bar, so the table
+    # does not grow with every refresh. It is rewritten only when a bar was added or changed.
+    df = read_table(path)
+    base = df[df['Time Period'] == label] if label else df
+    if base.empty:
+        return df
+
+    new_frames, replaced = [], []
+    days = stored_days(base)
+    # Keep the stored ticker order for the appended rows
+    last_dates = last_stored_dates(base, key_col).reindex(list(base[key_col].unique()))
+    fetched = fetch_bars_since(last_dates)
+    for ticker in last_dates.index:
+        if ticker not in fetched:
+            continue
+        stored = base[base[key_col] == ticker]
+        new_rows = bars_to_rows(fetched[ticker], stored.iloc[-1], date_format)
+        refetched = days.loc[stored.index] >= stored_days(new_rows).min()
+        if _unchanged(stored[refetched], new_rows):
+            continue
+        replaced.extend(stored.index[refetched])
+        new_frames.append(new_rows)
+
+    if not new_frames:
+        return df
+
+    df = to_typed(pd.concat([df.drop(index=replaced)] + new_frames, ignore_index=True))
+    if keep_days is not None:
+        in_base = df['Time Period'] == label if label else pd.Series(True, index=df.index)
+        days = stored_days(df)
+        cutoff = days[in_base].max() + pd.Timedelta(days=1) - pd.Timedelta(days=keep_days)
+        df = df[~(in_base & (days < cutoff))].reset_index(drop=True)
+    write_table(df, path)
+    logger.info("Appended %d new bars to %s", sum(len(f) for f in new_frames) - len(replaced), path)
+    return df
+
+
+def load_periods(path, key_col, period_days=TIME_PERIOD_DAYS):
+    # A stored table holding only the widest period, topped up when INCREMENTAL_REFRESH is
+    # on, and expanded into one slice per named period
+    widest, days = next(iter(period_days.items()))
+    if INCREMENTAL_REFRESH:
+        df = refresh_table(path, key_col, label=widest, keep_days=days)
+    else:
+        df = read_table(path)
+    return derive_time_periods(df, period_days)
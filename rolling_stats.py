@@ -0,0 +1,131 @@
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+# Streaming statistics for series that grow one bar at a time. Each update is O(1) per
+# window, so appending new bars never rescans the stored history. State is JSON so it can
+# be persisted next to the table it describes and resumed by the next process.
+
+
+class RollingStats:
+    # Rolling mean/std over fixed windows and exponentially weighted mean/std over spans for
+    # one series. Windows use Welford updates that also remove the value leaving the window;
+    # like pandas' rolling(window), they report NaN until the window is full. EWMA and its std
+    # match pandas' ewm(span, adjust=False).mean() and .std(), which is bias-corrected.
+    def __init__(self, windows=(), spans=()):
+        self.windows = {int(w): {'values': deque(maxlen=int(w)), 'mean': 0.0, 'm2': 0.0} for w in windows}
+        # 'w2' is the sum of squared observation weights, for the std's bias correction
+        self.spans = {int(s): {'mean': None, 'var': 0.0, 'w2': 1.0} for s in spans}
+
+    def update(self, x):
+        x = float(x)
+        for window, state in self.windows.items():
+            values = state['values']
+            old_mean = state['mean']
+            if len(values) == window:
+                old = values[0]
+                values.append(x)
+                state['mean'] += (x - old) / window
+                state['m2'] += (x - old) * (x - state['mean'] + old - old_mean)
+            else:
+                values.append(x)
+                state['mean'] += (x - old_mean) / len(values)
+                state['m2'] += (x - old_mean) * (x - state['mean'])
+
+        for span, state in self.spans.items():
+            if state['mean'] is None:
+                state['mean'] = x
+                continue
+            alpha = 2 / (span + 1)
+            diff = x - state['mean']
+            state['mean'] += alpha * diff
+            state['var'] = (1 - alpha) * (state['var'] + alpha * diff * diff)
+            state['w2'] = (1 - alpha) ** 2 * state['w2'] + alpha ** 2
+        return self
+
+    def mean(self, window):
+        state = self.windows[window]
+        return state['mean'] if len(state['values']) == window else math.nan
+
+    def std(self, window):
+        # Sample standard deviation (ddof=1), as pandas computes it
+        state = self.windows[window]
+        if len(state['values']) < window or window < 2:
+            return math.nan
+        return math.sqrt(max(state['m2'], 0.0) / (window - 1))
+
+    def ewma(self, span):
+        mean = self.spans[span]['mean']
+        return math.nan if mean is None else mean
+
+    def ewm_std(self, span):
+        # Weights sum to 1 with adjust=False, so the unbiased variance is var / (1 - sum of
+        # squared weights); NaN after a single observation, as in pandas
+        state = self.spans[span]
+        if state['mean'] is None or state['w2'] >= 1:
+            return math.nan
+        return math.sqrt(max(state['var'], 0.0) / (1 - state['w2']))
+
+    @classmethod
+    def from_history(cls, values, windows=(), spans=()):
+        # State after `values` (oldest first, NaNs skipped). Windows only need their tail, so
+        # seeding costs O(window) per window; EWMA state runs over the whole series once.
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        stats = cls(windows, spans)
+        for window, state in stats.windows.items():
+            tail = values[-window:]
+            state['values'].extend(tail.tolist())
+            if len(tail):
+                state['mean'] = float(tail.mean())
+                state['m2'] = float(((tail - tail.mean()) ** 2).sum())
+        if stats.spans:
+            ewm_only = cls(spans=stats.spans)
+            for x in values:
+                ewm_only.update(x)
+            stats.spans = ewm_only.spans
+        return stats
+
+    def to_state(self):
+        return {
+            'windows': {str(w): {'values': list(s['values']), 'mean': s['mean'], 'm2': s['m2']}
+                        for w, s in self.windows.items()},
+            'spans': {str(span): dict(s) for span, s in self.spans.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        for window, s in state['windows'].items():
+            stats.windows[int(window)] = {'values': deque(s['values'], maxlen=int(window)),
+                                          'mean': s['mean'], 'm2': s['m2']}
+        # State saved without spans (windows only) has no EWMA entry
+        for span, s in state.get('spans', {}).items():
+            stats.spans[int(span)] = dict(s)
+        return stats
+
+
+def state_path(table_path):
+    # Rolling state lives next to the table it was computed from
+    return os.path.splitext(table_path)[0] + '.rolling.json'
+
+
+def load_states(path):
+    # {key: {'last_date': 'YYYY-MM-DD', 'last_value': float, 'stats': RollingStats}}
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        states = json.load(f)
+    for entry in states.values():
+        entry['stats'] = RollingStats.from_state(entry['stats'])
+    return states
+
+
+def save_states(path, states):
+    serializable = {key: {**entry, 'stats': entry['stats'].to_state()} for key, entry in states.items()}
+    with open(path + '.tmp', 'w') as f:
+        json.dump(serializable, f)
+    os.replace(path + '.tmp', path)
@@ -0,0 +1,115 @@
+import os
+import stat
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Explicit dtypes for the long-format datasets. Repeated labels become categoricals;
+# prices and ratios fit in float32, while Volume and Market Cap need float64 to stay exact.
+# Volatility is float64 too: stored values are merged back next to freshly computed ones
+# (dash_bubble_chart_animation), so a warm start must read back exactly what it wrote.
+CATEGORY_COLUMNS = ['Time Period', 'Symbol', 'Ticker', 'Sector']
+FLOAT32_COLUMNS = [
+    'Open', 'Close', 'High', 'Low', 'Price to Earnings Ratio', 'P/E Ratio', 'PE_Ratio',
+    'Dividend Yield %', '52 Week Change %', '6 Months Change %', '3 Months Change %',
+    'Debt to Equity', 'Revenue Growth', 'Profit Margin', 'YTD Performance',
+    'YTD_Performance', 'Daily Change %',
+]
+FLOAT64_COLUMNS = ['Volume', 'Market Cap', 'Market_Cap', 'Volatility']
+
+# Permissions of a newly written table; mkstemp alone would leave it readable by its owner only
+NEW_FILE_MODE = 0o644
+
+
+def to_typed(df):
+    df = df.copy()
+    if 'Date' in df and not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        # Stored dates are either 'YYYY-MM-DD' or full timestamps with an offset; keep the day
+        df['Date'] = pd.to_datetime(df['Date'].astype(str).str[:10], errors='coerce')
+    for col in FLOAT32_COLUMNS:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    for col in FLOAT64_COLUMNS:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    for col in CATEGORY_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _parquet_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def _use_parquet(csv_path):
+    # The Parquet copy wins unless the CSV was replaced after it was written
+    parquet_path = _parquet_path(csv_path)
+    if not PARQUET_AVAILABLE or not os.path.exists(parquet_path):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+
+
+def _write_atomic(write, path):
+    # Write next to the target and swap it in, so readers never see a partial file. mkstemp
+    # creates the file as 0600, so it takes the target's mode (or NEW_FILE_MODE) first.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = NEW_FILE_MODE
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def table_exists(csv_path):
+    return _use_parquet(csv_path) or os.path.exists(csv_path)
+
+
+def read_table(csv_path, columns=None):
+    # Load a dataset by its CSV name, preferring the typed Parquet copy. Only `columns`
+    # are read when given. A CSV without a Parquet copy is converted on first load.
+    if _use_parquet(csv_path):
+        return pd.read_parquet(_parquet_path(csv_path), columns=columns)
+
+    df = to_typed(pd.read_csv(csv_path))
+    if PARQUET_AVAILABLE:
+        _write_atomic(lambda tmp: df.to_parquet(tmp, index=False), _parquet_path(csv_path))
+    return df[columns] if columns is not None else df
+
+
+def write_table(df, csv_path):
+    df = to_typed(df)
+    if PARQUET_AVAILABLE:
+        _write_atomic(lambda tmp: df.to_parquet(tmp, index=False), _parquet_path(csv_path))
+    else:
+        _write_atomic(lambda tmp: df.to_csv(tmp, index=False), csv_path)
+
+
+def export_csv(csv_path):
+    # CSV stays available as an export of the stored table
+    df = read_table(csv_path)
+    _write_atomic(lambda tmp: df.to_csv(tmp, index=False, date_format='%Y-%m-%d'), csv_path)
+
+
+if __name__ == '__main__':
+    # Write stored tables back out as CSV, e.g. `python storage_utils.py stock_trend_data.csv`
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export stored tables as CSV")
+    parser.add_argument('tables', nargs='+', help="table names as CSV paths")
+    for csv_path in parser.parse_args().tables:
+        export_csv(csv_path)
+        print(f"Exported {csv_path}")
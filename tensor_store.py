@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# On-disk layout: <path>/ohlcv.npy is a float32 array of shape (ticker, date, field), missing
+# bars are NaN; <path>/index.json holds the ticker, date and field labels for each axis.
+# Volumes above 2**24 lose their last digits in float32, which charts never show.
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DEFAULT_PATH = 'ohlcv_store'
+
+
+def _naive_dates(index):
+    return (index.tz_localize(None) if index.tz is not None else index).normalize()
+
+
+def write_tensor_store(histories, path=DEFAULT_PATH, fields=FIELDS):
+    # Build the store from {ticker: yfinance history}. The array is filled through a
+    # memmap so a large universe never has to fit in memory at once.
+    os.makedirs(path, exist_ok=True)
+    histories = {ticker: hist for ticker, hist in histories.items() if not hist.empty}
+    tickers = list(histories)
+    dates = pd.DatetimeIndex(sorted(set().union(*(_naive_dates(h.index) for h in histories.values()))))
+
+    # Temporary files are unique to this call, so a concurrent build cannot write into them
+    data_path = os.path.join(path, 'ohlcv.npy')
+    fd, tmp_data_path = tempfile.mkstemp(dir=path, prefix='ohlcv.', suffix='.tmp.npy')
+    os.close(fd)
+    data = np.lib.format.open_memmap(tmp_data_path, mode='w+', dtype=np.float32,
+                                     shape=(len(tickers), len(dates), len(fields)))
+    data[:] = np.nan
+    for i, ticker in enumerate(tickers):
+        hist = histories[ticker]
+        positions = dates.get_indexer(_naive_dates(hist.index))
+        data[i, positions, :] = hist[fields].to_numpy(dtype=np.float32)
+    data.flush()
+    del data
+
+    index = {
+        'tickers': tickers,
+        'dates': [d.strftime('%Y-%m-%d') for d in dates],
+        'fields': list(fields),
+        'built': datetime.today().strftime('%Y-%m-%d'),
+    }
+    index_path = os.path.join(path, 'index.json')
+    fd, tmp_index_path = tempfile.mkstemp(dir=path, prefix='index.', suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(index, f)
+
+    # mkstemp files are private to their owner; the store is read by every app process.
+    # Processes that already mapped the old array keep reading it until they reopen.
+    os.chmod(tmp_data_path, 0o644)
+    os.chmod(tmp_index_path, 0o644)
+    os.replace(tmp_data_path, data_path)
+    os.replace(tmp_index_path, index_path)
+
+
+def read_index(path=DEFAULT_PATH):
+    index_path = os.path.join(path, 'index.json')
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path) as f:
+        return json.load(f)
+
+
+class TensorStore:
+    # Read-only, memory-mapped view of the store. Opening only reads the index; slices of
+    # one ticker (and field-wise slices over all tickers) are views into the shared pages.
+    def __init__(self, path=DEFAULT_PATH):
+        index = read_index(path)
+        if index is None:
+            raise FileNotFoundError(f"No tensor store found at {path}")
+        self.tickers = index['tickers']
+        self.dates = pd.DatetimeIndex(index['dates'])
+        self.fields = index['fields']
+        self.built = index['built']
+        self.data = np.load(os.path.join(path, 'ohlcv.npy'), mmap_mode='r')
+        if self.data.shape != (len(self.tickers), len(self.dates), len(self.fields)):
+            raise ValueError(f"Tensor store at {path} is being rebuilt; index and data do not match")
+        self._ticker_pos = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def _date_slice(self, start=None, end=None):
+        lo = self.dates.searchsorted(pd.Timestamp(start).normalize()) if start is not None else 0
+        hi = self.dates.searchsorted(pd.Timestamp(end).normalize()) if end is not None else len(self.dates)
+        return slice(lo, hi)
+
+    def get(self, ticker, field=None, start=None, end=None):
+        # (date, field) bars for one ticker in [start, end), or one field as a 1-D array
+        bars = self.data[self._ticker_pos[ticker], self._date_slice(start, end)]
+        return bars if field is None else bars[:, self.fields.index(field)]
+
+    def field_matrix(self, field, tickers=None, start=None, end=None):
+        # (ticker, date) matrix of one field; a view when all tickers are requested
+        matrix = self.data[:, self._date_slice(start, end), self.fields.index(field)]
+        if tickers is None:
+            return matrix
+        return matrix[[self._ticker_pos[ticker] for ticker in tickers]]
+
+    def to_frame(self, field, tickers=None, start=None, end=None):
+        # Wide DataFrame (dates x tickers) for pandas-based callers
+        date_slice = self._date_slice(start, end)
+        return pd.DataFrame(
+            self.field_matrix(field, tickers, start, end).T,
+            index=self.dates[date_slice],
+            columns=tickers if tickers is not None else self.tickers,
+        )
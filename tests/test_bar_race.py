@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from bar_race import build_bar_race, race_frames, read_bar_race, write_bar_race
+
+
+def _values(n_frames=30, n_tickers=25, seed=4):
+    values = np.random.default_rng(seed).uniform(1, 100, (n_frames, n_tickers))
+    values[0, :20] = np.nan
+    return pd.DataFrame(values, columns=[f"T{i}" for i in range(n_tickers)])
+
+
+def test_frames_hold_the_top_n_smallest_first():
+    values = _values()
+
+    positions, top, top_values = race_frames(values, top_n=5)
+
+    assert positions == list(range(30))
+    for row, columns, shown in zip(values.to_numpy(), top, top_values):
+        expected = np.sort(row[~np.isnan(row)])[-5:]
+        np.testing.assert_array_equal(shown, expected)
+        np.testing.assert_array_equal(row[columns], shown)
+
+
+def test_step_always_ends_on_the_last_row():
+    positions, _, _ = race_frames(_values(), step=7)
+
+    assert positions == [0, 7, 14, 21, 28, 29]
+
+
+def test_figure_is_capped_and_keeps_colours():
+    values = _values()
+    labels = [f"day {i}" for i in range(len(values))]
+
+    figure = build_bar_race(values, labels, top_n=4, max_frames=10)
+
+    frames = figure['frames']
+    assert len(frames) <= 11
+    assert frames[0]['name'] == 'day 0' and frames[-1]['name'] == 'day 29'
+    assert all(len(frame['data'][0]['y']) == 4 for frame in frames)
+    colours = {}
+    for frame in frames:
+        for ticker, colour in zip(frame['data'][0]['y'], frame['data'][0]['marker']['color']):
+            assert colours.setdefault(ticker, colour) == colour
+    assert [step['label'] for step in figure['layout']['sliders'][0]['steps']] == [f['name'] for f in frames]
+
+
+def test_write_and_read_round_trip(tmp_path):
+    figure = build_bar_race(_values(), [str(i) for i in range(30)])
+    path = str(tmp_path / 'races' / 'price.json')
+
+    assert read_bar_race(path) is None
+    write_bar_race(figure, path)
+    assert read_bar_race(path) == figure
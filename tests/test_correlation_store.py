@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation_store import CorrelationStore, ledoit_wolf_shrinkage, standardized_returns, write_correlation_store
+from providers import SyntheticProvider
+
+
+@pytest.fixture
+def closes():
+    provider = SyntheticProvider()
+    tickers = [f"SYN{i:02d}" for i in range(12)]
+    frame = pd.DataFrame({ticker: provider.history(ticker, period='1y')['Close'] for ticker in tickers})
+    # One ticker tracks another closely, one has no bars at all
+    frame['TWIN'] = frame['SYN00'] * (1 + np.random.default_rng(0).normal(0, 1e-4, len(frame)))
+    frame['NONE'] = np.nan
+    return frame
+
+
+def test_blocks_match_pandas_correlation(closes, tmp_path):
+    path = str(tmp_path / 'corr')
+    write_correlation_store(closes, path, block_size=5)
+
+    store = CorrelationStore(path)
+    tickers = list(closes.columns[:-1])
+    expected = closes[tickers].pct_change(fill_method=None).corr()
+
+    np.testing.assert_allclose(store.tile(tickers).to_numpy(), expected.to_numpy(), atol=1e-5)
+    assert np.isnan(store.tile(['NONE'], tickers).to_numpy()).all()
+
+
+def test_covariance_matches_pandas(closes, tmp_path):
+    path = str(tmp_path / 'corr')
+    write_correlation_store(closes, path)
+    tickers = ['SYN03', 'SYN07', 'TWIN']
+
+    covariance = CorrelationStore(path).covariance(tickers)
+
+    expected = closes[tickers].pct_change(fill_method=None).cov()
+    np.testing.assert_allclose(covariance.to_numpy(), expected.to_numpy(), rtol=1e-4)
+
+
+def test_top_pairs_rank_partners(closes, tmp_path):
+    path = str(tmp_path / 'corr')
+    write_correlation_store(closes, path, block_size=4, top_k=5)
+    store = CorrelationStore(path)
+
+    most = store.top_pairs('SYN00', 3)
+    least = store.top_pairs('SYN00', 3, least=True)
+
+    assert most['Ticker'].iloc[0] == 'TWIN'
+    assert 'SYN00' not in set(most['Ticker']) | set(least['Ticker'])
+    assert most['Correlation'].is_monotonic_decreasing
+    assert least['Correlation'].is_monotonic_increasing
+    assert least['Correlation'].iloc[0] <= most['Correlation'].iloc[-1]
+
+
+def test_shrinkage_scales_off_diagonal(closes, tmp_path):
+    plain, shrunk = str(tmp_path / 'plain'), str(tmp_path / 'shrunk')
+    write_correlation_store(closes, plain)
+    write_correlation_store(closes, shrunk, shrinkage=0.25)
+    tickers = ['SYN01', 'SYN02', 'SYN03']
+
+    tile = CorrelationStore(shrunk).tile(tickers).to_numpy()
+
+    np.testing.assert_allclose(np.diag(tile), 1)
+    off = ~np.eye(3, dtype=bool)
+    np.testing.assert_allclose(tile[off], 0.75 * CorrelationStore(plain).tile(tickers).to_numpy()[off], rtol=1e-5)
+    assert 0 <= ledoit_wolf_shrinkage(standardized_returns(closes)[0]) <= 1
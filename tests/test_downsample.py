@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from downsample import downsample, downsample_window, lttb_indices, point_budget, x_window
+
+
+def _line(n=5000, seed=3):
+    dates = pd.bdate_range('2005-01-03', periods=n)
+    close = 100 + np.random.default_rng(seed).normal(0, 1, n).cumsum()
+    return pd.DataFrame({'Date': dates, 'Close': close})
+
+
+def test_lttb_keeps_endpoints_and_point_count():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 30)
+
+    kept = lttb_indices(x, y, 100)
+
+    assert len(kept) == 100
+    assert kept[0] == 0 and kept[-1] == 999
+    assert (np.diff(kept) > 0).all()
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(1000)
+    y[437] = 50.0
+
+    assert 437 in lttb_indices(np.arange(1000, dtype=np.float64), y, 50)
+
+
+def test_short_series_are_returned_whole():
+    frame = _line(100)
+
+    assert downsample(frame, 'Date', 'Close', 500).equals(frame)
+    assert len(lttb_indices(np.arange(10.0), np.arange(10.0), 2)) == 10
+
+
+def test_downsample_drops_missing_values_and_meets_budget():
+    frame = _line()
+    frame.loc[10:19, 'Close'] = np.nan
+
+    shown = downsample(frame, 'Date', 'Close', 300)
+
+    assert len(shown) == 300
+    assert shown['Close'].notna().all()
+    assert shown['Date'].iloc[0] == frame['Date'].iloc[0]
+    assert shown['Date'].iloc[-1] == frame['Date'].iloc[-1]
+
+
+def test_window_keeps_one_neighbour_on_each_side():
+    frame = _line()
+    start, end = frame['Date'].iloc[1000], frame['Date'].iloc[1100]
+
+    shown = downsample_window(frame, 'Date', 'Close', start, end, width_px=1000)
+
+    assert len(shown) == 103
+    assert shown['Date'].iloc[0] == frame['Date'].iloc[999]
+    assert shown['Date'].iloc[-1] == frame['Date'].iloc[1101]
+    assert len(downsample_window(frame, 'Date', 'Close', width_px=100)) == point_budget(100)
+
+
+def test_x_window_reads_relayout_events():
+    assert x_window({'xaxis.range[0]': 'a', 'xaxis.range[1]': 'b'}) == ('a', 'b')
+    assert x_window({'xaxis.range': ['a', 'b']}) == ('a', 'b')
+    assert x_window({'xaxis.autorange': True}) == (None, None)
+    assert x_window({'yaxis.range[0]': 1}) is None
+    assert x_window(None) is None
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from fetch_scheduler import TokenBucket, run_fetches, summarize_stats
+from providers import SyntheticProvider
+
+
+def test_token_bucket_paces_requests_after_the_burst():
+    bucket = TokenBucket(rate=20, capacity=5)
+    start = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    # 5 tokens are there at once, the other 10 arrive at 20 per second
+    assert time.monotonic() - start == pytest.approx(0.5, abs=0.15)
+
+
+def test_run_fetches_returns_every_ticker():
+    provider = SyntheticProvider()
+    tickers = [f"SYN{i:03d}" for i in range(12)]
+
+    results, stats = run_fetches(tickers, lambda ticker: provider.history(ticker, period='1mo'),
+                                 max_workers=4, rate=1000)
+
+    assert list(results) == tickers
+    assert all(not results[ticker].empty for ticker in tickers)
+    assert {s['source'] for s in stats.values()} == {'api'}
+    assert summarize_stats(stats)['succeeded'] == 12
+
+
+def test_retries_then_falls_back():
+    calls = {}
+
+    def flaky(ticker):
+        calls[ticker] = calls.get(ticker, 0) + 1
+        if ticker == 'DOWN' or calls[ticker] < 2:
+            raise RuntimeError("provider error")
+        return ticker.lower()
+
+    results, stats = run_fetches(['UP', 'DOWN'], flaky, fallback=lambda ticker: 'scraped',
+                                 rate=1000, retries=2, backoff=0.001)
+
+    assert results == {'UP': 'up', 'DOWN': 'scraped'}
+    assert stats['UP']['attempts'] == 2 and stats['UP']['failures'] == 1
+    assert stats['DOWN']['source'] == 'fallback' and stats['DOWN']['failures'] == 3
+    summary = summarize_stats(stats)
+    assert (summary['succeeded'], summary['fallback'], summary['failed']) == (1, 1, 0)
+
+
+def test_failed_tickers_are_left_out_of_results():
+    def failing(ticker):
+        raise RuntimeError("provider error")
+
+    results, stats = run_fetches(['X'], failing, rate=1000, retries=1, backoff=0.001)
+
+    assert results == {}
+    assert stats['X']['source'] == 'failed' and stats['X']['error'] == "provider error"
+    assert summarize_stats(stats)['failures'] == 2
+
@@ -0,0 +1,74 @@
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+import figure_cache
+from figure_cache import cached_figure, data_version, invalidate, normalize_selection
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    invalidate()
+    yield
+    invalidate()
+
+
+def _builder(calls):
+    def build():
+        calls.append(1)
+        return go.Figure(go.Scatter(x=[1, 2], y=[3, len(calls)]))
+    return build
+
+
+def test_repeated_selection_is_built_once():
+    calls = []
+    first = cached_figure('chart', ('A', 'B'), 'v1', _builder(calls))
+    second = cached_figure('chart', ('A', 'B'), 'v1', _builder(calls))
+
+    assert len(calls) == 1
+    assert first == second
+    assert second['data'][0]['y'] == [3, 1]
+
+
+def test_new_data_version_drops_stale_figures():
+    calls = []
+    cached_figure('chart', ('A',), 'v1', _builder(calls))
+    cached_figure('other', ('A',), 'v1', _builder(calls))
+    cached_figure('chart', ('B',), 'v2', _builder(calls))
+    cached_figure('chart', ('A',), 'v1', _builder(calls))
+    cached_figure('other', ('A',), 'v1', _builder(calls))
+
+    assert len(calls) == 4
+
+
+def test_least_recently_used_figures_are_evicted(monkeypatch):
+    monkeypatch.setattr(figure_cache, 'FIGURE_CACHE_ENTRIES', 2)
+    calls = []
+    cached_figure('chart', ('A',), 'v1', _builder(calls))
+    cached_figure('chart', ('B',), 'v1', _builder(calls))
+    cached_figure('chart', ('A',), 'v1', _builder(calls))
+    cached_figure('chart', ('C',), 'v1', _builder(calls))
+
+    cached_figure('chart', ('A',), 'v1', _builder(calls))
+    assert len(calls) == 3
+    cached_figure('chart', ('B',), 'v1', _builder(calls))
+    assert len(calls) == 4
+
+
+def test_invalidate_one_callback():
+    calls = []
+    cached_figure('chart', ('A',), 'v1', _builder(calls))
+    cached_figure('other', ('A',), 'v1', _builder(calls))
+    invalidate('chart')
+    cached_figure('chart', ('A',), 'v1', _builder(calls))
+    cached_figure('other', ('A',), 'v1', _builder(calls))
+
+    assert len(calls) == 3
+
+
+def test_selection_and_version_keys():
+    assert normalize_selection(['B', 'A', 'B', 'Z'], ['A', 'B', 'C']) == ('A', 'B')
+    assert normalize_selection(None, ['A']) == ()
+    frame = pd.DataFrame({'Close': [1.0, 2.0]})
+    assert data_version(frame) == data_version(frame.copy())
+    assert data_version(frame) != data_version(frame.assign(Close=[1.0, 2.5]))
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ohlc_pyramid import OHLCPyramid, build_pyramid, read_index, resample_ohlcv, write_pyramid
+from providers import SyntheticProvider
+
+
+def _minute_bars(days=3):
+    # Regular-session 1-minute bars for the last `days` weekdays
+    sessions = pd.bdate_range('2024-03-04', periods=days)
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(day + pd.Timedelta(hours=9, minutes=30), periods=390, freq='1min') for day in sessions
+    ])).tz_localize('America/New_York')
+    close = 100 + np.random.default_rng(5).normal(0, 0.05, len(index)).cumsum()
+    return pd.DataFrame({'Open': close - 0.01, 'High': close + 0.02, 'Low': close - 0.02,
+                         'Close': close, 'Volume': 100.0}, index=index)
+
+
+def test_resample_aggregates_ohlcv():
+    bars = _minute_bars(1)
+
+    hourly = resample_ohlcv(bars, '1h')
+
+    first = bars.tz_localize(None).loc['2024-03-04 09:30':'2024-03-04 09:59']
+    row = hourly.iloc[0]
+    assert hourly.index[0] == pd.Timestamp('2024-03-04 09:00')
+    assert row['Open'] == first['Open'].iloc[0] and row['Close'] == first['Close'].iloc[-1]
+    assert row['High'] == first['High'].max() and row['Low'] == first['Low'].min()
+    assert row['Volume'] == 3000
+    assert len(hourly) == 7
+
+
+def test_levels_use_the_finest_source_and_coarser_ones_before_it():
+    minutes = _minute_bars()
+    daily = SyntheticProvider().history('AAA', start='2023-06-01', end='2024-03-07')
+
+    pyramid, coverage = build_pyramid({'1m': minutes, '1d': daily})
+
+    assert list(pyramid) == ['1m', '5m', '1h', '1d', '1w']
+    assert coverage['5m'] == minutes.index[0].tz_localize(None)
+    assert coverage['1d'] == daily.index[0].tz_localize(None)
+    days = pyramid['1d']
+    # Days after the first minute bar are rebuilt from minutes; the first day starts mid-bucket
+    # (at the open), so it and earlier days come from the daily source
+    assert days.loc['2024-03-05', 'Volume'] == 390 * 100
+    assert days.loc['2024-03-04', 'Close'] == pytest.approx(daily['Close'].tz_localize(None).loc['2024-03-04'])
+    assert days.index.is_monotonic_increasing and not days.index.has_duplicates
+
+
+def test_empty_sources_give_an_empty_pyramid():
+    assert build_pyramid({'1m': pd.DataFrame(), '1d': None}) == ({}, {})
+
+
+def test_pick_level_fits_the_candle_budget(tmp_path):
+    minutes = _minute_bars()
+    daily = SyntheticProvider().history('AAA', start='2023-06-01', end='2024-03-07')
+    pyramid, coverage = build_pyramid({'1m': minutes, '1d': daily})
+    path = str(tmp_path / 'AAA')
+    write_pyramid(pyramid, coverage, path, pd.Timestamp('2024-03-07 16:30', tz='America/New_York'))
+
+    stored = OHLCPyramid(path)
+
+    assert read_index(path)['fresh_until'].startswith('2024-03-07T16:30')
+    assert stored.candles(pd.Timestamp('2024-03-05 10:00'), pd.Timestamp('2024-03-05 12:00'))[0] == '1m'
+    assert stored.candles(pd.Timestamp('2024-03-04 09:30'), pd.Timestamp('2024-03-06 16:00'))[0] == '5m'
+    level, candles = stored.candles(pd.Timestamp('2023-06-01'), pd.Timestamp('2024-03-06'))
+    assert level == '1d' and len(candles) <= 500
+    assert stored.pick_level(max_candles=10) == '1w'
+
+
+def test_shared_pyramid_skips_intervals_the_provider_lacks(tmp_path, monkeypatch):
+    import diskcache as dc
+
+    import cache_utils
+    import providers
+
+    provider = SyntheticProvider()
+    requested = []
+    monkeypatch.setattr(provider, 'download_many', lambda tickers, period='1y', interval='1d': requested.append(
+        interval) or SyntheticProvider.download_many(provider, tickers, period=period, interval=interval))
+    monkeypatch.setattr(providers, '_provider', provider)
+    monkeypatch.setattr(cache_utils, 'cache', dc.Cache(str(tmp_path / 'cache')))
+    monkeypatch.setattr(cache_utils, 'OHLC_PYRAMID_DIR', str(tmp_path / 'pyramids'))
+
+    pyramid = cache_utils.get_ohlc_pyramid('AAA')
+
+    assert set(requested) == {'1d'}
+    assert list(pyramid.levels) == ['1d', '1w']
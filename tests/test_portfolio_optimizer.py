@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+import pytest
+
+from portfolio_optimizer import efficient_frontier, project_simplex, sharpe_ratio
+
+
+def _market(n, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n, 5))
+    cov = factors @ factors.T * 0.01 + np.diag(rng.uniform(0.02, 0.1, n))
+    return [f"T{i}" for i in range(n)], cov, rng
+
+
+def test_project_simplex_rows_are_weights():
+    weights = project_simplex(np.random.default_rng(1).normal(size=(20, 8)))
+
+    assert (weights >= 0).all()
+    np.testing.assert_allclose(weights.sum(axis=1), 1)
+
+
+def test_max_sharpe_is_the_tangency_portfolio():
+    tickers, cov, rng = _market(40)
+    # With μ - r = k Σ w* for a long-only w*, the tangency portfolio is w* itself
+    target = rng.dirichlet(np.ones(len(tickers)))
+    mu = 0.02 + 3 * cov @ target
+
+    result = efficient_frontier(tickers, mu, cov, risk_free_rate=0.02)
+
+    weights = result['max_sharpe'].to_numpy()
+    np.testing.assert_allclose(weights, target, atol=1e-3)
+    assert result['max_sharpe_stats']['Sharpe'] == pytest.approx(sharpe_ratio(target, mu, cov, 0.02)[0], rel=1e-6)
+    assert result['max_sharpe_stats']['Sharpe'] >= result['samples']['Sharpe'].max()
+
+
+def test_min_variance_matches_closed_form():
+    variances = np.random.default_rng(2).uniform(0.02, 0.1, 30)
+    cov = np.diag(variances)
+
+    result = efficient_frontier([f"T{i}" for i in range(30)], np.full(30, 0.05), cov)
+
+    expected = (1 / variances) / (1 / variances).sum()
+    np.testing.assert_allclose(result['min_variance'].to_numpy(), expected, atol=1e-4)
+
+
+def test_portfolios_are_long_only_and_fully_invested():
+    tickers, cov, rng = _market(50)
+    result = efficient_frontier(tickers, rng.normal(0.08, 0.2, 50), cov)
+
+    for key in ('min_variance', 'max_sharpe'):
+        assert (result[key] >= 0).all()
+        assert result[key].sum() == pytest.approx(1)
+    frontier = result['frontier']
+    assert frontier['Volatility'].is_monotonic_increasing
+    assert frontier['Volatility'].iloc[0] == pytest.approx(result['min_variance_stats']['Volatility'])
+
+
+def test_300_tickers_solve_within_200ms():
+    tickers, cov, rng = _market(300)
+    mu = rng.normal(0.08, 0.2, 300)
+
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        efficient_frontier(tickers, mu, cov)
+        timings.append(time.perf_counter() - start)
+    assert min(timings) < 0.2
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from providers import DataProvider, SyntheticProvider, period_since
+
+
+def test_incomplete_provider_fails_at_construction():
+    class HistoryOnly(DataProvider):
+        def history(self, ticker, period=None, start=None, end=None, interval="1d"):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        HistoryOnly()
+
+
+def test_synthetic_provider_is_deterministic():
+    first = SyntheticProvider().history('AAA', period='1y')
+    second = SyntheticProvider().download_many(['AAA', 'BBB'], period='1y')
+
+    pd.testing.assert_frame_equal(first, second['AAA'])
+    assert not first.equals(second['BBB'].reindex(first.index))
+    assert (first['High'] >= first[['Open', 'Close']].max(axis=1)).all()
+    assert (first['Low'] <= first[['Open', 'Close']].min(axis=1)).all()
+    assert SyntheticProvider().info('AAA') == SyntheticProvider().info('AAA')
+
+
+def test_longer_spans_only_append_bars():
+    provider = SyntheticProvider()
+    short = provider.history('AAA', start='2020-01-01', end='2020-06-01')
+    long = provider.history('AAA', start='2020-01-01', end='2021-01-01')
+
+    pd.testing.assert_frame_equal(short, long.iloc[:len(short)])
+
+
+def test_injected_errors_are_raised():
+    with pytest.raises(RuntimeError):
+        SyntheticProvider(error_rate=1).history('AAA', period='5d')
+
+
+def test_period_since_reaches_back_to_the_date():
+    today = pd.Timestamp.today().normalize()
+
+    assert period_since(today - pd.Timedelta(days=1)) == '5d'
+    assert period_since(today - pd.Timedelta(days=40)) == '3mo'
+    assert period_since(pd.Timestamp('1990-01-01'), '10y') == '10y'
@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+import providers
+import refresh_utils
+from data_utils import history_to_frame
+from providers import SyntheticProvider
+from refresh_utils import load_periods, refresh_table
+from storage_utils import read_table, write_table
+
+TICKERS = ['AAA', 'BBB']
+
+
+@pytest.fixture
+def provider():
+    provider = SyntheticProvider()
+    providers.set_provider(provider)
+    yield provider
+    providers.set_provider(None)
+
+
+def _table(provider, end):
+    frames = [
+        history_to_frame(provider.history(ticker, period='3mo', end=end),
+                         {'Time Period': '1 Year', 'Symbol': ticker, 'Sector': 'Energy'})
+        for ticker in TICKERS
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_refresh_appends_missing_bars(provider, tmp_path):
+    path = str(tmp_path / 'trend.csv')
+    full = _table(provider, end=None)
+    last_day = pd.to_datetime(full['Date']).max()
+    write_table(_table(provider, end=last_day - pd.Timedelta(days=10)), path)
+
+    df = refresh_table(path, 'Symbol', label='1 Year')
+
+    for ticker in TICKERS:
+        expected = full[full['Symbol'] == ticker]
+        refreshed = df[df['Symbol'] == ticker].sort_values('Date')
+        assert pd.to_datetime(refreshed['Date']).tolist() == pd.to_datetime(expected['Date']).tolist()
+        assert refreshed['Close'].to_numpy() == pytest.approx(expected['Close'].to_numpy(), rel=1e-6)
+    assert len(read_table(path)) == len(full)
+
+
+def test_refresh_without_new_bars_skips_the_write(provider, tmp_path, monkeypatch):
+    path = str(tmp_path / 'trend.csv')
+    write_table(_table(provider, end=None), path)
+    calls = []
+    monkeypatch.setattr(provider, 'download_many',
+                        lambda tickers, **kwargs: calls.append(tickers) or SyntheticProvider.download_many(
+                            provider, tickers, **kwargs))
+    monkeypatch.setattr(refresh_utils, 'write_table', lambda *args: pytest.fail("table rewritten"))
+
+    df = refresh_table(path, 'Symbol', label='1 Year')
+
+    assert calls == [TICKERS]
+    assert len(df) == len(read_table(path))
+
+
+def test_refresh_trims_the_widest_window(provider, tmp_path):
+    path = str(tmp_path / 'trend.csv')
+    full = _table(provider, end=None)
+    last_day = pd.to_datetime(full['Date']).max()
+    write_table(_table(provider, end=last_day - pd.Timedelta(days=10)), path)
+
+    df = refresh_table(path, 'Symbol', label='1 Year', keep_days=30)
+
+    days = pd.to_datetime(df['Date'])
+    assert days.min() >= last_day + pd.Timedelta(days=1) - pd.Timedelta(days=30)
+    assert days.max() == last_day
+    assert len(read_table(path)) == len(df)
+
+
+def test_load_periods_slices_the_refreshed_table(provider, tmp_path):
+    path = str(tmp_path / 'sparkline.csv')
+    write_table(_table(provider, end=None), path)
+
+    df = load_periods(path, 'Symbol', {'1 Year': 365, 'Yesterday': 2})
+
+    assert set(df['Time Period']) == {'1 Year', 'Yesterday'}
+    yesterday = df[df['Time Period'] == 'Yesterday']
+    assert pd.to_datetime(yesterday['Date']).nunique() <= 2
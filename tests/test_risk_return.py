@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_utils import TRADING_DAYS, calculate_risk_return, risk_return_metrics
+from providers import SyntheticProvider
+
+TICKERS = ['AAA', 'BBB', 'CCC']
+
+
+@pytest.fixture
+def closes():
+    provider = SyntheticProvider()
+    frame = pd.DataFrame({ticker: provider.history(ticker, period='2y')['Close'] for ticker in TICKERS})
+    frame.index = frame.index.tz_localize(None)
+    # A ticker listed later and one with a gap in its bars
+    frame.iloc[:100, 1] = np.nan
+    frame.iloc[300:305, 2] = np.nan
+    return frame
+
+
+def _expected(series, start):
+    series = series[series.index >= start].dropna()
+    returns = series.pct_change().dropna()
+    total = series.iloc[-1] / series.iloc[0] - 1
+    return {
+        'Return %': total * 100,
+        'Annualized Return %': ((1 + total) ** (TRADING_DAYS / len(returns)) - 1) * 100,
+        'Volatility': returns.std() * np.sqrt(TRADING_DAYS),
+        'Max Drawdown %': (series / series.cummax() - 1).min() * 100,
+    }
+
+
+def test_windows_match_per_ticker_pandas(closes):
+    metrics = risk_return_metrics(closes).set_index('Ticker')
+    as_of = closes.index[-1]
+
+    for ticker in TICKERS:
+        for window, start in [('1Y', as_of - pd.DateOffset(years=1)), ('3M', as_of - pd.DateOffset(months=3)),
+                              ('YTD', pd.Timestamp(year=as_of.year, month=1, day=1))]:
+            for metric, value in _expected(closes[ticker], start).items():
+                assert metrics.loc[ticker, f"{window} {metric}"] == pytest.approx(value, rel=1e-9)
+        full = _expected(closes[ticker], closes.index[0])
+        assert metrics.loc[ticker, 'Annual Return'] == pytest.approx(full['Return %'], rel=1e-9)
+        assert metrics.loc[ticker, 'Volatility'] == pytest.approx(full['Volatility'], rel=1e-9)
+
+
+def test_sharpe_uses_the_risk_free_rate(closes):
+    metrics = risk_return_metrics(closes, risk_free_rate=0.02)
+
+    expected = (metrics['1Y Annualized Return %'] / 100 - 0.02) / metrics['1Y Volatility']
+    np.testing.assert_allclose(metrics['1Y Sharpe'], expected)
+
+
+def test_tickers_without_bars_in_a_window_are_nan(closes):
+    closes['DDD'] = np.nan
+    closes.iloc[:10, 3] = 50.0
+
+    metrics = risk_return_metrics(closes).set_index('Ticker')
+
+    assert np.isnan(metrics.loc['DDD', '1M Volatility'])
+    assert metrics.loc['AAA', '1M Volatility'] > 0
+
+
+def test_long_format_entry_point_keeps_ticker_order(closes):
+    long = closes[['CCC', 'AAA']].rename_axis('Date').reset_index().melt(
+        id_vars='Date', var_name='Symbol', value_name='Close').dropna()
+
+    metrics = calculate_risk_return(long, key_col='Symbol')
+
+    assert list(metrics['Symbol']) == ['CCC', 'AAA']
+    expected = risk_return_metrics(closes[['CCC', 'AAA']])
+    np.testing.assert_allclose(metrics['1Y Volatility'], expected['1Y Volatility'])
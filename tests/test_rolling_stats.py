@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from rolling_stats import RollingStats, load_states, save_states
+
+
+def _series(n=300, seed=7):
+    return pd.Series(np.random.default_rng(seed).normal(100, 25, n).cumsum())
+
+
+def _streamed(values, **params):
+    # Statistics after every update of a fresh RollingStats, one row per value
+    stats, rows = RollingStats(**params), []
+    for x in values:
+        stats.update(x)
+        rows.append(stats)
+        stats = RollingStats.from_state(stats.to_state())
+    return rows
+
+
+def test_window_mean_and_std_match_pandas():
+    values = _series()
+    rows = _streamed(values, windows=[1, 5, 20])
+    for window in (1, 5, 20):
+        rolling = values.rolling(window)
+        np.testing.assert_allclose([row.mean(window) for row in rows], rolling.mean(), rtol=1e-9)
+        np.testing.assert_allclose([row.std(window) for row in rows], rolling.std(), rtol=1e-7)
+
+
+def test_ewm_mean_and_std_match_pandas():
+    values = _series()
+    rows = _streamed(values, spans=[10, 50])
+    for span in (10, 50):
+        ewm = values.ewm(span=span, adjust=False)
+        np.testing.assert_allclose([row.ewma(span) for row in rows], ewm.mean(), rtol=1e-9)
+        np.testing.assert_allclose([row.ewm_std(span) for row in rows], ewm.std(), rtol=1e-7)
+
+
+def test_from_history_resumes_like_a_full_pass():
+    values = _series()
+    seeded = RollingStats.from_history(values[:200], windows=[20], spans=[10])
+    for x in values[200:]:
+        seeded.update(x)
+    assert np.isclose(seeded.std(20), values.rolling(20).std().iloc[-1])
+    assert np.isclose(seeded.ewm_std(10), values.ewm(span=10, adjust=False).std().iloc[-1])
+
+
+def test_saved_states_resume_windows_and_spans(tmp_path):
+    values = _series()
+    path = str(tmp_path / 'table.rolling.json')
+    save_states(path, {'AAA': {'last_date': '2024-01-02', 'stats': RollingStats.from_history(
+        values[:250], windows=[20], spans=[10])}})
+
+    entry = load_states(path)['AAA']
+    for x in values[250:]:
+        entry['stats'].update(x)
+
+    assert entry['last_date'] == '2024-01-02'
+    assert np.isclose(entry['stats'].std(20), values.rolling(20).std().iloc[-1])
+    assert np.isclose(entry['stats'].ewma(10), values.ewm(span=10, adjust=False).mean().iloc[-1])
+    assert np.isclose(entry['stats'].ewm_std(10), values.ewm(span=10, adjust=False).std().iloc[-1])
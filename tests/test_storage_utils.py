@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+
+from storage_utils import read_table, table_exists, write_table
+
+
+def _rows():
+    return pd.DataFrame({
+        'Time Period': ['1 Year', '1 Year', '1 Year'],
+        'Date': ['2024-01-02', '2024-01-03', '2024-01-04T00:00:00-05:00'],
+        'Symbol': ['AAA', 'AAA', 'BBB'],
+        'Sector': ['Energy', 'Energy', 'Utilities'],
+        'Open': [10.5, 11.0, 20.25],
+        'Close': [11.0, 10.75, 20.5],
+        'Volume': [123456789, 987654321, 5],
+        'Market Cap': [2.5e12, 2.5e12, 1e9],
+    })
+
+
+def test_round_trip_keeps_values_and_types(tmp_path):
+    path = str(tmp_path / 'table.csv')
+    write_table(_rows(), path)
+
+    df = read_table(path)
+
+    assert table_exists(path)
+    assert os.path.exists(str(tmp_path / 'table.parquet'))
+    assert df['Date'].tolist() == list(pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04']))
+    assert df['Symbol'].dtype == 'category' and df['Sector'].dtype == 'category'
+    assert df['Open'].dtype == 'float32' and df['Close'].dtype == 'float32'
+    assert df['Volume'].dtype == 'float64' and df['Market Cap'].dtype == 'float64'
+    assert df['Volume'].tolist() == [123456789, 987654321, 5]
+    assert df['Close'].tolist() == [11.0, 10.75, 20.5]
+
+
+def test_read_projects_columns(tmp_path):
+    path = str(tmp_path / 'table.csv')
+    write_table(_rows(), path)
+
+    assert list(read_table(path, columns=['Symbol', 'Close']).columns) == ['Symbol', 'Close']
+
+
+def test_csv_without_parquet_copy_is_converted(tmp_path):
+    path = str(tmp_path / 'table.csv')
+    _rows().to_csv(path, index=False)
+
+    df = read_table(path)
+
+    assert os.path.exists(str(tmp_path / 'table.parquet'))
+    assert df['Symbol'].dtype == 'category'
+    assert read_table(path)['Close'].tolist() == df['Close'].tolist()
+
+
+def test_newer_csv_wins_over_parquet_copy(tmp_path):
+    path = str(tmp_path / 'table.csv')
+    write_table(_rows(), path)
+    _rows().iloc[:1].to_csv(path, index=False)
+    parquet_time = os.path.getmtime(str(tmp_path / 'table.parquet'))
+    os.utime(path, (parquet_time + 10, parquet_time + 10))
+
+    assert len(read_table(path)) == 1
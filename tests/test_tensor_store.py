@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from providers import SyntheticProvider
+from tensor_store import FIELDS, TensorStore, read_index, write_tensor_store
+
+
+@pytest.fixture
+def histories():
+    provider = SyntheticProvider()
+    hists = {ticker: provider.history(ticker, period='3mo') for ticker in ['AAA', 'BBB', 'CCC']}
+    # A ticker missing a few sessions gets NaN bars there
+    hists['BBB'] = hists['BBB'].iloc[5:]
+    return hists
+
+
+def test_round_trip_matches_histories(histories, tmp_path):
+    path = str(tmp_path / 'store')
+    write_tensor_store(histories, path)
+
+    store = TensorStore(path)
+
+    assert store.tickers == ['AAA', 'BBB', 'CCC']
+    assert store.data.shape == (3, len(histories['AAA']), len(FIELDS))
+    for ticker, hist in histories.items():
+        np.testing.assert_allclose(store.get(ticker)[-len(hist):], hist[FIELDS].to_numpy(), rtol=1e-6)
+    assert np.isnan(store.get('BBB', 'Close')[:5]).all()
+
+
+def test_slices_by_date_and_field(histories, tmp_path):
+    path = str(tmp_path / 'store')
+    write_tensor_store(histories, path)
+    store = TensorStore(path)
+    start, end = store.dates[10], store.dates[20]
+
+    closes = store.to_frame('Close', ['CCC', 'AAA'], start=start, end=end)
+
+    assert list(closes.columns) == ['CCC', 'AAA']
+    assert closes.index[0] == start and closes.index[-1] == store.dates[19]
+    np.testing.assert_allclose(closes['AAA'], histories['AAA']['Close'].iloc[10:20], rtol=1e-6)
+    assert store.field_matrix('Volume').shape == (3, len(store.dates))
+
+
+def test_store_is_read_only(histories, tmp_path):
+    path = str(tmp_path / 'store')
+    write_tensor_store(histories, path)
+
+    with pytest.raises(ValueError):
+        TensorStore(path).get('AAA')[0, 0] = 0
+
+
+def test_empty_histories_are_left_out(histories, tmp_path):
+    path = str(tmp_path / 'store')
+    write_tensor_store({**histories, 'NONE': pd.DataFrame()}, path)
+
+    assert read_index(path)['tickers'] == ['AAA', 'BBB', 'CCC']
+    assert read_index(str(tmp_path / 'missing')) is None
+    with pytest.raises(FileNotFoundError):
+        TensorStore(str(tmp_path / 'missing'))